@@ -0,0 +1,224 @@
+﻿# bench_rosterbater.py — offline benchmarks for the UI bot's roster flows
+# Runs coach_rosterbater_ui against coach_fake_discord.FakeDiscord (no token, no guild) in a
+# scratch directory. Each benchmark starts every run from a freshly seeded world and reports
+# wall time p50/p99, REST calls per run by route with their p50/p99, injected 429s and, for
+# the claim stampede, how long interactions waited for their acknowledgement.
+#
+#   python bench_rosterbater.py [--runs 20] [--latency 0.05] [--jitter 0.3] [--rate-429 0.02]
+#                               [--backend journal|sqlite] [--only scheduler_pass ...]
+#                               [--out bench_output.txt]
+
+import argparse, asyncio, atexit, os, random, sys, tempfile, time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from coach_fake_discord import FakeDiscord, percentile
+
+PLAYERS = list(range(1000, 1060))
+ui = None   # coach_rosterbater_ui, imported inside a scratch directory by load_ui()
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def load_ui():
+    """Import the UI bot offline. It opens its storage and quote files relative to the cwd
+    at import, so that happens in a throwaway directory."""
+    global ui
+    if ui is None:
+        os.chdir(tempfile.mkdtemp(prefix="rosterbench-"))
+        os.environ.setdefault("DISCORD_TOKEN", "bench")
+        import coach_rosterbater_ui
+        ui = coach_rosterbater_ui
+    return ui
+
+def run(coro):
+    """asyncio.run for tests that drive the UI bot: every call shares one loop, because the
+    bot's job queue and lineup render queue stay bound to the loop they first ran on."""
+    global _loop
+    if _loop is None:
+        _loop = asyncio.new_event_loop()
+        atexit.register(_close_loop)
+    return _loop.run_until_complete(coro)
+
+def _close_loop():
+    """Stop the job queue's idle workers so the shared loop closes quietly."""
+    async def cancel_all():
+        pending = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+    _loop.run_until_complete(cancel_all())
+    _loop.close()
+
+# ========= WORLD =========
+class World:
+    """One run's state: a fresh fake guild, fresh REST caches and a fresh storage backend."""
+
+    def __init__(self, fake: FakeDiscord, backend: str, run: int):
+        from coach_storage import open_storage
+        from coach_discord import DMDispatcher, MessageCache, UserCache
+        self.fake = fake
+        self.rng = random.Random(run)
+        fake.channels.clear()
+        fake.users.clear()
+        for cid, name in ((ui.LINEUP_CHANNEL_ID, "lineup"), (ui.GENERAL_CHANNEL_ID, "general"),
+                          (ui.COACH_LOG_CHANNEL_ID, "coach-log")):
+            fake.add_channel(cid, name)
+        ui.user_cache = UserCache(ui.bot)
+        ui.dm_dispatcher = DMDispatcher(ui.user_cache.get)
+        ui.message_cache = MessageCache(ui.bot)
+        ui._stage_times.clear()
+        d = tempfile.mkdtemp(prefix=f"run{run}-", dir=os.getcwd())
+        ui.db = open_storage(os.path.join(d, "storage.json"), backend, os.path.join(d, "storage.db"))
+
+    def game(self, minutes_out: int, open_positions=(), fill: float = 1.0, confirmed: float = 0.5,
+             opponent: Optional[str] = None):
+        dt = datetime.fromtimestamp(ui.clock() + minutes_out * 60, ui.TZ).replace(second=0, microsecond=0)
+        g = ui.Game(ui.dt_to_iso(dt), dt, opponent or f"Opponent {minutes_out}")
+        uids = self.rng.sample(PLAYERS, len(ui.ALL_POSITIONS))
+        for pos, uid in zip(ui.ALL_POSITIONS, uids):
+            if pos not in open_positions and self.rng.random() < fill:
+                g.slot(pos).assign(uid, confirmed=self.rng.random() < confirmed)
+        ui.db.add_game(g)
+        ui.schedule_game(g)
+        return g
+
+    def close(self):
+        ui.db.close()
+
+# ========= BENCHMARKS =========
+# Each takes a World and returns {"op": [seconds, ...]} for anything worth a percentile
+# beyond the run's wall time (per-call latencies, interaction acks).
+BENCHES: Dict[str, Callable] = {}
+
+def bench(fn):
+    BENCHES[fn.__name__] = fn
+    return fn
+
+@bench
+async def register_persistent_views(w: World):
+    t0 = time.perf_counter()
+    ui.register_persistent_views()
+    return {"call": [time.perf_counter() - t0]}
+
+@bench
+async def post_or_update_lineup(w: World):
+    games = [w.game(m) for m in (90, 300, 900, 1500, 2400)]
+    first, edits = [], []
+    for g in games:
+        t0 = time.perf_counter()
+        await ui.post_or_update_lineup(g, note="New game created.")
+        first.append(time.perf_counter() - t0)
+    for g in games:
+        t0 = time.perf_counter()
+        await ui.post_or_update_lineup(g, note="Roster updated.")
+        edits.append(time.perf_counter() - t0)
+    return {"first post": first, "update": edits}
+
+@bench
+async def replacement_round(w: World):
+    g = w.game(25, open_positions=("C", "LD", "G"))
+    await ui.post_or_update_lineup(g)
+    w.fake.reset_stats()
+    await ui.replacement_round(g, reason="30m")
+    return {}
+
+@bench
+async def scheduler_pass(w: World):
+    for m in (8, 25, 50, 95, 180, 480, 1200, 1800):
+        w.game(m, fill=0.7)
+    await ui.scheduler_pass()
+    return {}
+
+STAMPEDE = 25   # players hitting the same Claim button at once
+
+@bench
+async def claim_stampede(w: World):
+    g = w.game(40, open_positions=("C",))
+    await ui.post_or_update_lineup(g)
+    await ui.post_claim_request(g, "C")
+    w.fake.reset_stats()
+    rostered = {g.user(pos) for pos in ui.ALL_POSITIONS}
+    clickers = w.rng.sample([u for u in PLAYERS if u not in rostered], STAMPEDE)
+    inters = [w.fake.interaction(uid, ui.GENERAL_CHANNEL_ID) for uid in clickers]
+    await asyncio.gather(*(ui.ClaimButton(g.id, "C").callback(i) for i in inters))
+    holders = [i for i in inters if isinstance(i.response.view, ui.ConfirmClaimView)]
+    assert len(holders) == 1, f"{len(holders)} claimers got the confirm prompt"
+    view = holders[0].response.view
+    confirm = w.fake.interaction(holders[0].user.id)
+    await view.yes.callback(confirm)
+    await ui.jobs.join()
+    assert g.user("C") == holders[0].user.id and not g.slot("C").request_id
+    return {"ack": [i.acked_after for i in inters + [confirm]]}
+
+# ========= HARNESS =========
+def ms(s: float) -> str:
+    return f"{s * 1000:8.1f} ms"
+
+async def run_bench(name: str, args) -> List[str]:
+    fake = FakeDiscord(latency=args.latency, jitter=args.jitter, rate_429=args.rate_429,
+                       retry_after=args.retry_after, member_cache=not args.no_member_cache, seed=1)
+    fake.install(ui.bot)
+    walls: List[float] = []
+    ops: Dict[str, List[float]] = {}
+    calls: Dict[str, int] = {}
+    limited: Dict[str, int] = {}
+    timings: Dict[str, List[float]] = {}
+    for run in range(args.runs):
+        w = World(fake, args.backend, run)
+        fake.reset_stats()
+        t0 = time.perf_counter()
+        extra = await BENCHES[name](w)
+        await ui.jobs.join()
+        walls.append(time.perf_counter() - t0)
+        for op, samples in extra.items():
+            ops.setdefault(op, []).extend(samples)
+        for route, n in fake.calls.items():
+            calls[route] = calls.get(route, 0) + n
+            limited[route] = limited.get(route, 0) + fake.limited.get(route, 0)
+            timings.setdefault(route, []).extend(fake.timings[route])
+        await ui.lineup_renders.drain()
+        w.close()
+    runs = args.runs
+    out = [f"== {name}  ({runs} runs, latency {args.latency * 1000:.0f} ms ±{args.jitter:.0%}, "
+           f"429 rate {args.rate_429:.1%}, {args.backend})",
+           f"  wall        p50 {ms(percentile(walls, 50))}   p99 {ms(percentile(walls, 99))}"]
+    for op, samples in ops.items():
+        out.append(f"  {op:<11} p50 {ms(percentile(samples, 50))}   p99 {ms(percentile(samples, 99))}   (n={len(samples)})")
+    out.append(f"  api calls   {sum(calls.values()) / runs:.1f}/run   429s {sum(limited.values()) / runs:.1f}/run")
+    for route in sorted(calls):
+        t = timings[route]
+        out.append(f"    {route:<22} {calls[route] / runs:7.1f}/run   p50 {ms(percentile(t, 50))}   p99 {ms(percentile(t, 99))}")
+    return out
+
+async def bench_main(args):
+    lines = []
+    for name in args.only or BENCHES:
+        block = await run_bench(name, args)
+        print("\n".join(block), flush=True)
+        lines += block + [""]
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            fh.write("\n".join(lines))
+
+def main():
+    ap = argparse.ArgumentParser(description="Offline benchmarks for coach_rosterbater_ui.")
+    ap.add_argument("--runs", type=int, default=20)
+    ap.add_argument("--latency", type=float, default=0.05, help="seconds per fake REST call")
+    ap.add_argument("--jitter", type=float, default=0.3, help="latency spread, fraction of --latency")
+    ap.add_argument("--rate-429", type=float, default=0.0, help="chance a REST call is rate limited")
+    ap.add_argument("--retry-after", type=float, default=0.25, help="seconds an injected 429 costs")
+    ap.add_argument("--no-member-cache", action="store_true", help="every user lookup is a fetch_user")
+    ap.add_argument("--backend", choices=("journal", "sqlite"), default="journal")
+    ap.add_argument("--only", nargs="*", choices=sorted(BENCHES))
+    ap.add_argument("--out", help="also write the report here (e.g. bench_output.txt)")
+    args = ap.parse_args()
+    if args.out:
+        args.out = os.path.abspath(args.out)
+
+    load_ui()
+    asyncio.run(bench_main(args))
+
+if __name__ == "__main__":
+    main()
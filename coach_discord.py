@@ -0,0 +1,279 @@
+﻿# coach_discord.py — Discord REST helpers shared by both rosterbater bots
+# DMDispatcher: bounded-concurrency DM fan-out with 429 back-off and retries.
+# UserCache:    user lookups that only hit REST when the gateway cache misses.
+# MessageCache: PartialMessage handles for stored message ids (edit/delete without a fetch).
+# JobQueue:     side effects of an interaction, run by background workers after it was acked.
+
+import asyncio, functools, random, time, traceback
+from collections import OrderedDict
+from datetime import timedelta
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+import discord
+
+DM_CONCURRENCY = 4      # DMs in flight at once
+DM_ATTEMPTS    = 3      # tries per DM before it counts as failed
+DM_BACKOFF     = 0.5    # seconds, doubled per retry (plus jitter)
+DM_ROUTE       = "dm"   # DM-channel open + send share one back-off window
+
+USER_CACHE_SIZE = 512         # fetched users kept (LRU)
+USER_CACHE_TTL  = 6 * 3600    # seconds before a fetched user is fetched again
+
+MESSAGE_CACHE_SIZE = 1024     # message handles kept (LRU)
+BULK_DELETE_MAX_AGE = timedelta(days=14) - timedelta(minutes=5)   # Discord refuses older ones
+BULK_DELETE_CHUNK = 100
+
+JOB_WORKERS = 4               # background jobs running at once
+
+class UserCache:
+    """bot.get_user (gateway cache) first, then a TTL/LRU of users we fetched,
+    then one shared bot.fetch_user per id no matter how many callers ask at once."""
+
+    def __init__(self, bot: discord.Client, maxsize: int = USER_CACHE_SIZE, ttl: float = USER_CACHE_TTL):
+        self.bot = bot
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._users: "OrderedDict[int, Tuple[float, discord.User]]" = OrderedDict()
+        self._inflight: Dict[int, asyncio.Task] = {}
+        self.gateway_hits = 0
+        self.cache_hits = 0
+        self.misses = 0       # REST fetches actually made
+        self.joined = 0       # callers that piggybacked on an in-flight fetch
+
+    async def get(self, uid: int) -> discord.User:
+        u = self.bot.get_user(uid)
+        if u is not None:
+            self.gateway_hits += 1
+            return u
+        entry = self._users.get(uid)
+        if entry and entry[0] > time.monotonic():
+            self._users.move_to_end(uid)
+            self.cache_hits += 1
+            return entry[1]
+        task = self._inflight.get(uid)
+        if task is None:
+            self.misses += 1
+            task = self._inflight[uid] = asyncio.ensure_future(self._fetch(uid))
+        else:
+            self.joined += 1
+        return await asyncio.shield(task)
+
+    async def _fetch(self, uid: int) -> discord.User:
+        try:
+            u = await self.bot.fetch_user(uid)
+        finally:
+            self._inflight.pop(uid, None)
+        self._users[uid] = (time.monotonic() + self.ttl, u)
+        self._users.move_to_end(uid)
+        while len(self._users) > self.maxsize:
+            self._users.popitem(last=False)
+        return u
+
+    def forget(self, uid: int):
+        self._users.pop(uid, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "gateway_hits": self.gateway_hits,
+            "cache_hits": self.cache_hits,
+            "misses": self.misses,
+            "joined": self.joined,
+            "size": len(self._users),
+        }
+
+@dataclass
+class DMJob:
+    user_id: int
+    content: str
+    view: Optional[discord.ui.View] = None
+
+@dataclass
+class DMSummary:
+    sent: List[int] = field(default_factory=list)
+    forbidden: List[int] = field(default_factory=list)
+    failed: List[int] = field(default_factory=list)
+
+    def describe(self) -> str:
+        text = f"{len(self.sent)} sent, {len(self.forbidden)} blocked, {len(self.failed)} failed"
+        if self.forbidden:
+            text += " — DMs closed: " + " ".join(f"<@{u}>" for u in self.forbidden)
+        if self.failed:
+            text += " — failed: " + " ".join(f"<@{u}>" for u in self.failed)
+        return text
+
+class DMDispatcher:
+    def __init__(self, resolve_user: Callable[[int], Awaitable[discord.abc.User]],
+                 concurrency: int = DM_CONCURRENCY, attempts: int = DM_ATTEMPTS):
+        self.resolve_user = resolve_user
+        self.attempts = attempts
+        self._sem = asyncio.Semaphore(concurrency)
+        self._route_free_at: Dict[str, float] = {}   # route -> monotonic time it may be hit again
+
+    async def _route_wait(self, route: str):
+        delay = self._route_free_at.get(route, 0.0) - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _route_hold(self, route: str, seconds: float):
+        until = time.monotonic() + seconds
+        if until > self._route_free_at.get(route, 0.0):
+            self._route_free_at[route] = until
+
+    async def send(self, job: DMJob) -> str:
+        """Returns "sent", "forbidden" or "failed"."""
+        for attempt in range(self.attempts):
+            backoff = DM_BACKOFF * (2 ** attempt) + random.uniform(0, DM_BACKOFF)
+            try:
+                async with self._sem:
+                    await self._route_wait(DM_ROUTE)
+                    user = await self.resolve_user(job.user_id)
+                    if job.view is not None:
+                        await user.send(job.content, view=job.view)
+                    else:
+                        await user.send(job.content)
+                return "sent"
+            except discord.Forbidden:
+                return "forbidden"
+            except discord.NotFound:
+                return "failed"
+            except discord.HTTPException as e:
+                if e.status == 429:
+                    retry_after = 0.0
+                    if e.response is not None:
+                        try:
+                            retry_after = float(e.response.headers.get("Retry-After", 0))
+                        except (TypeError, ValueError):
+                            pass
+                    self._route_hold(DM_ROUTE, max(retry_after, backoff))
+                elif e.status < 500:
+                    return "failed"
+                elif attempt + 1 < self.attempts:
+                    await asyncio.sleep(backoff)
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if attempt + 1 < self.attempts:
+                    await asyncio.sleep(backoff)
+        return "failed"
+
+    async def send_many(self, jobs: List[DMJob]) -> DMSummary:
+        results = await asyncio.gather(*(self.send(j) for j in jobs))
+        summary = DMSummary()
+        for job, res in zip(jobs, results):
+            getattr(summary, res).append(job.user_id)
+        return summary
+
+class MessageCache:
+    """PartialMessage handles keyed by (channel_id, message_id). We already store the ids
+    of every message we edit or delete later, so there is no need to fetch the message
+    first: edit()/delete() go straight to the one REST call. A 404 drops the handle and
+    is reported back (edit -> None) so callers can clear the stored id and re-post."""
+
+    def __init__(self, bot: discord.Client, maxsize: int = MESSAGE_CACHE_SIZE):
+        self.bot = bot
+        self.maxsize = maxsize
+        self._handles: "OrderedDict[Tuple[int, int], discord.PartialMessage]" = OrderedDict()
+        self.stale = 0   # handles dropped on 404
+
+    def get(self, channel_id: int, message_id: int) -> discord.PartialMessage:
+        key = (int(channel_id), int(message_id))
+        h = self._handles.get(key)
+        if h is not None:
+            self._handles.move_to_end(key)
+            return h
+        ch = self.bot.get_channel(key[0]) or self.bot.get_partial_messageable(key[0])
+        h = self._handles[key] = ch.get_partial_message(key[1])
+        while len(self._handles) > self.maxsize:
+            self._handles.popitem(last=False)
+        return h
+
+    def invalidate(self, channel_id: int, message_id: int):
+        if self._handles.pop((int(channel_id), int(message_id)), None) is not None:
+            self.stale += 1
+
+    async def edit(self, channel_id: int, message_id: int, **fields) -> Optional[discord.Message]:
+        try:
+            return await self.get(channel_id, message_id).edit(**fields)
+        except discord.NotFound:
+            self.invalidate(channel_id, message_id)
+            return None
+
+    async def delete(self, channel_id: int, message_id: int) -> bool:
+        """True once the message is gone (including when it already was)."""
+        try:
+            await self.get(channel_id, message_id).delete()
+        except discord.NotFound:
+            self.invalidate(channel_id, message_id)
+            return True
+        except discord.HTTPException:
+            return False
+        self._handles.pop((int(channel_id), int(message_id)), None)
+        return True
+
+    async def delete_many(self, channel_id: int, message_ids: List[int]) -> int:
+        """Delete several messages from one channel: bulk delete where Discord allows it
+        (2–100 messages, under 14 days old, Manage Messages), concurrent single deletes
+        otherwise. Returns how many are gone."""
+        ids = list(dict.fromkeys(int(m) for m in message_ids if m))
+        ch = self.bot.get_channel(int(channel_id))
+        singles = ids
+        gone = 0
+        if len(ids) >= 2 and isinstance(ch, (discord.TextChannel, discord.Thread)):
+            cutoff = discord.utils.utcnow() - BULK_DELETE_MAX_AGE
+            young = [m for m in ids if discord.utils.snowflake_time(m) > cutoff]
+            singles = [m for m in ids if m not in young]
+            for i in range(0, len(young), BULK_DELETE_CHUNK):
+                chunk = young[i:i + BULK_DELETE_CHUNK]
+                if len(chunk) < 2:
+                    singles.extend(chunk)
+                    continue
+                try:
+                    await ch.delete_messages([discord.Object(id=m) for m in chunk])
+                    gone += len(chunk)
+                    for m in chunk:
+                        self._handles.pop((int(channel_id), m), None)
+                except discord.HTTPException:
+                    singles.extend(chunk)   # no Manage Messages, or an id was already gone
+        results = await asyncio.gather(*(self.delete(channel_id, m) for m in singles))
+        return gone + sum(1 for ok in results if ok)
+
+class JobQueue:
+    """Component callbacks answer the interaction first (send/edit/defer) and submit the
+    slow part — request deletes, DMs, lineup edits, broadcasts — here, so Discord latency
+    downstream can never run out the 3-second response window. Workers start on the first
+    submit. A job that raises goes to on_error(name, exc); the queue keeps going."""
+
+    def __init__(self, on_error: Callable[[str, Exception], Awaitable[None]], workers: int = JOB_WORKERS):
+        self.on_error = on_error
+        self.workers = workers
+        self._queue: "asyncio.Queue[Tuple[str, Callable[[], Awaitable[None]]]]" = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self.done = 0
+        self.failed = 0
+
+    def submit(self, name: str, fn: Callable[..., Awaitable[None]], *args, **kwargs):
+        self._queue.put_nowait((name, functools.partial(fn, *args, **kwargs)))
+        if not self._tasks:
+            self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    async def _worker(self):
+        while True:
+            name, job = await self._queue.get()
+            try:
+                await job()
+                self.done += 1
+            except Exception as e:
+                self.failed += 1
+                try:
+                    await self.on_error(name, e)
+                except Exception:
+                    traceback.print_exc()
+            finally:
+                self._queue.task_done()
+
+    async def join(self):
+        """Wait until everything submitted so far has run."""
+        await self._queue.join()
+
+    def stats(self) -> Dict[str, int]:
+        return {"pending": self._queue.qsize(), "done": self.done, "failed": self.failed}
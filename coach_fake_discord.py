@@ -0,0 +1,338 @@
+﻿# coach_fake_discord.py — in-process stand-in for the slice of Discord the bots talk to
+# FakeDiscord.install(bot) points bot.get_channel/get_partial_messageable/get_user/fetch_user
+# at fake channels, threads, messages and users. Every REST call the bots would make goes
+# through FakeDiscord.call(route): it is counted, delayed by a configurable latency and
+# can be hit with injected 429s, so flows can be timed without a live guild. With
+# trace=True each call is also logged as (clock(), context, route, detail).
+# Used by bench_rosterbater.py and sim_rosterbater.py; the bots never import it.
+
+import asyncio, itertools, random, time
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import discord
+from discord.utils import DISCORD_EPOCH
+
+class _Response:
+    """Enough of an aiohttp response for discord.HTTPException to build itself from."""
+    def __init__(self, status: int, reason: str, retry_after: float = 0.0):
+        self.status = status
+        self.reason = reason
+        self.headers = {"Retry-After": str(retry_after)} if retry_after else {}
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    s = sorted(samples)
+    return s[min(len(s) - 1, max(0, int(round(pct / 100 * len(s) + 0.5)) - 1))]
+
+def _gist(text: Optional[str], width: int = 90) -> str:
+    line = (text or "").strip().splitlines()[0] if (text or "").strip() else ""
+    return line if len(line) <= width else line[:width - 1] + "…"
+
+def _what(content: Optional[str], embed: Optional[discord.Embed]) -> str:
+    return _gist(content) if content else f"[embed] {_gist(embed.title if embed else '')}"
+
+# ========= MESSAGES =========
+class FakeMessage:
+    def __init__(self, fake: "FakeDiscord", channel, mid: int, author, content: Optional[str] = None,
+                 embed: Optional[discord.Embed] = None, view: Optional[discord.ui.View] = None):
+        self._fake = fake
+        self.channel = channel
+        self.id = mid
+        self.author = author
+        self.content = content
+        self.embed = embed
+        self.view = view
+        self.pinned = False
+
+    async def edit(self, *, content=None, embed=None, view=None, **_):
+        await self._fake.call("edit", f"#{self.channel.name}: {_what(content, embed)}")
+        self._live()
+        if content is not None:
+            self.content = content
+        if embed is not None:
+            self.embed = embed
+        self.view = view if view is not None else self.view
+        return self
+
+    async def delete(self, **_):
+        await self._fake.call("delete", f"#{self.channel.name}: {_what(self.content, self.embed)}")
+        self._live()
+        del self.channel.messages[self.id]
+
+    async def fetch(self):
+        await self._fake.call("fetch")
+        return self._live()
+
+    async def pin(self, **_):
+        await self._fake.call("pin", f"#{self.channel.name}: {_gist(self.content)}")
+        self._live().pinned = True
+
+    async def create_thread(self, *, name: str, auto_archive_duration: int = 1440, **_):
+        await self._fake.call("create_thread", f"#{self.channel.name} → {name}")
+        self._live()
+        return self._fake._add(FakeThread, self.id, name, parent=self.channel)
+
+    def _live(self) -> "FakeMessage":
+        if self.channel.messages.get(self.id) is not self:
+            raise discord.NotFound(_Response(404, "Not Found"), "Unknown Message")
+        return self
+
+class FakePartialMessage:
+    """channel.get_partial_message(id): a handle that resolves the id on every call, like
+    discord.PartialMessage does on the server side."""
+    def __init__(self, channel, mid: int):
+        self.channel = channel
+        self.id = mid
+
+    def _msg(self) -> FakeMessage:
+        m = self.channel.messages.get(self.id)
+        if m is None:
+            raise discord.NotFound(_Response(404, "Not Found"), "Unknown Message")
+        return m
+
+    async def edit(self, **fields):
+        try:
+            return await self._msg().edit(**fields)
+        except discord.NotFound:
+            await self.channel._fake.call("edit", f"#{self.channel.name}: unknown message {self.id}")
+            raise
+
+    async def delete(self, **_):
+        m = self.channel.messages.get(self.id)
+        if m is None:
+            await self.channel._fake.call("delete", f"#{self.channel.name}: unknown message {self.id}")
+            raise discord.NotFound(_Response(404, "Not Found"), "Unknown Message")
+        await m.delete()
+
+    async def fetch(self):
+        m = self.channel.messages.get(self.id)
+        if m is None:
+            await self.channel._fake.call("fetch", f"#{self.channel.name}: unknown message {self.id}")
+            raise discord.NotFound(_Response(404, "Not Found"), "Unknown Message")
+        return await m.fetch()
+
+    async def create_thread(self, **kw):
+        return await self._msg().create_thread(**kw)
+
+# ========= CHANNELS =========
+class _FakeChannelMixin:
+    def _setup(self, fake: "FakeDiscord", cid: int, name: str, parent=None):
+        self._fake = fake
+        self.id = cid
+        self.name = name
+        self.parent_channel = parent
+        self.messages: Dict[int, FakeMessage] = {}
+
+    def __repr__(self):
+        return f"<{type(self).__name__} id={self.id} name={self.name!r} messages={len(self.messages)}>"
+
+    async def send(self, content: Optional[str] = None, *, embed: Optional[discord.Embed] = None,
+                   view: Optional[discord.ui.View] = None, **_) -> FakeMessage:
+        await self._fake.call("send", f"#{self.name}: {_what(content, embed)}")
+        mid = self._fake.snowflake()
+        m = self.messages[mid] = FakeMessage(self._fake, self, mid, self._fake.me, content, embed, view)
+        return m
+
+    def get_partial_message(self, mid: int) -> FakePartialMessage:
+        return FakePartialMessage(self, int(mid))
+
+    async def fetch_message(self, mid: int) -> FakeMessage:
+        return await self.get_partial_message(mid).fetch()
+
+    async def delete_messages(self, objs: Iterable[discord.abc.Snowflake], **_):
+        ids = [o.id for o in objs]
+        await self._fake.call("bulk_delete", f"#{self.name}: {len(ids)} messages")
+        if any(i not in self.messages for i in ids):
+            raise discord.NotFound(_Response(404, "Not Found"), "Unknown Message")
+        for i in ids:
+            del self.messages[i]
+
+    async def history(self, limit: Optional[int] = 100, **_):
+        await self._fake.call("history")
+        for mid in sorted(self.messages, reverse=True)[:limit]:
+            yield self.messages[mid]
+
+class FakeChannel(_FakeChannelMixin, discord.TextChannel):
+    def __init__(self, fake: "FakeDiscord", cid: int, name: str, parent=None):
+        self._setup(fake, cid, name, parent)
+
+class FakeThread(_FakeChannelMixin, discord.Thread):
+    def __init__(self, fake: "FakeDiscord", cid: int, name: str, parent=None):
+        self._setup(fake, cid, name, parent)
+
+# ========= USERS =========
+class FakeUser:
+    def __init__(self, fake: "FakeDiscord", uid: int):
+        self._fake = fake
+        self.id = uid
+        self.name = f"user{uid}"
+        self.bot = False
+        self.dms: List[str] = []
+
+    @property
+    def mention(self) -> str:
+        return f"<@{self.id}>"
+
+    async def send(self, content: Optional[str] = None, **_):
+        await self._fake.call("dm", f"@{self.id}: {_gist(content)}")
+        if self.id in self._fake.blocked:
+            raise discord.Forbidden(_Response(403, "Forbidden"), "Cannot send messages to this user")
+        self.dms.append(content or "")
+        return FakeMessage(self._fake, None, self._fake.snowflake(), self._fake.me, content)
+
+# ========= INTERACTIONS =========
+class FakeResponse:
+    def __init__(self, inter: "FakeInteraction"):
+        self._inter = inter
+        self._done = False
+        self.kind: Optional[str] = None
+        self.content: Optional[str] = None
+        self.view: Optional[discord.ui.View] = None
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def _respond(self, kind: str, content=None, view=None):
+        if self._done:
+            raise discord.InteractionResponded(self._inter)
+        self._done = True
+        await self._inter._fake.call("interaction_response", f"@{self._inter.user.id} {kind}: {_gist(content)}")
+        self.kind, self.content, self.view = kind, content, view
+        self._inter.acked_after = time.monotonic() - self._inter.created
+
+    async def send_message(self, content=None, *, view=None, **_):
+        await self._respond("message", content, view)
+
+    async def edit_message(self, *, content=None, view=None, **_):
+        await self._respond("edit", content, view)
+
+    async def defer(self, **_):
+        await self._respond("defer")
+
+    async def send_modal(self, modal):
+        await self._respond("modal", view=modal)
+
+class FakeFollowup:
+    def __init__(self, inter: "FakeInteraction"):
+        self._inter = inter
+        self.sent: List[str] = []
+
+    async def send(self, content=None, **_):
+        await self._inter._fake.call("followup", f"@{self._inter.user.id}: {_gist(content)}")
+        self.sent.append(content or "")
+
+class FakeInteraction:
+    def __init__(self, fake: "FakeDiscord", user: FakeUser, channel=None):
+        self._fake = fake
+        self.user = user
+        self.channel = channel
+        self.created = time.monotonic()
+        self.acked_after: Optional[float] = None   # seconds until the first response landed
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+
+# ========= THE FAKE =========
+class FakeDiscord:
+    """latency/jitter: seconds per REST call (uniform ±jitter fraction). rate_429: chance a
+    call is rate limited; by default it is retried after retry_after like discord.py's HTTP
+    client does, with surface_429=True the HTTPException(429) reaches the caller instead.
+    blocked: user ids whose DMs raise Forbidden. With member_cache every id is a cached guild
+    member; member_cache=False makes bot.get_user miss, so lookups go through fetch_user.
+    clock/trace: see the module header; .context tags the calls that follow it."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, rate_429: float = 0.0,
+                 retry_after: float = 0.05, surface_429: bool = False, blocked: Iterable[int] = (),
+                 member_cache: bool = True, seed: Optional[int] = None,
+                 clock: Callable[[], float] = time.time, trace: bool = False):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.surface_429 = surface_429
+        self.blocked = set(blocked)
+        self.member_cache = member_cache
+        self.rng = random.Random(seed)
+        self.clock = clock
+        self.tracing = trace
+        self.trace: List[Tuple[float, str, str, str]] = []
+        self.context = ""
+        self._seq = itertools.count()
+        self.channels: Dict[int, _FakeChannelMixin] = {}
+        self.users: Dict[int, FakeUser] = {}
+        self.me = FakeUser(self, 1)
+        self.reset_stats()
+
+    # ---- REST accounting ----
+    def reset_stats(self):
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.limited: Dict[str, int] = defaultdict(int)
+        self.timings: Dict[str, List[float]] = defaultdict(list)
+
+    async def call(self, route: str, detail: str = ""):
+        t0 = time.monotonic()
+        self.calls[route] += 1
+        if self.tracing:
+            self.trace.append((self.clock(), self.context, route, detail))
+        while self.rate_429 and self.rng.random() < self.rate_429:
+            self.limited[route] += 1
+            if self.surface_429:
+                raise discord.HTTPException(_Response(429, "Too Many Requests", self.retry_after), "rate limited")
+            await asyncio.sleep(self.retry_after)
+            self.calls[route] += 1
+        delay = self.latency * (1 + self.rng.uniform(-self.jitter, self.jitter))
+        await asyncio.sleep(max(0.0, delay))
+        self.timings[route].append(time.monotonic() - t0)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {r: {"calls": n, "429": self.limited.get(r, 0),
+                    "p50_ms": percentile(self.timings[r], 50) * 1000,
+                    "p99_ms": percentile(self.timings[r], 99) * 1000}
+                for r, n in sorted(self.calls.items())}
+
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    # ---- world ----
+    def snowflake(self) -> int:
+        # real timestamps, so age checks like the 14-day bulk-delete cutoff behave
+        return ((int(time.time() * 1000) - DISCORD_EPOCH) << 22) | (next(self._seq) & 0x3FFFFF)
+
+    def _add(self, cls, cid: int, name: str, parent=None):
+        ch = self.channels[cid] = cls(self, cid, name, parent)
+        return ch
+
+    def add_channel(self, cid: int, name: str) -> FakeChannel:
+        return self._add(FakeChannel, cid, name)
+
+    def user(self, uid: int) -> FakeUser:
+        u = self.users.get(uid)
+        if u is None:
+            u = self.users[uid] = FakeUser(self, uid)
+        return u
+
+    def interaction(self, uid: int, channel_id: Optional[int] = None) -> FakeInteraction:
+        return FakeInteraction(self, self.user(uid), self.channels.get(channel_id) if channel_id else None)
+
+    # ---- bot hooks ----
+    def get_channel(self, cid: int):
+        return self.channels.get(int(cid))
+
+    def get_partial_messageable(self, cid: int, **_):
+        # unknown ids (archived threads) still accept sends, like a real PartialMessageable
+        return self.channels.get(int(cid)) or self._add(FakeThread, int(cid), f"partial-{cid}")
+
+    def get_user(self, uid: int) -> Optional[FakeUser]:
+        return self.user(uid) if self.member_cache else None
+
+    async def fetch_user(self, uid: int) -> FakeUser:
+        await self.call("fetch_user", str(uid))
+        return self.user(uid)
+
+    def install(self, bot: discord.Client):
+        bot.get_channel = self.get_channel
+        bot.get_partial_messageable = self.get_partial_messageable
+        bot.get_user = self.get_user
+        bot.fetch_user = self.fetch_user
+        bot._connection.user = self.me
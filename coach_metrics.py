@@ -0,0 +1,255 @@
+﻿# coach_metrics.py — Prometheus text-format metrics for the UI bot
+# Registry holds counters, gauges and histograms; serve_metrics() exposes them as
+# GET /metrics on a loopback port (aiohttp.web, already pulled in by discord.py), so a
+# local Prometheus or `curl 127.0.0.1:<port>/metrics` can scrape it. Recording is a dict
+# lookup plus an add under an uncontended lock, cheap enough to leave on in production.
+# Gauges that mirror other objects' state (job queue, caches, storage size) are filled in
+# by collector callbacks at scrape time rather than on every change.
+#
+# The instrument_* helpers attach to discord.py without touching the bots' callbacks:
+#   instrument_ui(reg)            run time of every component callback, modal and slash command
+#   instrument_http(http, reg)    Discord REST calls by route (count + latency, errors by status)
+#   http_trace(reg)               aiohttp trace config counting raw 429 responses, retries included
+
+import re, threading, time, traceback
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import aiohttp
+from aiohttp import web
+import discord
+
+METRICS_HOST = "127.0.0.1"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _escape(v: str) -> str:
+    return str(v).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _num(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(int(v)) if float(v).is_integer() else repr(float(v))
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, doc: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.doc = doc
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()   # the storage writer thread records too
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, doc: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, doc, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, n: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + n
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, k)} {_num(v)}" for k, v in items]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str):
+        with self._lock:
+            self._values[labels] = float(value)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, doc: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, doc, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], List[float]] = {}   # labels -> [per-bucket counts..., +Inf, sum]
+
+    def observe(self, value: float, *labels: str):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(labels)
+            if s is None:
+                s = self._series[labels] = [0.0] * (len(self.buckets) + 2)
+            s[i] += 1
+            s[-1] += value
+
+    @contextmanager
+    def time(self, *labels: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, *labels)
+
+    def count(self, *labels: str) -> int:
+        s = self._series.get(labels)
+        return int(sum(s[:-1])) if s else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(s)) for k, s in self._series.items())
+        out = self.header()
+        bounds = [_num(b) for b in self.buckets] + ["+Inf"]
+        for k, s in items:
+            acc = 0.0
+            for le, n in zip(bounds, s[:-1]):
+                acc += n
+                bound = f'le="{le}"'
+                out.append(f"{self.name}_bucket{_labels(self.labelnames, k, bound)} {_num(acc)}")
+            out.append(f"{self.name}_sum{_labels(self.labelnames, k)} {_num(s[-1])}")
+            out.append(f"{self.name}_count{_labels(self.labelnames, k)} {_num(acc)}")
+        return out
+
+class Registry:
+    """Metrics by name, prefixed with `namespace_`. Collectors run before each scrape."""
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def _add(self, cls, name: str, *args, **kwargs):
+        full = f"{self.namespace}_{name}"
+        m = self._metrics.get(full)
+        if m is None:
+            m = self._metrics[full] = cls(full, *args, **kwargs)
+        return m
+
+    def counter(self, name: str, doc: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._add(Counter, name, doc, labelnames)
+
+    def gauge(self, name: str, doc: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge, name, doc, labelnames)
+
+    def histogram(self, name: str, doc: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram, name, doc, labelnames, buckets)
+
+    def collector(self, fn: Callable[[], None]) -> Callable[[], None]:
+        self._collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        for fn in self._collectors:
+            try:
+                fn()
+            except Exception as e:
+                print(f"⚠️ metrics collector {fn.__name__}: {e}\n{traceback.format_exc()}")
+        lines: List[str] = []
+        for m in self._metrics.values():
+            lines += m.render()
+        return "\n".join(lines) + "\n"
+
+async def serve_metrics(reg: Registry, port: int, host: str = METRICS_HOST) -> web.AppRunner:
+    async def handle(_request: web.Request) -> web.Response:
+        return web.Response(body=reg.render().encode("utf-8"), headers={"Content-Type": CONTENT_TYPE})
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+# ========= DISCORD HOOKS =========
+def handler_name(view: Optional[discord.ui.View], item) -> str:
+    """SaveSlotBtn, ClaimButton (dynamic items), ConfirmClaimView.yes (decorated buttons)."""
+    cb = getattr(getattr(item, "callback", None), "callback", None)   # @discord.ui.button wrapper
+    if view is not None and cb is not None:
+        return f"{type(view).__name__}.{cb.__name__}"
+    return type(item).__name__
+
+def instrument_ui(reg: Registry):
+    """Wrap discord.py's dispatch of views, dynamic items, modals and app commands so every
+    handler is timed (checks and discord.py's error handling included) without decorating
+    each callback."""
+    seconds = reg.histogram("handler_seconds", "Interaction handler run time (component callbacks, modals, slash commands).", ("handler",))
+
+    def timed(name_of, orig):
+        async def wrapper(*args, **kwargs):
+            name = name_of(*args)
+            t0 = time.perf_counter()
+            try:
+                return await orig(*args, **kwargs)
+            finally:
+                seconds.observe(time.perf_counter() - t0, name)
+        wrapper.__wrapped__ = orig
+        return wrapper
+
+    View, Modal = discord.ui.View, discord.ui.Modal
+    store = discord.ui.view.ViewStore
+    tree = discord.app_commands.CommandTree
+    for owner, attr, name_of in (
+        (View, "_scheduled_task", lambda view, item, *_: handler_name(view, item)),
+        (Modal, "_scheduled_task", lambda modal, *_: type(modal).__name__),
+        (store, "schedule_dynamic_item_call", lambda _store, _type, factory, *_: factory.__name__),
+        (tree, "_call", lambda _tree, inter, *_: "/" + str((inter.data or {}).get("name", "?"))),
+    ):
+        orig = getattr(owner, attr, None)
+        if orig is None or hasattr(orig, "__wrapped__"):
+            continue
+        setattr(owner, attr, timed(name_of, orig))
+
+_SNOWFLAKE = re.compile(r"/\d{15,21}")
+_API_PREFIX = re.compile(r"^/api/v\d+")
+
+def instrument_http(http, reg: Registry):
+    """Time every discord.py REST call by route template (POST /channels/{channel_id}/messages).
+    One call here is one logical request: retries after a 429 count toward its latency."""
+    seconds = reg.histogram("discord_api_seconds", "Discord REST calls by route, rate-limit waits included.", ("route",))
+    errors = reg.counter("discord_api_errors_total", "Discord REST calls that failed, by route and status.", ("route", "status"))
+    orig = http.request
+    if hasattr(orig, "__wrapped__"):
+        return
+
+    async def request(route, **kwargs):
+        name = f"{route.method} {route.path}"
+        t0 = time.perf_counter()
+        try:
+            return await orig(route, **kwargs)
+        except discord.HTTPException as e:
+            errors.inc(name, str(e.status))
+            raise
+        except Exception as e:
+            errors.inc(name, type(e).__name__)
+            raise
+        finally:
+            seconds.observe(time.perf_counter() - t0, name)
+    request.__wrapped__ = orig
+    http.request = request
+
+def http_trace(reg: Registry) -> aiohttp.TraceConfig:
+    """Pass as commands.Bot(http_trace=...): counts every raw 429, including the ones
+    discord.py sleeps through and retries without raising."""
+    limited = reg.counter("discord_429_total", "429 responses from Discord (retried or not), by method and path.", ("route",))
+    trace = aiohttp.TraceConfig()
+
+    async def on_request_end(_session, _ctx, params: aiohttp.TraceRequestEndParams):
+        if params.response.status == 429:
+            path = _SNOWFLAKE.sub("/{id}", _API_PREFIX.sub("", params.url.path))
+            limited.inc(f"{params.method} {path}")
+    trace.on_request_end.append(on_request_end)
+    return trace
@@ -0,0 +1,347 @@
+﻿# coach_models.py — typed game / practice records shared by both rosterbater bots
+# Slots hold int user ids (not "<@id>" strings), a Game carries its start as an aware
+# datetime plus the epoch timestamp, and one-shot stage markers are bits of an IntFlag.
+#
+# game_to_dict/practice_to_dict write the versioned on-disk form (SCHEMA_VERSION);
+# the *_from_dict readers also accept version-1 records — the free-form dicts the
+# bots used to store in storage.json — and migrate them on the way in.
+
+from datetime import datetime
+from enum import IntFlag, auto
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+SCHEMA_VERSION = 2
+
+GAME_POSITIONS     = ("C", "LW", "RW", "LD", "RD", "G", "UTIL", "UTIL2")
+PRACTICE_POSITIONS = ("C", "LW", "RW", "LD", "RD", "G")
+
+# v1 keys that now live somewhere else
+V1_POS_ALIASES = {"UTIL_NEED": "UTIL"}   # legacy bot's "new UTIL wanted" request
+V1_STALE_REQUESTS = "v1_stale_requests"   # extra: {"request"/"thread_request": [message ids]} an alias displaced
+V1_GAME_KEYS = ("id", "dt_iso", "opponent", "roster", "confirmed", "posted_requests",
+                "thread_requests", "flags", "lineup_message_id", "thread_id", "status")
+V1_PRACTICE_KEYS = ("id", "creator_id", "channel_id", "message_id", "thread_id",
+                    "opponent", "start_in_min", "roster", "flags")
+
+class GameFlag(IntFlag):
+    LOCKED = auto()
+    CANCELED = auto()
+    # slash bot stages
+    DM_6PM = auto()
+    CLAIMS_6AM = auto()
+    AGGRESSIVE_2H = auto()
+    UTIL_PROMOTED_1H = auto()
+    T30_DONE = auto()
+    FINAL_CALL = auto()
+    # legacy bot stages
+    POSTED_2D = auto()
+    DM_24H = auto()
+    REMIND_2H = auto()
+    REMIND_1H = auto()
+
+class PracticeFlag(IntFlag):
+    ANNOUNCED = auto()
+    CANCELED = auto()
+    STARTED = auto()
+
+def parse_mention(mention) -> Optional[int]:
+    """"<@123>" / "<@!123>" -> 123. Only needed for v1 records and chat input."""
+    if isinstance(mention, int):
+        return mention
+    if mention and mention.startswith("<@") and mention.endswith(">"):
+        inner = mention[2:-1].lstrip("!")
+        if inner.isdigit():
+            return int(inner)
+    return None
+
+def mention(uid: Optional[int]) -> Optional[str]:
+    return f"<@{uid}>" if uid else None
+
+# ========= GAME =========
+class Slot:
+    __slots__ = ("user_id", "confirmed", "request_id", "thread_request_id", "held_by", "held_until")
+
+    def __init__(self, user_id: Optional[int] = None, confirmed: bool = False,
+                 request_id: Optional[int] = None, thread_request_id: Optional[int] = None):
+        self.user_id = user_id
+        self.confirmed = confirmed
+        self.request_id = request_id                  # claim request in #general
+        self.thread_request_id = thread_request_id    # its copy in the game thread
+        self.held_by: Optional[int] = None            # claimer still confirming...
+        self.held_until = 0.0                         # ...until this epoch time
+
+    @property
+    def mention(self) -> Optional[str]:
+        return mention(self.user_id)
+
+    @property
+    def filled(self) -> bool:
+        return bool(self.user_id) and self.confirmed
+
+    def assign(self, uid: Optional[int], confirmed: bool = False):
+        self.user_id = uid
+        self.confirmed = confirmed if uid else False
+
+    def held(self, now: float) -> Optional[int]:
+        """Who holds a pending claim on this slot, if that hold hasn't expired."""
+        return self.held_by if self.held_by and self.held_until > now else None
+
+    def release(self):
+        self.held_by = None
+        self.held_until = 0.0
+
+    def __repr__(self):
+        return f"Slot(user_id={self.user_id}, confirmed={self.confirmed})"
+
+class Game:
+    __slots__ = ("id", "dt", "ts", "opponent", "slots", "flags", "status",
+                 "lineup_message_id", "thread_id", "last_panic_ts", "last_10min_minute", "extra")
+
+    def __init__(self, gid: str, dt: datetime, opponent: str = "UNKNOWN"):
+        self.id = gid
+        self.set_dt(dt)
+        self.opponent = opponent
+        self.slots: Dict[str, Slot] = {p: Slot() for p in GAME_POSITIONS}
+        self.flags = GameFlag(0)
+        self.status = "upcoming"
+        self.lineup_message_id: Optional[int] = None
+        self.thread_id: Optional[int] = None
+        self.last_panic_ts = 0.0
+        self.last_10min_minute: Optional[int] = None
+        self.extra: dict = {}   # keys this version doesn't know; written back untouched
+
+    def set_dt(self, dt: datetime):
+        self.dt = dt
+        self.ts = dt.timestamp()
+
+    @property
+    def dt_iso(self) -> str:
+        return self.dt.isoformat()
+
+    def slot(self, pos: str) -> Slot:
+        s = self.slots.get(pos)
+        if s is None:
+            s = self.slots[pos] = Slot()
+        return s
+
+    def user(self, pos: str) -> Optional[int]:
+        s = self.slots.get(pos)
+        return s.user_id if s else None
+
+    def is_open(self, pos: str) -> bool:
+        s = self.slots.get(pos)
+        return not (s and s.filled)
+
+    def requests(self) -> Iterator[Tuple[str, Slot]]:
+        """Slots that have a claim request (or thread copy) out."""
+        return ((p, s) for p, s in self.slots.items() if s.request_id or s.thread_request_id)
+
+    # Claims are check-and-set with no await in between, so on the event loop they
+    # are atomic: of any number of concurrent claimers exactly one sees True.
+    def reserve(self, pos: str, uid: int, until: float, now: float) -> bool:
+        """Hold an open slot for uid while they confirm. False if it is filled or
+        someone else's hold is still live."""
+        s = self.slot(pos)
+        if s.filled or s.held(now) not in (None, uid):
+            return False
+        s.held_by, s.held_until = uid, until
+        return True
+
+    def claim(self, pos: str, uid: int, now: float, confirmed: bool = True) -> bool:
+        """Fill pos with uid if it is still open and not held by anyone else."""
+        s = self.slot(pos)
+        if s.filled or s.held(now) not in (None, uid):
+            return False
+        s.assign(uid, confirmed)
+        s.release()
+        return True
+
+    def __repr__(self):
+        return f"Game({self.id!r}, {self.opponent!r}, status={self.status!r})"
+
+def _opt_int(v) -> Optional[int]:
+    return int(v) if v else None
+
+def game_to_dict(g: Game) -> dict:
+    slots = {}
+    for pos, s in g.slots.items():
+        d = {}
+        if s.user_id:
+            d["user"] = s.user_id
+        if s.confirmed:
+            d["confirmed"] = True
+        if s.request_id:
+            d["request"] = s.request_id
+        if s.thread_request_id:
+            d["thread_request"] = s.thread_request_id
+        if s.held_by:
+            d["held_by"] = s.held_by
+            d["held_until"] = s.held_until
+        slots[pos] = d
+    out = dict(g.extra)
+    out.update({
+        "v": SCHEMA_VERSION,
+        "id": g.id,
+        "dt": g.dt_iso,
+        "opponent": g.opponent,
+        "status": g.status,
+        "flags": int(g.flags),
+        "slots": slots,
+        "lineup_message_id": g.lineup_message_id,
+        "thread_id": g.thread_id,
+    })
+    if g.last_panic_ts:
+        out["last_panic_ts"] = g.last_panic_ts
+    if g.last_10min_minute is not None:
+        out["last_10min_minute"] = g.last_10min_minute
+    return out
+
+def game_from_dict(d: dict) -> Game:
+    if d.get("v", 1) < 2:
+        return _game_from_v1(d)
+    g = Game(d["id"], datetime.fromisoformat(d["dt"]), d.get("opponent") or "UNKNOWN")
+    for pos, s in (d.get("slots") or {}).items():
+        slot = g.slots[pos] = Slot(s.get("user"), bool(s.get("confirmed")), s.get("request"), s.get("thread_request"))
+        if s.get("held_by"):
+            slot.held_by, slot.held_until = s["held_by"], float(s.get("held_until", 0.0))
+    g.flags = GameFlag(d.get("flags", 0))
+    g.status = d.get("status") or "upcoming"
+    g.lineup_message_id = _opt_int(d.get("lineup_message_id"))
+    g.thread_id = _opt_int(d.get("thread_id"))
+    g.last_panic_ts = float(d.get("last_panic_ts", 0.0))
+    g.last_10min_minute = d.get("last_10min_minute")
+    known = ("v", "id", "dt", "opponent", "status", "flags", "slots", "lineup_message_id",
+             "thread_id", "last_panic_ts", "last_10min_minute")
+    g.extra = {k: v for k, v in d.items() if k not in known}
+    return g
+
+def game_flags_from_v1(flags: dict) -> Tuple[GameFlag, float, Optional[int]]:
+    """v1 flags dict -> (bits, last_panic_ts, last_10min_minute). Unknown markers are dropped."""
+    bits = GameFlag(0)
+    for k, v in (flags or {}).items():
+        name = k.upper()
+        if v and name in GameFlag.__members__:
+            bits |= GameFlag[name]
+    return bits, float(flags.get("last_panic_ts") or 0.0), flags.get("last_10min_minute")
+
+def v1_positions(m: Optional[dict], filled: Callable[[object], bool] = bool) -> Tuple[dict, list]:
+    """Resolve the aliases in a v1 per-position map (or old sqlite rows keyed by pos).
+    An alias only takes its target's place when the target has nothing filled there;
+    otherwise its value is returned in the second list, so a displaced message id can
+    still be cleaned up instead of silently dropped."""
+    out = {pos: v for pos, v in (m or {}).items() if pos not in V1_POS_ALIASES}
+    displaced = []
+    for pos, v in (m or {}).items():
+        target = V1_POS_ALIASES.get(pos)
+        if target is None:
+            continue
+        if target in out and filled(out[target]):
+            if filled(v):
+                displaced.append(v)
+        else:
+            out[target] = v
+    return out, displaced
+
+def keep_stale_requests(g: Game, role: str, ids: list):
+    """Remember request messages (role "request" or "thread_request") that no slot points
+    at any more, for the bot to delete (see V1_STALE_REQUESTS)."""
+    ids = [int(m) for m in ids if m]
+    if not ids:
+        return
+    stale = g.extra.setdefault(V1_STALE_REQUESTS, {}).setdefault(role, [])
+    stale += [m for m in ids if m not in stale]
+
+def _game_from_v1(d: dict) -> Game:
+    g = Game(d["id"], datetime.fromisoformat(d.get("dt_iso") or d["id"]), d.get("opponent") or "UNKNOWN")
+    for pos, m in v1_positions(d.get("roster"))[0].items():
+        g.slot(pos).user_id = parse_mention(m)
+    for pos, ok in v1_positions(d.get("confirmed"))[0].items():
+        s = g.slot(pos)
+        s.confirmed = bool(ok) and bool(s.user_id)
+    requests, stale_requests = v1_positions(d.get("posted_requests"))
+    for pos, mid in requests.items():
+        if mid:
+            g.slot(pos).request_id = int(mid)
+    threads, stale_threads = v1_positions(d.get("thread_requests"))
+    for pos, mid in threads.items():
+        if mid:
+            g.slot(pos).thread_request_id = int(mid)
+    g.flags, g.last_panic_ts, g.last_10min_minute = game_flags_from_v1(d.get("flags") or {})
+    g.status = d.get("status") or "upcoming"
+    g.lineup_message_id = _opt_int(d.get("lineup_message_id"))
+    g.thread_id = _opt_int(d.get("thread_id"))
+    g.extra = {k: v for k, v in d.items() if k not in V1_GAME_KEYS}
+    keep_stale_requests(g, "request", stale_requests)
+    keep_stale_requests(g, "thread_request", stale_threads)
+    return g
+
+# ========= PRACTICE =========
+class Practice:
+    __slots__ = ("id", "creator_id", "channel_id", "message_id", "thread_id",
+                 "opponent", "start_in_min", "slots", "flags", "extra")
+
+    def __init__(self, pid: str, creator_id: Optional[int], channel_id: int,
+                 opponent: str = "Random Online", start_in_min: int = 5):
+        self.id = pid
+        self.creator_id = creator_id
+        self.channel_id = channel_id
+        self.message_id: Optional[int] = None
+        self.thread_id: Optional[int] = None
+        self.opponent = opponent
+        self.start_in_min = start_in_min
+        self.slots: Dict[str, Optional[int]] = {p: None for p in PRACTICE_POSITIONS}   # pos -> user id
+        self.flags = PracticeFlag(0)
+        self.extra: dict = {}
+
+    @property
+    def created_ts(self) -> Optional[int]:
+        """Lobby ids are "PRAC-<epoch seconds>"."""
+        tail = self.id.rpartition("-")[2]
+        return int(tail) if tail.isdigit() else None
+
+    def position_of(self, uid: int) -> Optional[str]:
+        for pos, holder in self.slots.items():
+            if holder == uid:
+                return pos
+        return None
+
+    def players(self) -> List[int]:
+        return [uid for uid in self.slots.values() if uid]
+
+    def __repr__(self):
+        return f"Practice({self.id!r}, {self.opponent!r})"
+
+def practice_to_dict(p: Practice) -> dict:
+    out = dict(p.extra)
+    out.update({
+        "v": SCHEMA_VERSION,
+        "id": p.id,
+        "creator_id": p.creator_id,
+        "channel_id": p.channel_id,
+        "message_id": p.message_id,
+        "thread_id": p.thread_id,
+        "opponent": p.opponent,
+        "start_in_min": p.start_in_min,
+        "slots": dict(p.slots),
+        "flags": int(p.flags),
+    })
+    return out
+
+def practice_from_dict(d: dict, default_channel: int = 0) -> Practice:
+    v1 = d.get("v", 1) < 2
+    p = Practice(d["id"], d.get("creator_id"), d.get("channel_id") or default_channel,
+                 d.get("opponent") or "Random Online", int(d.get("start_in_min") or 5))
+    p.message_id = _opt_int(d.get("message_id"))
+    p.thread_id = _opt_int(d.get("thread_id"))
+    if v1:
+        for pos, m in (d.get("roster") or {}).items():
+            p.slots[pos] = parse_mention(m)
+        for k, on in (d.get("flags") or {}).items():
+            if on and k.upper() in PracticeFlag.__members__:
+                p.flags |= PracticeFlag[k.upper()]
+        p.extra = {k: v for k, v in d.items() if k not in V1_PRACTICE_KEYS}
+    else:
+        p.slots.update(d.get("slots") or {})
+        p.flags = PracticeFlag(d.get("flags", 0))
+        p.extra = {k: v for k, v in d.items() if k not in V1_PRACTICE_KEYS + ("v", "slots")}
+    return p
@@ -0,0 +1,113 @@
+﻿# coach_quotes.py — coachisms quote store shared by both rosterbater bots
+# data/coachisms.txt: "[CATEGORY]" headers, one quote per line, "{player}" where the mention
+# goes. A line may start with a weight — "3| Skates on. Excuses off." — to come up 3x as often.
+# Quotes are compiled once per file version; refresh() (driven by a bot loop) re-reads the
+# file in a worker thread when its mtime changes, so quote edits ship without a restart.
+
+import asyncio, os, random, re
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+PLAYER = "{player}"
+NO_REPEAT = 3          # a category skips its last N picks (at most half its quotes, so weights still count)
+RELOAD_EVERY = 30      # seconds between mtime checks (see the bots' quotes_loop)
+
+_WEIGHTED = re.compile(r"^(\d+(?:\.\d+)?)\|\s*(.+)$")
+
+class Quote:
+    """A quote pre-split on {player}: rendering is one join, not a scan-and-replace."""
+    __slots__ = ("parts", "weight")
+
+    def __init__(self, text: str, weight: float = 1.0):
+        self.parts = text.split(PLAYER)
+        self.weight = weight
+
+    def render(self, player: str) -> str:
+        return self.parts[0] if len(self.parts) == 1 else player.join(self.parts)
+
+class Category:
+    __slots__ = ("quotes", "recent")
+
+    def __init__(self, quotes: List[Quote], no_repeat: int = NO_REPEAT):
+        self.quotes = quotes
+        self.recent: Deque[int] = deque(maxlen=min(no_repeat, max(1, len(quotes) // 2)))
+
+    def choose(self) -> Quote:
+        if len(self.quotes) == 1:
+            return self.quotes[0]
+        idx = [i for i in range(len(self.quotes)) if i not in self.recent]
+        i = random.choices(idx, weights=[self.quotes[i].weight for i in idx])[0]
+        self.recent.append(i)
+        return self.quotes[i]
+
+def parse_quotes(lines, no_repeat: int = NO_REPEAT) -> Dict[str, Category]:
+    raw: Dict[str, List[Quote]] = {}
+    cat = None
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("[") and line.endswith("]"):
+            cat = line[1:-1]
+            raw.setdefault(cat, [])
+        elif cat:
+            m = _WEIGHTED.match(line)
+            if m and float(m[1]) > 0:
+                raw[cat].append(Quote(m[2], float(m[1])))
+            elif not m:
+                raw[cat].append(Quote(line))
+    return {c: Category(qs, no_repeat) for c, qs in raw.items() if qs}
+
+class QuoteStore:
+    """pick(cat, player) never touches the filesystem; the compiled categories are swapped
+    in whole on the event loop after a reload, and a reload that fails keeps the old ones."""
+
+    def __init__(self, path: str, defaults: Optional[Dict[str, List[str]]] = None, no_repeat: int = NO_REPEAT):
+        self.path = path
+        self.no_repeat = no_repeat
+        self._defaults = {c: Category([Quote(q) for q in qs], no_repeat) for c, qs in (defaults or {}).items() if qs}
+        self._cats: Dict[str, Category] = {}
+        self._mtime: Optional[int] = None
+        self.reloads = 0
+        loaded = self._check()
+        if loaded is None:
+            print("Warning: coachisms file not found:", path)
+        else:
+            self._mtime, self._cats = loaded
+
+    def _stat(self) -> Optional[int]:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _check(self) -> Optional[Tuple[int, Dict[str, Category]]]:
+        """(mtime, categories) if the file changed since the last load, else None. Blocking.
+        A missing file is not a change (editors that save by rename briefly remove it)."""
+        mtime = self._stat()
+        if mtime is None or mtime == self._mtime:
+            return None
+        with open(self.path, "r", encoding="utf-8") as fh:
+            return mtime, parse_quotes(fh, self.no_repeat)
+
+    async def refresh(self) -> bool:
+        """Reload if the file changed. True when new quotes were swapped in."""
+        try:
+            loaded = await asyncio.to_thread(self._check)
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"⚠️ coachisms reload failed (keeping {len(self._cats)} categories): {e}")
+            return False
+        if loaded is None:
+            return False
+        self._mtime, self._cats = loaded
+        self.reloads += 1
+        return True
+
+    def pick(self, cat: str, player: Optional[str] = None) -> Optional[str]:
+        c = self._cats.get(cat) or self._defaults.get(cat)
+        if c is None:
+            return None
+        return c.choose().render(player or "this")
+
+    def categories(self) -> Dict[str, int]:
+        return {c: len(cat.quotes) for c, cat in self._cats.items()}
@@ -8,9 +8,7 @@
 # Install deps: pip install -U discord.py python-dotenv python-dateutil
 
 import os
-import json
 import asyncio
-import random
 from datetime import datetime, timedelta, timezone
 from dateutil import parser as dtparser
 from zoneinfo import ZoneInfo  # Python 3.9+
@@ -18,6 +16,12 @@ import discord
 from discord.ext import commands, tasks
 from dotenv import load_dotenv
 
+from coach_models import V1_STALE_REQUESTS, Game, GameFlag, mention
+from coach_storage import archive_stale, claim_slot, open_storage, release_slot, reserve_slot
+from coach_discord import DMDispatcher, DMJob, MessageCache, UserCache
+from coach_scheduler import DeadlineScheduler
+from coach_quotes import RELOAD_EVERY as QUOTES_RELOAD_EVERY, QuoteStore
+
 # --- CONFIG ---
 load_dotenv()
 TOKEN = os.getenv("DISCORD_TOKEN")
@@ -30,6 +34,8 @@ GENERAL_CHANNEL_ID = 1228418184403615796
 
 # file storage
 STORAGE_FILE = "storage.json"
+STORAGE_DB = "storage.db"
+STORAGE_BACKEND = "journal"  # "journal" (storage.json + storage.journal) or "sqlite" (STORAGE_DB)
 COACHISMS_FILE = "data/coachisms.txt"
 
 # Claim emoji
@@ -51,54 +57,22 @@ T5 = 5 * 60
 REPEAT_10_MIN = 10 * 60
 PANIC_INTERVAL = 2 * 60  # every 2 minutes during last 15
 CHECK_INTERVAL = 60  # background loop checks every 60s
+ARCHIVE_EVERY = 3600  # move games that ended hours ago into the archive once an hour
+CLAIM_CONFIRM_WINDOW = 300  # seconds a reacting claimer holds the slot while we wait for their DM 'yes'
+CONFIRM_WORDS = ("yes", "y", "confirm", "i'm in", "im in", "i am in", "take")
 
 # positions order expected in !addroster:
 POSITIONS = ["C", "LW", "RW", "LD", "RD", "G", "UTIL"]
 
-# --- utility: storage load/save
-def load_storage():
-    if os.path.exists(STORAGE_FILE):
-        with open(STORAGE_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    # empty template
-    return {"games": [], "captain_id": None}
-
-def save_storage(data):
-    with open(STORAGE_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-
-storage = load_storage()
-
-# --- Coach quotes loader (coachisms)
-def load_coach_quotes():
-    quotes = {}
-    if not os.path.exists(COACHISMS_FILE):
-        print("Warning: coachisms file not found:", COACHISMS_FILE)
-        return quotes
-    cat = None
-    with open(COACHISMS_FILE, "r", encoding="utf-8") as fh:
-        for raw in fh:
-            line = raw.strip()
-            if not line:
-                continue
-            if line.startswith("[") and line.endswith("]"):
-                cat = line[1:-1]
-                quotes.setdefault(cat, [])
-            else:
-                if cat:
-                    quotes[cat].append(line)
-    return quotes
+# --- storage backend (see coach_storage.py)
+# read through db.find_game/games()/find_request/upcoming_assignments, write through db.add_game/save_game/set_meta
+db = open_storage(STORAGE_FILE, STORAGE_BACKEND, STORAGE_DB)
 
-COACH_QUOTES = load_coach_quotes()
+# --- Coach quotes (coachisms, compiled by coach_quotes.QuoteStore and reloaded by quotes_loop)
+quotes = QuoteStore(COACHISMS_FILE)
 
 def random_quote(cat, player_mention=None):
-    arr = COACH_QUOTES.get(cat, [])
-    if not arr:
-        return None
-    q = random.choice(arr)
-    if player_mention:
-        return q.replace("{player}", player_mention)
-    return q
+    return quotes.pick(cat, player_mention)
 
 # --- helpers
 def dt_to_iso(dt):
@@ -117,22 +91,7 @@ def parse_date_time(date_str, time_str):
     return dt
 
 def find_game_by_id(game_id):
-    for g in storage["games"]:
-        if g["id"] == game_id:
-            return g
-    return None
-
-def ensure_game_structure(game):
-    # Initialize missing fields
-    if "roster" not in game:
-        game["roster"] = {p: None for p in POSITIONS}
-    if "confirmed" not in game:
-        game["confirmed"] = {p: False for p in POSITIONS}
-    if "posted_requests" not in game:
-        game["posted_requests"] = {p: None for p in POSITIONS}  # store message ids for deletion
-    if "flags" not in game:
-        game["flags"] = {}  # track which scheduled actions have fired
-    return game
+    return db.find_game(game_id)
 
 # --- discord bot init
 intents = discord.Intents.default()
@@ -140,88 +99,113 @@ intents.message_content = True
 intents.members = True
 intents.reactions = True
 
-bot = commands.Bot(command_prefix="!", intents=intents)
+# presence goes out with IDENTIFY, so reconnects don't need a change_presence call
+bot = commands.Bot(command_prefix="!", intents=intents, activity=discord.Game(name="Rosterbating the bench"))
+
+# user lookups go through user_cache (gateway cache → TTL cache → one shared fetch);
+# confirm DMs fan out concurrently with 429 back-off (see coach_discord.py)
+user_cache = UserCache(bot)
+dm_dispatcher = DMDispatcher(user_cache.get)
+message_cache = MessageCache(bot)
 
 # --- background scheduler loop
 @tasks.loop(seconds=CHECK_INTERVAL)
 async def scheduler_loop():
     now = datetime.now(tz=NY)
-    to_save = False
-    for game in storage["games"]:
-        ensure_game_structure(game)
-        game_dt = dtparser.parse(game["dt_iso"])
-        # compute seconds until game (in NY)
-        secs = (game_dt - now).total_seconds()
-        gid = game["id"]
+    now_ts = now.timestamp()
+    for game in db.active_games():
+        to_save = False
+        # compute seconds until game
+        secs = game.ts - now_ts
+        if secs <= 0:
+            # game has started: drop it from the active set so later ticks skip it
+            game.status = "past"
+            db.save_game(game)
+            continue
+        if secs > POST_2D_THRESHOLD:
+            continue  # nothing fires this far out
 
         # 2 days check: if roster is set and not yet posted 2d, post lineup in lineup channel
         if secs <= POST_2D_THRESHOLD and secs > POST_1D_THRESHOLD:
-            if not game["flags"].get("posted_2d"):
+            if GameFlag.POSTED_2D not in game.flags:
                 # If roster is full (all 6 starters set) -> post lineup in lineup channel
-                starters_filled = all(game["roster"].get(p) for p in ["C","LW","RW","LD","RD","G"])
+                starters_filled = all(game.user(p) for p in ["C","LW","RW","LD","RD","G"])
                 if starters_filled:
                     await post_lineup_embed(game, note="Lineup posted 2 days before game.")
                 else:
                     # roster missing: DM captain and post poll in general to gather interest
                     await notify_roster_missing(game)
-                game["flags"]["posted_2d"] = True
+                game.flags |= GameFlag.POSTED_2D
                 to_save = True
 
         # day-before (24h): send initial DM confirmations to assigned players
-        if secs <= POST_1D_THRESHOLD and not game["flags"].get("dm_24h"):
+        if secs <= POST_1D_THRESHOLD and GameFlag.DM_24H not in game.flags:
             # DM assigned players to confirm — only those assigned
             await send_dm_confirm_requests(game, stage="24h")
-            game["flags"]["dm_24h"] = True
+            game.flags |= GameFlag.DM_24H
             to_save = True
 
         # T - 2 hours
-        if secs <= POST_T_MINUS_2H and not game["flags"].get("remind_2h"):
+        if secs <= POST_T_MINUS_2H and GameFlag.REMIND_2H not in game.flags:
             await send_dm_confirm_requests(game, stage="2h")
-            game["flags"]["remind_2h"] = True
+            game.flags |= GameFlag.REMIND_2H
             to_save = True
 
         # T - 1 hour
-        if secs <= POST_T_MINUS_1H and not game["flags"].get("remind_1h"):
+        if secs <= POST_T_MINUS_1H and GameFlag.REMIND_1H not in game.flags:
             # For each unconfirmed starter: post replacement request + DM UTIL
             await replacement_round(game, reason="1h")
-            game["flags"]["remind_1h"] = True
+            game.flags |= GameFlag.REMIND_1H
             to_save = True
 
         # T - 30 minutes
-        if secs <= T30 and not game["flags"].get("t30_done"):
+        if secs <= T30 and GameFlag.T30_DONE not in game.flags:
             # If a starter still missing, DM UTIL and post requests
             await replacement_round(game, reason="30m")
-            game["flags"]["t30_done"] = True
+            game.flags |= GameFlag.T30_DONE
             to_save = True
 
         # Between T-30 and T-15: every 10 minutes post requests for unfilled starters
         # We do this by checking if secs <= 30min and > 15min, then post every REPEAT_10_MIN
         if secs <= T30 and secs > T15:
-            last_post = game["flags"].get("last_10min_post", 0)
-            # determine current 10min bucket using integer division
             # We'll simply post if not posted in this minute window
-            if (now.minute % 10 == 0) and game["flags"].get("last_10min_minute") != now.minute:
+            if (now.minute % 10 == 0) and game.last_10min_minute != now.minute:
                 # Post for missing starters
                 await replacement_round(game, reason="10min")
-                game["flags"]["last_10min_minute"] = now.minute
+                game.last_10min_minute = now.minute
                 to_save = True
 
-        # Between T-15 and start: panic mode every PANIC_INTERVAL seconds
+        # Between T-15 and start: panic mode every PANIC_INTERVAL seconds (give or take
+        # half a tick, so loop jitter can't push every round back by a whole CHECK_INTERVAL)
         if secs <= T15 and secs > 0:
-            last_panic = game["flags"].get("last_panic_ts", 0)
-            if (datetime.now(tz=NY).timestamp() - last_panic) >= PANIC_INTERVAL:
+            if (now_ts - game.last_panic_ts) >= PANIC_INTERVAL - CHECK_INTERVAL / 2:
                 await replacement_round(game, reason="panic")
-                game["flags"]["last_panic_ts"] = datetime.now(tz=NY).timestamp()
+                game.last_panic_ts = now_ts
                 to_save = True
 
         # At T-5 final desperate call (ensures final attempt)
-        if secs <= T5 and not game["flags"].get("final_call"):
+        if secs <= T5 and GameFlag.FINAL_CALL not in game.flags:
             await replacement_round(game, reason="final")
-            game["flags"]["final_call"] = True
+            game.flags |= GameFlag.FINAL_CALL
             to_save = True
 
-    if to_save:
-        save_storage(storage)
+        if to_save:
+            db.save_game(game)
+
+@tasks.loop(seconds=ARCHIVE_EVERY)
+async def archive_loop():
+    try:
+        games, _ = archive_stale(db, datetime.now(tz=NY).timestamp())
+    except Exception as e:
+        print(f"archive_loop failed: {e}")
+        return
+    if games:
+        print(f"Archived {games} past games.")
+
+@tasks.loop(seconds=QUOTES_RELOAD_EVERY)
+async def quotes_loop():
+    if await quotes.refresh():
+        print(f"Reloaded coachisms: {quotes.categories()}")
 
 # --- core actions
 async def post_lineup_embed(game, note=None):
@@ -229,45 +213,39 @@ async def post_lineup_embed(game, note=None):
     if not lineup_channel:
         print("Lineup channel not found.")
         return
-    embed = discord.Embed(title=f"📋 Lineup — {game['opponent']} ({game['id']})",
-                          description=f"Game at {game['dt_iso']}\n{note or ''}",
+    embed = discord.Embed(title=f"📋 Lineup — {game.opponent} ({game.id})",
+                          description=f"Game at {game.dt_iso}\n{note or ''}",
                           color=discord.Color.blue())
     for pos in ["C","LW","RW","LD","RD","G","UTIL"]:
-        p = game["roster"].get(pos)
-        display = p if p else "—"
-        embed.add_field(name=pos, value=display, inline=True)
+        embed.add_field(name=pos, value=game.slot(pos).mention or "—", inline=True)
     await lineup_channel.send(embed=embed)
 
 async def notify_roster_missing(game):
     # DM captain if set, and post poll in general channel
-    captain = storage.get("captain_id")
+    captain = db.get_meta("captain_id")
     general = bot.get_channel(GENERAL_CHANNEL_ID)
     # DM captain
     if captain:
         try:
-            user = await bot.fetch_user(captain)
-            await user.send(f"Roster missing for game {game['id']} vs {game['opponent']} at {game['dt_iso']}. Please set the lineup.")
+            user = await user_cache.get(captain)
+            await user.send(f"Roster missing for game {game.id} vs {game.opponent} at {game.dt_iso}. Please set the lineup.")
         except Exception:
             pass
     # Post poll in general to ask who wants to play (one post for the whole game)
     if general:
-        msg = await general.send(f"📣 Who wants to play vs **{game['opponent']}** on **{game['id']}**? React with {CLAIM_EMOJI} to volunteer — post separate per game.")
+        msg = await general.send(f"📣 Who wants to play vs **{game.opponent}** on **{game.id}**? React with {CLAIM_EMOJI} to volunteer — post separate per game.")
         await msg.add_reaction(CLAIM_EMOJI)
 
 async def send_dm_confirm_requests(game, stage="24h"):
     # DM assigned players and UTIL asking to confirm — we will mark confirmed when they respond by DMing 'yes'
-    for pos, member_mention in game["roster"].items():
-        if member_mention:
-            # fetch user id from mention format <@!id> or <@id>
-            uid = extract_user_id(member_mention)
-            if not uid:
-                continue
-            try:
-                user = await bot.fetch_user(uid)
-                quote = random_quote("PLAYER_CONFIRMED") or f"You are listed as {pos} for the game on {game['id']} vs {game['opponent']}. Reply 'yes' to confirm."
-                await user.send(f"[{stage} reminder] {quote}\nReply 'yes' to this DM to confirm you will play.")
-            except discord.Forbidden:
-                pass
+    dm_jobs = []
+    for pos, slot in game.slots.items():
+        if slot.user_id:
+            quote = random_quote("PLAYER_CONFIRMED") or f"You are listed as {pos} for the game on {game.id} vs {game.opponent}. Reply 'yes' to confirm."
+            dm_jobs.append(DMJob(slot.user_id, f"[{stage} reminder] {quote}\nReply 'yes' to this DM to confirm you will play."))
+    summary = await dm_dispatcher.send_many(dm_jobs)
+    print(f"[{stage}] confirm DMs for {game.id}: {summary.describe()}")
+    return summary
 
 async def replacement_round(game, reason=""):
     """Post one message per missing starter in general chat and DM UTIL as specified.
@@ -278,13 +256,11 @@ async def replacement_round(game, reason=""):
 
     # For each starter position (not UTIL), if no confirmed starter or no assigned, post request
     for pos in ["C","LW","RW","LD","RD","G"]:
-        assigned = game["roster"].get(pos)
-        confirmed = game["confirmed"].get(pos, False)
         # If assigned but not confirmed, or not assigned at all -> post a replacement request
-        need_post = (not assigned) or (not confirmed)
-        if need_post:
+        if game.is_open(pos):
+            slot = game.slot(pos)
             # Post one message for this position (avoid posting duplicate if already have live request)
-            existing_msg_id = game["posted_requests"].get(pos)
+            existing_msg_id = slot.request_id
             if existing_msg_id:
                 # try to see if it still exists; if not, we'll post new
                 try:
@@ -298,11 +274,11 @@ async def replacement_round(game, reason=""):
                         continue
                 except Exception:
                     # message no longer exists -> we'll post a new one
-                    game["posted_requests"][pos] = None
+                    slot.request_id = None
 
             # Compose message
             human_pos = pos if pos != "G" else "Goalie"
-            text = random_quote("PLAYER_MISSING") or f"Need a **{human_pos}** for game {game['id']} vs {game['opponent']} at {game['dt_iso']}. React {CLAIM_EMOJI} to claim."
+            text = random_quote("PLAYER_MISSING") or f"Need a **{human_pos}** for game {game.id} vs {game.opponent} at {game.dt_iso}. React {CLAIM_EMOJI} to claim."
             # attach coach flavor for reason
             if reason == "panic":
                 text = (random_quote("GAME_DAY_START") or "") + "\n\n" + text
@@ -313,27 +289,69 @@ async def replacement_round(game, reason=""):
             except Exception:
                 pass
             # save message id so we can delete if filled later
-            game["posted_requests"][pos] = posted.id
-            save_storage(storage)
+            slot.request_id = posted.id
+            db.save_game(game)
 
     # UTIL logic at 30m: if starter missing and UTIL exists and confirmed True, DM UTIL and post in lineup channel as promoted
     if reason == "30m":
         # If any starter still missing, DM util (if present)
-        util_mention = game["roster"].get("UTIL")
-        util_confirmed = game["confirmed"].get("UTIL", False)
-        any_missing = any((not game["roster"].get(p) or not game["confirmed"].get(p, False)) for p in ["C","LW","RW","LD","RD","G"])
-        if util_mention and util_confirmed and any_missing:
-            util_id = extract_user_id(util_mention)
-            if util_id:
-                try:
-                    util_user = await bot.fetch_user(util_id)
-                    # DM util that he's on deck; the bot will not auto-promote without util confirmation earlier.
-                    await util_user.send(f"You are the UTIL for game {game['id']}. There are still missing starter slots — react to the general requests or reply 'take' to me if you want to fill a specific slot.")
-                except discord.Forbidden:
-                    pass
+        util = game.slot("UTIL")
+        any_missing = any(game.is_open(p) for p in ["C","LW","RW","LD","RD","G"])
+        if util.filled and any_missing:
+            # DM util that he's on deck; the bot will not auto-promote without util confirmation earlier.
+            summary = await dm_dispatcher.send_many([DMJob(util.user_id, f"You are the UTIL for game {game.id}. There are still missing starter slots — react to the general requests or reply 'take' to me if you want to fill a specific slot.")])
+            print(f"[30m] UTIL DM for {game.id}: {summary.describe()}")
 
     # Save storage state (posted messages)
-    save_storage(storage)
+    db.save_game(game)
+
+# --- claim confirmations
+# A reaction on a claim request holds the slot (persisted on the game, see
+# coach_storage.reserve_slot) and DMs the reactor. Their next DM 'yes' is matched by
+# author id in pending_claims; hold_scheduler expires holds nobody confirmed.
+# Nothing waits per claim, and holds survive restarts (restore_pending_claims).
+# Timers are per holder, so settling an old holder's claim never cancels the next one's.
+pending_claims = {}   # user id -> {(game id, pos), ...}
+
+def _hold_key(gid, pos, uid):
+    return f"{gid}|{pos}|{uid}"
+
+def track_hold(uid, gid, pos, until):
+    pending_claims.setdefault(uid, set()).add((gid, pos))
+    hold_scheduler.schedule(_hold_key(gid, pos, uid), [(until, str(uid))])
+
+def untrack_hold(uid, gid, pos):
+    claims = pending_claims.get(uid)
+    if claims:
+        claims.discard((gid, pos))
+        if not claims:
+            del pending_claims[uid]
+    hold_scheduler.cancel(_hold_key(gid, pos, uid))
+
+async def expire_hold(key, stage, due_ts):
+    gid, pos, _ = key.rsplit("|", 2)
+    uid = int(stage)
+    untrack_hold(uid, gid, pos)
+    game = find_game_by_id(gid)
+    if not game or game.slot(pos).held_by != uid:
+        return  # confirmed, or someone else holds it now
+    release_slot(db, game, pos, uid)
+    try:
+        user = await user_cache.get(uid)
+        await user.send("You didn’t confirm in time. If you still want the spot, react again in general.")
+    except discord.HTTPException:
+        pass
+
+hold_scheduler = DeadlineScheduler(expire_hold, now=lambda: datetime.now(tz=NY).timestamp())
+
+def restore_pending_claims():
+    """Rebuild pending_claims and the expiry timers from the holds saved on the games."""
+    pending_claims.clear()
+    for game in db.active_games():
+        for pos, slot in game.slots.items():
+            if slot.held_by:
+                # already-expired holds fire (and get released) on the first scheduler pass
+                track_hold(slot.held_by, game.id, pos, slot.held_until)
 
 # --- reaction handler for claiming open slot
 @bot.event
@@ -347,84 +365,105 @@ async def on_raw_reaction_add(payload):
         return
 
     # Find which game & position this message refers to
-    for game in storage["games"]:
-        ensure_game_structure(game)
-        for pos, msg_id in game["posted_requests"].items():
-            if msg_id and msg_id == payload.message_id:
-                # Someone reacted to the request for this pos
-                user = await bot.fetch_user(payload.user_id)
-                # send DM asking for confirmation
-                try:
-                    dm = await user.send(f"You reacted to claim **{pos}** for game {game['id']} vs {game['opponent']}. Reply 'yes' to this DM within 5 minutes to confirm and be added as starter.")
-                except discord.Forbidden:
-                    # can't DM
-                    gchannel = bot.get_channel(GENERAL_CHANNEL_ID)
-                    if gchannel:
-                        await gchannel.send(f"{user.mention}, I tried to DM you but couldn't — make sure DMs are open.")
-                    continue
-
-                # wait for confirmation
-                def check(m):
-                    return m.author.id == user.id and isinstance(m.channel, discord.DMChannel) and m.content.lower().strip() in ("yes","y","confirm","i'm in","im in","i am in","take")
-
-                try:
-                    reply = await bot.wait_for("message", check=check, timeout=300)  # 5 minutes
-                except asyncio.TimeoutError:
-                    try:
-                        await user.send("You didn’t confirm in time. If you still want the spot, react again in general.")
-                    except:
-                        pass
-                    continue
-
-                # double-check that slot is still open
-                assigned = game["roster"].get(pos)
-                confirmed = game["confirmed"].get(pos, False)
-                if assigned and confirmed:
-                    # someone else already took it
-                    await user.send("Sorry, that position has already been filled.")
-                    continue
-
-                # assign user to the position
-                mention = f"<@{user.id}>"
-                game["roster"][pos] = mention
-                game["confirmed"][pos] = True
-                # delete the posted request message from general to keep chat clean
-                try:
-                    gc = bot.get_channel(GENERAL_CHANNEL_ID)
-                    if gc:
-                        msg = await gc.fetch_message(payload.message_id)
-                        await msg.delete()
-                except Exception:
-                    pass
-                game["posted_requests"][pos] = None
-                save_storage(storage)
-
-                # send confirmation DM and post lineup update
-                try:
-                    await user.send(f"You’re in! You are now **{pos}** for game {game['id']}. See you at {game['dt_iso']}.")
-                except:
-                    pass
+    hit = db.find_request(payload.message_id)
+    if not hit:
+        return
+    game, pos = hit
+    # Someone reacted to the request for this pos: hold the slot for them while they confirm
+    now_ts = datetime.now(tz=NY).timestamp()
+    until = now_ts + CLAIM_CONFIRM_WINDOW
+    prev = game.slot(pos).held_by
+    held = reserve_slot(db, game, pos, payload.user_id, until, now_ts)
+    if held and prev and prev != payload.user_id:
+        untrack_hold(prev, game.id, pos)   # their hold lapsed and went to this reactor
+    user = await user_cache.get(payload.user_id)
+    if not held:
+        # filled, or another claimer is mid-confirm; their hold expires on its own
+        note = "has already been filled" if not game.is_open(pos) else "is being confirmed by someone else — it reopens if they don’t reply in time"
+        try:
+            await user.send(f"Sorry, **{pos}** for game {game.id} {note}.")
+        except discord.Forbidden:
+            pass
+        return
+    # send DM asking for confirmation
+    try:
+        await user.send(f"You reacted to claim **{pos}** for game {game.id} vs {game.opponent}. Reply 'yes' to this DM within 5 minutes to confirm and be added as starter.")
+    except discord.Forbidden:
+        # can't DM
+        release_slot(db, game, pos, user.id)
+        gchannel = bot.get_channel(GENERAL_CHANNEL_ID)
+        if gchannel:
+            await gchannel.send(f"{user.mention}, I tried to DM you but couldn't — make sure DMs are open.")
+        return
+    track_hold(user.id, game.id, pos, until)
+
+async def resolve_pending_claims(user):
+    """Turn every live hold of this user into a claim. False if they had none."""
+    claims = pending_claims.get(user.id)
+    if not claims:
+        return False
+    for gid, pos in list(claims):
+        untrack_hold(user.id, gid, pos)
+        game = find_game_by_id(gid)
+        if game:
+            await finish_claim(game, pos, user)
+    return True
+
+async def finish_claim(game, pos, user):
+    # If this was a starter filled by UTIL (i.e., the user was the UTIL), the UTIL slot opens up
+    util_moved_up = pos != "UTIL" and game.user("UTIL") == user.id
+    request_id = game.slot(pos).request_id
+    # claim only if the slot is still open and still ours (compare-and-set)
+    if not claim_slot(db, game, pos, user.id, datetime.now(tz=NY).timestamp()):
+        # someone else already took it
+        await user.send("Sorry, that position has already been filled.")
+        return
+    if util_moved_up:
+        game.slot("UTIL").assign(None)
+    # delete the posted request message from general to keep chat clean
+    if request_id:
+        await message_cache.delete(GENERAL_CHANNEL_ID, request_id)
+    game.slot(pos).request_id = None
+    db.save_game(game)
+
+    # send confirmation DM and post lineup update
+    try:
+        await user.send(f"You’re in! You are now **{pos}** for game {game.id}. See you at {game.dt_iso}.")
+    except:
+        pass
 
-                # If this was a starter filled by UTIL (i.e., the user was the UTIL), handle UTIL replacement flow
-                # Check if the user was the UTIL previously for this game
-                if any(game["roster"].get("UTIL") == f"<@{user.id}>" for _ in (1,)):
-                    # UTIL took starter; need new UTIL post
-                    await post_new_util_request(game)
+    if util_moved_up:
+        # UTIL took starter; need new UTIL post
+        await post_new_util_request(game)
 
-                # update lineup post (post new lineup embed to lineup channel)
-                await post_lineup_embed(game, note=f"{pos} filled by {mention}")
-                break  # stop iterating positions once handled
+    # update lineup post (post new lineup embed to lineup channel)
+    await post_lineup_embed(game, note=f"{pos} filled by {user.mention}")
 
 async def post_new_util_request(game):
     general = bot.get_channel(GENERAL_CHANNEL_ID)
     if not general:
         return
-    text = f"🛟 Our UTIL got pulled into the lineup for game {game['id']}. We need a new UTIL — react {CLAIM_EMOJI} to volunteer and then confirm by DM to me!"
+    text = f"🛟 Our UTIL got pulled into the lineup for game {game.id}. We need a new UTIL — react {CLAIM_EMOJI} to volunteer and then confirm by DM to me!"
     msg = await general.send(text)
     await msg.add_reaction(CLAIM_EMOJI)
-    # store this special UTIL request under key 'UTIL_NEED' on game.posted_requests
-    game["posted_requests"]["UTIL_NEED"] = msg.id
-    save_storage(storage)
+    # the open UTIL slot carries the request, so a claim lands in UTIL
+    game.slot("UTIL").request_id = msg.id
+    db.save_game(game)
+
+async def delete_stale_requests():
+    """Delete the claim requests that migrating v1 games left without a slot (a UTIL_NEED
+    request next to a UTIL one, see coach_models.v1_positions)."""
+    try:
+        for game in db.games():
+            stale = game.extra.pop(V1_STALE_REQUESTS, None)
+            if not stale:
+                continue
+            await message_cache.delete_many(GENERAL_CHANNEL_ID, stale.get("request", []))
+            if game.thread_id:
+                await message_cache.delete_many(game.thread_id, stale.get("thread_request", []))
+            db.save_game(game)
+    except Exception as e:
+        print(f"[startup] deleting stale requests failed: {e}")
 
 # --- admin commands to manage games / rosters
 def is_admin():
@@ -434,12 +473,13 @@ def is_admin():
 
 @bot.command(name="listgames")
 async def list_games(ctx):
-    if not storage["games"]:
+    games = db.games()
+    if not games:
         await ctx.send("No games scheduled.")
         return
     lines = []
-    for g in storage["games"]:
-        lines.append(f"ID: {g['id']} — vs {g['opponent']} at {g['dt_iso']}")
+    for g in games:
+        lines.append(f"ID: {g.id} — vs {g.opponent} at {g.dt_iso}")
     await ctx.send("\n".join(lines))
 
 @bot.command(name="addroster")
@@ -473,39 +513,24 @@ async def add_roster(ctx, date: str, time: str, *, rest: str):
         return
 
     gid = dt_to_iso(dt)
-    # create game dict
-    game = {
-        "id": gid,
-        "dt_iso": gid,
-        "opponent": opponent,
-        "roster": {},  # fill below
-        "confirmed": {},
-        "posted_requests": {},
-        "flags": {}
-    }
-    ensure_game_structure(game)
-    # map mentions in order to POSITIONS
+    game = Game(gid, dt, opponent)
+    # map mentions in order to POSITIONS; confirmed is set when they DM 'yes'
     for i, pos in enumerate(POSITIONS):
-        mention = f"<@{mentions[i].id}>"
-        game["roster"][pos] = mention
-        game["confirmed"][pos] = False  # will be set when they DM 'yes'
-    storage["games"].append(game)
-    save_storage(storage)
+        game.slot(pos).assign(mentions[i].id)
+    db.add_game(game)
 
     # post lineup embed in lineup channel
     await post_lineup_embed(game, note="New roster created — players DMed to confirm.")
     # DM each player telling them they are listed as starter/UTIL
+    dm_jobs = []
     for pos in POSITIONS:
-        mention = game["roster"].get(pos)
-        if mention:
-            uid = extract_user_id(mention)
-            if uid:
-                try:
-                    user = await bot.fetch_user(uid)
-                    quote = random_quote("PLAYER_CONFIRMED") or f"You are listed as {pos} for game {game['id']} vs {opponent}. Reply 'yes' in DM to confirm."
-                    await user.send(quote + "\nReply 'yes' to confirm.")
-                except discord.Forbidden:
-                    await ctx.send(f"Couldn't DM {mention}")
+        uid = game.user(pos)
+        if uid:
+            quote = random_quote("PLAYER_CONFIRMED") or f"You are listed as {pos} for game {game.id} vs {opponent}. Reply 'yes' in DM to confirm."
+            dm_jobs.append(DMJob(uid, quote + "\nReply 'yes' to confirm."))
+    summary = await dm_dispatcher.send_many(dm_jobs)
+    if summary.forbidden or summary.failed:
+        await ctx.send(f"Confirm DMs: {summary.describe()}")
 
     await ctx.send(f"Roster for game {gid} vs {opponent} added. Players have been DM'd to confirm.")
 
@@ -520,8 +545,7 @@ async def show_lineup(ctx, game_id: str):
 @bot.command(name="setcaptain")
 @is_admin()
 async def set_captain(ctx, member: discord.Member):
-    storage["captain_id"] = member.id
-    save_storage(storage)
+    db.set_meta("captain_id", member.id)
     await ctx.send(f"Captain set to {member.mention} — they will be DM'd when rosters are missing.")
 
 @bot.command(name="forcecheck")
@@ -530,19 +554,6 @@ async def force_check(ctx):
     await ctx.send("Forcing schedule check now.")
     await scheduler_loop()
 
-# --- utility to extract user id from mention string
-def extract_user_id(mention):
-    # mention formats: <@1234567890> or <@!1234567890>
-    if not mention:
-        return None
-    if mention.startswith("<@") and mention.endswith(">"):
-        inner = mention[2:-1]
-        if inner.startswith("!"):
-            inner = inner[1:]
-        if inner.isdigit():
-            return int(inner)
-    return None
-
 # --- on DM reply handler to pick up confirmations (users replying "yes")
 @bot.event
 async def on_message(message):
@@ -555,49 +566,57 @@ async def on_message(message):
     # Only handle DMs for "yes" confirmations
     if isinstance(message.channel, discord.DMChannel):
         content = message.content.strip().lower()
-        if content in ("yes","y","i'm in","im in","confirm","take","i am in"):
+        if content in CONFIRM_WORDS:
+            # a pending claim (reaction in general) takes precedence over roster confirms
+            if await resolve_pending_claims(message.author):
+                return
             uid = message.author.id
             # Find any game where this user is listed and not yet confirmed, pick the nearest upcoming game they are listed for
             now = datetime.now(tz=NY)
             candidates = []
-            for g in storage["games"]:
-                ensure_game_structure(g)
-                # find positions where user is listed and not confirmed yet
-                for pos, mention in g["roster"].items():
-                    if mention and extract_user_id(mention) == uid and not g["confirmed"].get(pos, False):
-                        dt = dtparser.parse(g["dt_iso"])
-                        if dt > now:
-                            candidates.append((dt, g, pos))
+            # upcoming_assignments() comes back soonest first; the first unconfirmed one wins
+            for ts, g, pos in db.upcoming_assignments(uid, now.timestamp()):
+                if not g.slot(pos).confirmed:
+                    candidates.append((ts, g, pos))
+                    break
             if not candidates:
                 await message.channel.send("I couldn't find any upcoming game where you're listed and waiting for confirmation.")
                 return
             # pick the nearest game
-            candidates.sort(key=lambda x: x[0])
             dt, game, pos = candidates[0]
-            game["confirmed"][pos] = True
-            save_storage(storage)
-            await message.channel.send(f"Thanks — you're confirmed as **{pos}** for game {game['id']}. See you at {game['dt_iso']}!")
+            game.slot(pos).confirmed = True
+            db.save_game(game)
+            await message.channel.send(f"Thanks — you're confirmed as **{pos}** for game {game.id}. See you at {game.dt_iso}!")
             # update lineup post
-            await post_lineup_embed(game, note=f"{pos} confirmed by <@{uid}>")
+            await post_lineup_embed(game, note=f"{pos} confirmed by {mention(uid)}")
             return
 
 # --- startup
+hold_task = None
+stale_task = None
+
 @bot.event
 async def on_ready():
     print(f"✅ Logged in as {bot.user} (id: {bot.user.id})")
-    await bot.change_presence(activity=discord.Game(name="Rosterbating the bench"))
     if not scheduler_loop.is_running():
         scheduler_loop.start()
-
-# Save storage on clean exit
+    global hold_task
+    if hold_task is None or hold_task.done():
+        restore_pending_claims()
+        hold_task = asyncio.create_task(hold_scheduler.run())
+    if not archive_loop.is_running():
+        archive_loop.start()
+    if not quotes_loop.is_running():
+        quotes_loop.start()
+    global stale_task
+    if stale_task is None:
+        stale_task = asyncio.create_task(delete_stale_requests())
+
+# Fold the journal into storage.json on clean exit
 import atexit
-def _save_on_exit():
-    save_storage(storage)
-atexit.register(_save_on_exit)
+atexit.register(db.close)
 
 # start bot
 if __name__ == "__main__":
     print("Starting Coach Rosterbater...")
-    # First-time ensure data structures are present
-    save_storage(storage)
     bot.run(TOKEN)
@@ -2,8 +2,8 @@
 # Deps:  pip install -U discord.py python-dotenv python-dateutil
 # .env:  DISCORD_TOKEN=xxxx
 
-import os, json, random, asyncio, traceback
-from typing import Optional, List, Tuple
+import os, re, asyncio, hashlib, json, traceback
+from typing import Callable, Dict, Optional, List, Tuple
 from datetime import datetime, timedelta, time
 from zoneinfo import ZoneInfo
 from dateutil import parser as dtparser
@@ -13,6 +13,14 @@ from discord.ext import commands, tasks
 from discord import app_commands
 from dotenv import load_dotenv
 
+from coach_models import V1_STALE_REQUESTS, Game, GameFlag, Practice, PracticeFlag, mention
+from coach_storage import archive_stale, claim_slot, open_storage, release_slot, reserve_slot
+from coach_scheduler import DeadlineScheduler, wall_clock
+from coach_quotes import RELOAD_EVERY as QUOTES_RELOAD_EVERY, QuoteStore
+from coach_discord import DMDispatcher, DMJob, DMSummary, JobQueue, MessageCache, UserCache
+from coach_metrics import Registry, http_trace, instrument_http, instrument_ui, serve_metrics
+from coach_watchdog import LoopWatchdog
+
 # ========= CONFIG =========
 load_dotenv()
 TOKEN = os.getenv("DISCORD_TOKEN")
@@ -41,6 +49,8 @@ PING_EVERYONE_ON_URGENCY = True
 
 # Files
 STORAGE_FILE   = "storage.json"
+STORAGE_DB     = "storage.db"
+STORAGE_BACKEND = "journal"   # "journal" (storage.json + storage.journal) or "sqlite" (STORAGE_DB)
 COACHISMS_FILE = "data/coachisms.txt"
 
 # Timezone & cadence
@@ -53,7 +63,13 @@ T30 = 30 * 60
 T15 = 15 * 60
 T5  = 5 * 60
 PANIC_INTERVAL = 2 * 60
-CHECK_INTERVAL = 60
+LINEUP_RENDER_DELAY = 0.75   # seconds to gather a burst of lineup changes into one card edit
+ARCHIVE_EVERY = 3600         # seconds between sweeps of past games / stale lobbies into the archive
+GAMES_PAGE = 20              # games per page in the picker and list (a select holds at most 25)
+CLAIM_HOLD = 90              # seconds a claimer holds the slot while the confirm prompt is up
+
+# Prometheus text format at http://127.0.0.1:METRICS_PORT/metrics (loopback only); 0 turns it off
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9464"))
 
 # Positions
 ALL_POSITIONS      = ["C", "LW", "RW", "LD", "RD", "G", "UTIL", "UTIL2"]
@@ -61,8 +77,12 @@ STARTER_POSITIONS  = ["C", "LW", "RW", "LD", "RD", "G"]
 PRACTICE_POSITIONS = ["C", "LW", "RW", "LD", "RD", "G"]
 
 # ========= UTILS =========
+# Every time read goes through clock() (epoch seconds); sim_rosterbater.py swaps in a
+# coach_scheduler.VirtualClock to replay game days without waiting for them.
+clock: Callable[[], float] = wall_clock
+
 def now_tz() -> datetime:
-    return datetime.now(tz=TZ)
+    return datetime.fromtimestamp(clock(), tz=TZ)
 
 def dt_to_iso(dt: datetime) -> str:
     return dt.astimezone(TZ).isoformat()
@@ -73,24 +93,13 @@ def parse_date_time(date_str: str, time_str: str) -> datetime:
         dt = dt.replace(tzinfo=TZ)
     return dt.astimezone(TZ)
 
-def extract_user_id(mention: Optional[str]) -> Optional[int]:
-    if not mention:
-        return None
-    if mention.startswith("<@") and mention.endswith(">"):
-        inner = mention[2:-1]
-        if inner.startswith("!"):
-            inner = inner[1:]
-        if inner.isdigit():
-            return int(inner)
-    return None
-
 def member_is_manager(m: discord.Member) -> bool:
     if m.guild and m.id == m.guild.owner_id:
         return True
     return any(r.id in ROLE_IDS_MANAGER for r in m.roles)
 
-def game_title(g: dict) -> str:
-    return f"{g['opponent']} — {g['id']}"
+def game_title(g: Game) -> str:
+    return f"{g.opponent} — {g.id}"
 
 def anchor_times(game_dt: datetime) -> dict:
     prev_day = (game_dt - timedelta(days=1)).date()
@@ -113,95 +122,23 @@ async def safe_reply_inter(inter: discord.Interaction, content: str, ephemeral:
         log_ex("safe_reply_inter", e)
 
 # ========= STORAGE =========
-def load_storage() -> dict:
-    if os.path.exists(STORAGE_FILE):
-        try:
-            with open(STORAGE_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception as e:
-            log_ex("load_storage", e)
-    return {"games": [], "practices": [], "captain_id": None}
+# Backends live in coach_storage.py and hand out Game/Practice objects (coach_models.py).
+# Read through db.find_*/games()/upcoming_assignments(), write through
+# db.add_*/save_*/delete_*/set_meta.
+db = open_storage(STORAGE_FILE, STORAGE_BACKEND, STORAGE_DB)
 
-def save_storage():
-    try:
-        with open(STORAGE_FILE, "w", encoding="utf-8") as f:
-            json.dump(storage, f, indent=2, ensure_ascii=False)
-    except Exception as e:
-        log_ex("save_storage", e)
-
-storage = load_storage()
-
-def ensure_game(g: dict) -> dict:
-    g.setdefault("roster", {})
-    g.setdefault("confirmed", {})
-    for p in ALL_POSITIONS:
-        g["roster"].setdefault(p, None)
-        g["confirmed"].setdefault(p, False)
-    g.setdefault("posted_requests", {p: None for p in ALL_POSITIONS})
-    g.setdefault("flags", {})
-    g.setdefault("lineup_message_id", None)
-    g.setdefault("thread_id", None)
-    g.setdefault("status", "upcoming")
-    return g
-
-def ensure_practice(p: dict) -> dict:
-    p.setdefault("roster", {pos: None for pos in PRACTICE_POSITIONS})
-    p.setdefault("creator_id", None)
-    p.setdefault("channel_id", LINEUP_CHANNEL_ID)
-    p.setdefault("message_id", None)
-    p.setdefault("thread_id", None)
-    p.setdefault("opponent", "Random Online")
-    p.setdefault("start_in_min", 5)
-    p.setdefault("flags", {"announced": False, "canceled": False, "started": False})
-    return p
-
-def find_game_by_id(game_id: str) -> Optional[dict]:
-    for g in storage["games"]:
-        if g["id"] == game_id:
-            return ensure_game(g)
-    return None
+def find_game_by_id(game_id: str) -> Optional[Game]:
+    return db.find_game(game_id)
 
-def find_practice_by_id(pid: str) -> Optional[dict]:
-    for p in storage["practices"]:
-        if p["id"] == pid:
-            return ensure_practice(p)
-    return None
+def find_practice_by_id(pid: str) -> Optional[Practice]:
+    return db.find_practice(pid)
 
-def upcoming_games_for_user(uid: int) -> List[Tuple[datetime, dict, str]]:
-    rows = []
-    for g in storage["games"]:
-        ensure_game(g)
-        if g.get("status") == "past":
-            continue
-        dt = dtparser.parse(g["dt_iso"]).astimezone(TZ)
-        if dt <= now_tz():
-            continue
-        for pos, mention in g["roster"].items():
-            if mention and extract_user_id(mention) == uid:
-                rows.append((dt, g, pos))
-    rows.sort(key=lambda x: x[0])
-    return rows
+def upcoming_games_for_user(uid: int) -> List[Tuple[datetime, Game, str]]:
+    return [(g.dt, g, pos) for _ts, g, pos in db.upcoming_assignments(uid, now_tz().timestamp())]
 
 # ========= COACH QUOTES =========
-def load_coach_quotes() -> dict:
-    quotes = {}
-    if not os.path.exists(COACHISMS_FILE):
-        return quotes
-    cat = None
-    with open(COACHISMS_FILE, "r", encoding="utf-8") as fh:
-        for raw in fh:
-            line = raw.strip()
-            if not line:
-                continue
-            if line.startswith("[") and line.endswith("]"):
-                cat = line[1:-1]
-                quotes.setdefault(cat, [])
-            else:
-                if cat:
-                    quotes[cat].append(line)
-    return quotes
-
-COACH_QUOTES = load_coach_quotes()
+# coach_quotes.QuoteStore compiles data/coachisms.txt per category; quotes_loop picks up
+# edits to the file while the bot runs. DEFAULT_QUOTES covers categories the file lacks.
 DEFAULT_QUOTES = {
     "PLAYER_CONFIRMED": [
         "Heads up {player}, you’re penciled in. Tap confirm so I stop pacing.",
@@ -216,22 +153,77 @@ DEFAULT_QUOTES = {
         "Skates on. Excuses off.",
     ],
 }
+quotes = QuoteStore(COACHISMS_FILE, DEFAULT_QUOTES)
+
 def random_quote(cat: str, player_mention: Optional[str] = None) -> Optional[str]:
-    arr = COACH_QUOTES.get(cat, []) or DEFAULT_QUOTES.get(cat, [])
-    if not arr:
-        return None
-    q = random.choice(arr)
-    return q.replace("{player}", player_mention or "this") if "{player}" in q else q
+    return quotes.pick(cat, player_mention)
 
 # ========= DISCORD BOOT =========
 intents = discord.Intents.default()
 intents.members = True
 intents.message_content = True
 
-bot = commands.Bot(command_prefix="!", intents=intents)
+metrics = Registry("rosterbater")
+
+# presence goes out with IDENTIFY, so reconnects don't need a change_presence call
+bot = commands.Bot(command_prefix="!", intents=intents, activity=discord.Game(name="Rosterbating (slash)"),
+                   http_trace=http_trace(metrics))
 tree = bot.tree
 GUILD = discord.Object(id=GUILD_ID)
 
+# Every user lookup goes through user_cache instead of bot.fetch_user; confirm DMs,
+# nudges and announcements fan out through dm_dispatcher (see coach_discord.py)
+user_cache = UserCache(bot)
+dm_dispatcher = DMDispatcher(user_cache.get)
+# Stored message ids (lineup cards, lobbies, posted requests) are edited/deleted via
+# PartialMessage handles, never fetched first.
+message_cache = MessageCache(bot)
+
+# ========= METRICS =========
+# Handler run times and REST calls are recorded by hooks on discord.py (coach_metrics.py);
+# storage writes report from the writer thread; the gauges below are read at scrape time.
+instrument_ui(metrics)
+instrument_http(bot.http, metrics)
+scheduler_pass_seconds = metrics.histogram("scheduler_pass_seconds", "Full scheduler passes (/forcecheck).")
+stage_seconds = metrics.histogram("scheduler_stage_seconds", "Game-day scheduler stage run time.", ("stage",))
+stage_delay = metrics.histogram("scheduler_stage_delay_seconds", "How late a stage ran after its due time.", ("stage",),
+                                buckets=(0.01, 0.1, 0.5, 1, 5, 15, 60, 300, 900))
+storage_write_seconds = metrics.histogram("storage_write_seconds", "Storage writes (journal append, snapshot, sqlite commit).", ("what",))
+storage_write_bytes = metrics.histogram("storage_write_bytes", "Bytes per storage write (sqlite: size of the row values saved).", ("what",),
+                                        buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304))
+storage_size = metrics.gauge("storage_size_bytes", "Storage files on disk (snapshot, journal, archives / sqlite db).")
+open_requests = metrics.gauge("open_requests", "Claim requests currently posted for active games.")
+games_active = metrics.gauge("games_active", "Games not yet started or archived.")
+job_stats = metrics.gauge("jobs", "Background job queue (pending now; done/failed since start).", ("state",))
+user_cache_stats = metrics.gauge("user_cache", "User lookups by outcome since start; size is entries kept.", ("stat",))
+writer_stats = metrics.gauge("storage_writer", "Journal writer batches/records since start; queued now.", ("stat",))
+misc = metrics.gauge("state", "Other point-in-time counts.", ("what",))
+
+def record_storage_write(what: str, seconds: float, nbytes: int):
+    storage_write_seconds.observe(seconds, what)
+    if nbytes:
+        storage_write_bytes.observe(nbytes, what)
+
+db.on_write = record_storage_write
+
+@metrics.collector
+def collect_state():
+    storage_size.set(db.size_bytes())
+    games = db.active_games()
+    games_active.set(len(games))
+    open_requests.set(sum(1 for g in games for _ in g.requests()))
+    for k, v in jobs.stats().items():
+        job_stats.set(v, k)
+    for k, v in user_cache.stats().items():
+        user_cache_stats.set(v, k)
+    if hasattr(db, "writer"):
+        for k, v in db.writer.stats().items():
+            writer_stats.set(v, k)
+    misc.set(message_cache.stale, "stale_message_handles")
+    misc.set(game_scheduler.pending(), "scheduled_stages")
+    misc.set(len(lineup_renders._tasks), "lineup_renders_pending")
+    misc.set(quotes.reloads, "quote_reloads")
+
 async def coach_log(text: str):
     ch = bot.get_channel(COACH_LOG_CHANNEL_ID)
     if ch:
@@ -240,109 +232,188 @@ async def coach_log(text: str):
         except Exception as e:
             log_ex("coach_log", e)
 
+async def report_job_failure(name: str, e: Exception):
+    log_ex(f"job {name}", e)
+    await coach_log(f"⚠️ Background job failed: **{name}** — `{e}`")
+
+# Component callbacks answer the interaction first and submit the slow part (request
+# deletes, DMs, lineup edits, broadcasts) here. Jobs take ids and re-read the game/lobby
+# when they run; a failure lands in the coach log instead of an "interaction failed".
+jobs = JobQueue(report_job_failure)
+
+# Measures event-loop lag; a stall past coach_watchdog.THRESHOLD is traced to the blocking
+# function and reported here (rate-limited) and in loop_stalls_total.
+watchdog = LoopWatchdog(coach_log, metrics)
+
+async def refresh_lineup(gid: str, note: Optional[str] = None):
+    g = find_game_by_id(gid)
+    if g:
+        await post_or_update_lineup(g, note=note)
+
+async def refresh_practice(pid: str, note: Optional[str] = None):
+    lobby = find_practice_by_id(pid)
+    if lobby:
+        await post_or_update_practice(lobby, note=note)
+
 async def broadcast_to_general(text: str):
     ch = bot.get_channel(GENERAL_CHANNEL_ID)
     if ch:
         await ch.send(text)
 
-async def get_or_create_game_thread(g: dict, lineup_message: Optional[discord.Message] = None) -> Optional[discord.Thread]:
-    if g.get("thread_id"):
-        th = bot.get_channel(int(g["thread_id"]))
+async def get_or_create_game_thread(g: Game, lineup_message: Optional[discord.abc.Snowflake] = None):
+    if g.thread_id:
+        th = bot.get_channel(g.thread_id)
         if isinstance(th, discord.Thread):
             return th
+        # archived threads drop out of the cache; we can still post by id
+        return bot.get_partial_messageable(g.thread_id)
     if not lineup_message:
-        ch = bot.get_channel(LINEUP_CHANNEL_ID)
-        if not ch or not g.get("lineup_message_id"):
-            return None
-        try:
-            lineup_message = await ch.fetch_message(int(g["lineup_message_id"]))
-        except Exception:
+        if not bot.get_channel(LINEUP_CHANNEL_ID) or not g.lineup_message_id:
             return None
+        lineup_message = message_cache.get(LINEUP_CHANNEL_ID, g.lineup_message_id)
     try:
-        name = f"{g['opponent']} — {g['id']}"
-        th = await lineup_message.create_thread(name=name, auto_archive_duration=1440)
-        g["thread_id"] = th.id
-        save_storage()
+        th = await lineup_message.create_thread(name=game_title(g), auto_archive_duration=1440)
+        g.thread_id = th.id
+        db.save_game(g)
         await th.send("🏒 Game thread created. Lineup updates and urgent fills will appear here.")
         return th
     except Exception:
         return None
 
-async def send_to_game_thread(g: dict, content: str, view: Optional[discord.ui.View] = None):
+async def send_to_game_thread(g: Game, content: str, view: Optional[discord.ui.View] = None) -> Optional[discord.Message]:
     th = await get_or_create_game_thread(g)
     if th:
         try:
-            await th.send(content, view=view)
+            return await th.send(content, view=view)
         except Exception:
             pass
+    return None
 
 # ========= LINEUP CARD (single editable) =========
-class OpenManageFromCard(discord.ui.Button):
+# Buttons that live on long-lived messages are DynamicItems: the bot routes them by
+# custom_id template (registered once in register_persistent_views), so nothing has to
+# be rebuilt per stored game or lobby. Game ids are ISO timestamps and contain ":",
+# so ids match greedily and only the trailing fields are ":"-free.
+class OpenManageFromCard(discord.ui.DynamicItem[discord.ui.Button], template=r"card:manage:(?P<gid>.+)"):
     def __init__(self, gid: str):
-        super().__init__(label="Manage", style=discord.ButtonStyle.secondary, custom_id=f"card:manage:{gid}")
+        super().__init__(discord.ui.Button(label="Manage", style=discord.ButtonStyle.secondary, custom_id=f"card:manage:{gid}"))
+        self.gid = gid
+    @classmethod
+    async def from_custom_id(cls, inter: discord.Interaction, item: discord.ui.Button, match: re.Match):
+        return cls(match["gid"])
     async def callback(self, inter: discord.Interaction):
         if not isinstance(inter.user, discord.Member) or not member_is_manager(inter.user):
             return await inter.response.send_message("Only managers.", ephemeral=True)
-        g = find_game_by_id(self.custom_id.split(":")[-1])
+        g = find_game_by_id(self.gid)
         if not g:
             return await inter.response.send_message("Game not found.", ephemeral=True)
-        await inter.response.send_message(f"Managing **{g['id']}**", view=ManageGameView(game_id=g["id"]), ephemeral=True)
+        await inter.response.send_message(f"Managing **{g.id}**", view=ManageGameView(g.id), ephemeral=True)
 
-class EditRosterFromCard(discord.ui.Button):
+class EditRosterFromCard(discord.ui.DynamicItem[discord.ui.Button], template=r"card:edit:(?P<gid>.+)"):
     def __init__(self, gid: str):
-        super().__init__(label="Edit Roster", style=discord.ButtonStyle.success, custom_id=f"card:edit:{gid}")
+        super().__init__(discord.ui.Button(label="Edit Roster", style=discord.ButtonStyle.success, custom_id=f"card:edit:{gid}"))
+        self.gid = gid
+    @classmethod
+    async def from_custom_id(cls, inter: discord.Interaction, item: discord.ui.Button, match: re.Match):
+        return cls(match["gid"])
     async def callback(self, inter: discord.Interaction):
         if not isinstance(inter.user, discord.Member) or not member_is_manager(inter.user):
             return await inter.response.send_message("Only managers.", ephemeral=True)
-        g = find_game_by_id(self.custom_id.split(":")[-1])
+        g = find_game_by_id(self.gid)
         if not g:
             return await inter.response.send_message("Game not found.", ephemeral=True)
-        if g["flags"].get("locked"):
+        if GameFlag.LOCKED in g.flags:
             return await inter.response.send_message("Roster is locked.", ephemeral=True)
-        if g["flags"].get("canceled"):
+        if GameFlag.CANCELED in g.flags:
             return await inter.response.send_message("Game is canceled.", ephemeral=True)
         await inter.response.send_message(
-            f"Editing roster for **{g['opponent']}** — {g['id']}",
-            view=RosterBuilderView(g["id"]),
+            f"Editing roster for **{g.opponent}** — {g.id}",
+            view=RosterBuilderView(g.id),
             ephemeral=True,
         )
 
-async def post_or_update_lineup(game: dict, note: Optional[str] = None):
+async def post_or_update_lineup(game: Game, note: Optional[str] = None):
     ch = bot.get_channel(LINEUP_CHANNEL_ID)
     if not ch:
         return
-    desc = f"Game at {game['dt_iso']}"
+    desc = f"Game at {game.dt_iso}"
     if note:
         desc += f"\n{note}"
-    if game["flags"].get("locked"):
+    if GameFlag.LOCKED in game.flags:
         desc += "\n🔒 Roster is locked."
-    if game["flags"].get("canceled"):
+    if GameFlag.CANCELED in game.flags:
         desc += "\n🚫 Game canceled."
     embed = discord.Embed(
-        title=f"📋 Lineup — {game['opponent']} ({game['id']})",
+        title=f"📋 Lineup — {game.opponent} ({game.id})",
         description=desc,
         color=discord.Color.blurple(),
     )
     for pos in ALL_POSITIONS:
-        embed.add_field(name=pos, value=game["roster"].get(pos) or "—", inline=True)
+        embed.add_field(name=pos, value=game.slot(pos).mention or "—", inline=True)
     v = discord.ui.View(timeout=None)
-    v.add_item(OpenManageFromCard(game["id"]))
-    if not game["flags"].get("locked") and not game["flags"].get("canceled"):
-        v.add_item(EditRosterFromCard(game["id"]))
-    msg_id = game.get("lineup_message_id")
+    v.add_item(OpenManageFromCard(game.id))
+    if not game.flags & (GameFlag.LOCKED | GameFlag.CANCELED):
+        v.add_item(EditRosterFromCard(game.id))
+    msg_id = game.lineup_message_id
     if msg_id:
         try:
-            msg = await ch.fetch_message(msg_id)
-            await msg.edit(embed=embed, view=v)
+            msg = await message_cache.edit(LINEUP_CHANNEL_ID, msg_id, embed=embed, view=v)
+        except Exception as e:
+            log_ex("post_or_update_lineup", e)
+            msg = None
+        if msg:
             await get_or_create_game_thread(game, lineup_message=msg)
             return
-        except Exception:
-            game["lineup_message_id"] = None
+        game.lineup_message_id = None
     sent = await ch.send(embed=embed, view=v)
-    game["lineup_message_id"] = sent.id
-    save_storage()
+    game.lineup_message_id = sent.id
+    db.save_game(game)
     await get_or_create_game_thread(game, lineup_message=sent)
 
+class LineupRenderQueue:
+    """Coalesces lineup card updates per game. The first request starts a short timer;
+    everything that arrives before it fires is folded into one edit that renders the
+    game's latest state with all the notes collected meanwhile. Requests that land
+    while an edit is in flight schedule exactly one more."""
+    MAX_NOTES = 5
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self._notes: dict = {}    # gid -> [note, ...] waiting for the next edit
+        self._tasks: dict = {}    # gid -> render task
+
+    def request(self, gid: str, note: Optional[str] = None):
+        notes = self._notes.setdefault(gid, [])
+        if note and note not in notes:
+            notes.append(note)
+        if gid not in self._tasks:
+            self._tasks[gid] = asyncio.create_task(self._run(gid))
+
+    async def _run(self, gid: str):
+        try:
+            while gid in self._notes:
+                await asyncio.sleep(self.delay)
+                notes = self._notes.pop(gid, [])[-self.MAX_NOTES:]
+                g = find_game_by_id(gid)
+                if not g:
+                    continue
+                try:
+                    await post_or_update_lineup(g, note="\n".join(notes) or None)
+                except Exception as e:
+                    log_ex("lineup render", e)
+        finally:
+            self._tasks.pop(gid, None)
+
+    async def drain(self):
+        """Wait until every pending card edit (and any queued meanwhile) has run."""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks.values()), return_exceptions=True)
+
+lineup_renders = LineupRenderQueue(LINEUP_RENDER_DELAY)
+
+def queue_lineup_update(g: Game, note: Optional[str] = None):
+    lineup_renders.request(g.id, note)
+
 # ========= ROSTER BUILDER =========
 class PositionSelect(discord.ui.Select):
     def __init__(self, gid: str):
@@ -385,27 +456,24 @@ class SaveSlotBtn(discord.ui.Button):
         g = find_game_by_id(v.gid)
         if not g:
             return await inter.response.send_message("Game not found.", ephemeral=True)
-        if g["flags"].get("locked"):
+        if GameFlag.LOCKED in g.flags:
             return await inter.response.send_message("Roster is locked.", ephemeral=True)
-        if g["flags"].get("canceled"):
+        if GameFlag.CANCELED in g.flags:
             return await inter.response.send_message("Game is canceled.", ephemeral=True)
         pos, user = v.selection()
         if not pos or not user:
             return await inter.response.send_message("Pick a position and player.", ephemeral=True)
-        mention = f"<@{user.id}>"
-        g["roster"][pos] = mention
-        g["confirmed"][pos] = False
-        save_storage()
-        try:
-            dm = await user.send(
-                (random_quote("PLAYER_CONFIRMED", mention) or f"You are listed as **{pos}** for game {g['id']}.")
-                + "\nTap to confirm."
-            )
-            await dm.edit(view=ConfirmDMView(g["id"], pos, user.id))
-        except discord.Forbidden:
-            pass
-        await inter.response.send_message(f"Assigned {mention} to **{pos}**.", ephemeral=True)
-        await post_or_update_lineup(g, note="Roster updated.")
+        g.slot(pos).assign(user.id)
+        db.save_game(g)
+        await inter.response.send_message(f"Assigned {user.mention} to **{pos}**.", ephemeral=True)
+        queue_lineup_update(g, note="Roster updated.")
+        jobs.submit(f"assign DM {g.id}/{pos}", dm_assignment, inter, g.id, pos, user.id)
+
+async def dm_assignment(inter: discord.Interaction, gid: str, pos: str, uid: int):
+    text = random_quote("PLAYER_CONFIRMED", mention(uid)) or f"You are listed as **{pos}** for game {gid}."
+    res = await dm_dispatcher.send(DMJob(uid, text + "\nTap to confirm.", view=ConfirmDMView(gid, pos, uid)))
+    if res != "sent":
+        await inter.followup.send(f"Couldn’t DM {mention(uid)} ({'DMs closed' if res == 'forbidden' else res}).", ephemeral=True)
 
 class FinishEditBtn(discord.ui.Button):
     def __init__(self):
@@ -414,7 +482,7 @@ class FinishEditBtn(discord.ui.Button):
         v: RosterBuilderView = self.view  # type: ignore
         g = find_game_by_id(v.gid)
         if g:
-            await post_or_update_lineup(g, note="Roster updated.")
+            queue_lineup_update(g, note="Roster updated.")
         await inter.response.edit_message(content="Roster editing finished.", view=None)
 
 class ConfirmDMView(discord.ui.View):
@@ -430,40 +498,54 @@ class ConfirmDMView(discord.ui.View):
         g = find_game_by_id(self.gid)
         if not g:
             return await inter.response.send_message("Game not found.", ephemeral=True)
-        if g["flags"].get("canceled"):
+        if GameFlag.CANCELED in g.flags:
             return await inter.response.send_message("Game is canceled.", ephemeral=True)
-        g["confirmed"][self.pos] = True
-        save_storage()
-        await inter.response.send_message(f"Confirmed for **{self.pos}** — see you at {g['dt_iso']}!", ephemeral=True)
-        await post_or_update_lineup(g, note=f"{self.pos} confirmed by <@{self.uid}>")
+        g.slot(self.pos).confirmed = True
+        db.save_game(g)
+        await inter.response.send_message(f"Confirmed for **{self.pos}** — see you at {g.dt_iso}!", ephemeral=True)
+        queue_lineup_update(g, note=f"{self.pos} confirmed by <@{self.uid}>")
 
 # ========= CLAIM / REPLACEMENTS =========
-class ClaimButton(discord.ui.Button):
+class ClaimButton(discord.ui.DynamicItem[discord.ui.Button], template=r"claim:(?P<gid>.+):(?P<pos>[^:]+)"):
     def __init__(self, gid: str, pos: str):
-        super().__init__(label=f"Claim {pos}", style=discord.ButtonStyle.primary, custom_id=f"claim:{gid}:{pos}")
+        super().__init__(discord.ui.Button(label=f"Claim {pos}", style=discord.ButtonStyle.primary, custom_id=f"claim:{gid}:{pos}"))
+        self.gid = gid
+        self.pos = pos
+    @classmethod
+    async def from_custom_id(cls, inter: discord.Interaction, item: discord.ui.Button, match: re.Match):
+        return cls(match["gid"], match["pos"])
     async def callback(self, inter: discord.Interaction):
-        gid, pos = self.custom_id.split(":")[1:]
+        gid, pos = self.gid, self.pos
         g = find_game_by_id(gid)
         if not g:
             return await inter.response.send_message("Game not found.", ephemeral=True)
-        if g["flags"].get("locked"):
+        if GameFlag.LOCKED in g.flags:
             return await inter.response.send_message("Roster is locked.", ephemeral=True)
-        if g["flags"].get("canceled"):
+        if GameFlag.CANCELED in g.flags:
             return await inter.response.send_message("Game is canceled.", ephemeral=True)
-        if g["roster"].get(pos) and g["confirmed"].get(pos):
+        if not g.is_open(pos):
             return await inter.response.send_message("That spot is already filled.", ephemeral=True)
+        now = now_tz().timestamp()
+        if not reserve_slot(db, g, pos, inter.user.id, now + CLAIM_HOLD, now):
+            wait = int(g.slot(pos).held_until - now) + 1
+            return await inter.response.send_message(
+                f"Someone is confirming **{pos}** right now — it reopens in {wait}s if they don’t.", ephemeral=True)
         await inter.response.send_message(
-            f"Claim **{pos}** for {g['id']}?",
+            f"Claim **{pos}** for {g.id}? (held for you for {CLAIM_HOLD}s)",
             view=ConfirmClaimView(gid, pos, inter.user.id),
             ephemeral=True,
         )
 
 class ConfirmClaimView(discord.ui.View):
     def __init__(self, gid: str, pos: str, uid: int):
-        super().__init__(timeout=300)
+        super().__init__(timeout=CLAIM_HOLD)
         self.gid = gid
         self.pos = pos
         self.uid = uid
+    async def on_timeout(self):
+        g = find_game_by_id(self.gid)
+        if g:
+            release_slot(db, g, self.pos, self.uid)
     @discord.ui.button(label="Yes, I’m in", style=discord.ButtonStyle.success)
     async def yes(self, inter: discord.Interaction, _button: discord.ui.Button):
         if inter.user.id != self.uid:
@@ -471,95 +553,126 @@ class ConfirmClaimView(discord.ui.View):
         g = find_game_by_id(self.gid)
         if not g:
             return await inter.response.send_message("Game not found.", ephemeral=True)
-        if g["flags"].get("locked"):
+        if GameFlag.LOCKED in g.flags:
             return await inter.response.send_message("Roster is locked.", ephemeral=True)
-        if g["flags"].get("canceled"):
+        if GameFlag.CANCELED in g.flags:
             return await inter.response.send_message("Game is canceled.", ephemeral=True)
-        if g["roster"].get(self.pos) and g["confirmed"].get(self.pos):
+        if not claim_slot(db, g, self.pos, inter.user.id, now_tz().timestamp()):
             return await inter.response.send_message("Too late — already filled.", ephemeral=True)
-        mention = f"<@{inter.user.id}>"
-        g["roster"][self.pos] = mention
-        g["confirmed"][self.pos] = True
-        # remove posted request if we have it
-        try:
-            mid = g["posted_requests"].get(self.pos)
-            if mid:
-                gen = bot.get_channel(GENERAL_CHANNEL_ID)
-                if gen:
-                    m = await gen.fetch_message(mid)
-                    await m.delete()
-        except Exception:
-            pass
-        g["posted_requests"][self.pos] = None
-        save_storage()
+        self.stop()
+        util_moved = self.pos != "UTIL" and g.user("UTIL") == inter.user.id
         await inter.response.edit_message(content=f"Locked in. You’re **{self.pos}**.", view=None)
-        await post_or_update_lineup(g, note=f"{self.pos} filled by {mention}")
-        # UTIL moved to starter → find new UTIL
-        if g["roster"].get("UTIL") == mention and self.pos != "UTIL":
-            await post_new_util_request(g, "UTIL")
+        queue_lineup_update(g, note=f"{self.pos} filled by {inter.user.mention}")
+        jobs.submit(f"claim {g.id}/{self.pos}", finish_claim, g.id, self.pos, util_moved)
 
-async def post_claim_request(g: dict, pos: str, reason: str = ""):
-    if g["flags"].get("locked") or g["flags"].get("canceled"):
+async def finish_claim(gid: str, pos: str, util_moved: bool):
+    g = find_game_by_id(gid)
+    if not g:
+        return
+    # remove posted request (and its thread copy) if we have it
+    await clear_request(g, pos)
+    db.save_game(g)
+    # UTIL moved to starter → find new UTIL
+    if util_moved:
+        await post_new_util_request(g, "UTIL")
+
+async def post_claim_request(g: Game, pos: str, reason: str = "", save: bool = True):
+    if g.flags & (GameFlag.LOCKED | GameFlag.CANCELED):
         return
     gen = bot.get_channel(GENERAL_CHANNEL_ID)
     if not gen:
         return
     human = "Goalie" if pos == "G" else pos
     text = (random_quote("PLAYER_MISSING", human)
-            or f"Need a **{human}** for {g['id']} vs {g['opponent']} at {g['dt_iso']}.")
+            or f"Need a **{human}** for {g.id} vs {g.opponent} at {g.dt_iso}.")
     urgent = {"aggressive", "panic", "final", "1h", "6am"}
     prefix = "@everyone " if (PING_EVERYONE_ON_URGENCY and reason in urgent) else ""
     v1 = discord.ui.View(timeout=None)
-    v1.add_item(ClaimButton(g["id"], pos))
-    msg = await gen.send(prefix + text, view=v1)
-    g["posted_requests"][pos] = msg.id
-    save_storage()
+    v1.add_item(ClaimButton(g.id, pos))
     v2 = discord.ui.View(timeout=None)
-    v2.add_item(ClaimButton(g["id"], pos))
-    await send_to_game_thread(g, prefix + text, view=v2)
-
-async def post_new_util_request(g: dict, util_slot: str = "UTIL"):
-    if g["flags"].get("locked") or g["flags"].get("canceled"):
+    v2.add_item(ClaimButton(g.id, pos))
+    msg, copy = await asyncio.gather(gen.send(prefix + text, view=v1),
+                                     send_to_game_thread(g, prefix + text, view=v2))
+    slot = g.slot(pos)
+    slot.request_id = msg.id
+    if copy:
+        slot.thread_request_id = copy.id
+    if save:
+        db.save_game(g)
+
+async def post_new_util_request(g: Game, util_slot: str = "UTIL", save: bool = True):
+    if g.flags & (GameFlag.LOCKED | GameFlag.CANCELED):
         return
     gen = bot.get_channel(GENERAL_CHANNEL_ID)
     if not gen:
         return
     prefix = "@everyone "
     v = discord.ui.View(timeout=None)
-    v.add_item(ClaimButton(g["id"], util_slot))
-    msg = await gen.send(prefix + f"🛟 Need a **{util_slot}** for {g['id']} — click to claim.", view=v)
-    g["posted_requests"][util_slot] = msg.id
-    save_storage()
+    v.add_item(ClaimButton(g.id, util_slot))
     v2 = discord.ui.View(timeout=None)
-    v2.add_item(ClaimButton(g["id"], util_slot))
-    await send_to_game_thread(g, prefix + f"🛟 Need a **{util_slot}**.", view=v2)
-
-async def clear_open_requests(g: dict):
-    gen = bot.get_channel(GENERAL_CHANNEL_ID)
-    if not gen:
-        return
-    for pos, mid in list(g["posted_requests"].items()):
-        if not mid:
+    v2.add_item(ClaimButton(g.id, util_slot))
+    msg, copy = await asyncio.gather(
+        gen.send(prefix + f"🛟 Need a **{util_slot}** for {g.id} — click to claim.", view=v),
+        send_to_game_thread(g, prefix + f"🛟 Need a **{util_slot}**.", view=v2))
+    slot = g.slot(util_slot)
+    slot.request_id = msg.id
+    if copy:
+        slot.thread_request_id = copy.id
+    if save:
+        db.save_game(g)
+
+async def clear_request(g: Game, pos: str):
+    """Delete the open claim request for one slot, both the #general post and its thread copy."""
+    slot = g.slot(pos)
+    deletes = []
+    if slot.request_id:
+        deletes.append(message_cache.delete(GENERAL_CHANNEL_ID, slot.request_id))
+    if slot.thread_request_id and g.thread_id:
+        deletes.append(message_cache.delete(g.thread_id, slot.thread_request_id))
+    slot.request_id = slot.thread_request_id = None
+    await asyncio.gather(*deletes)
+
+async def clear_open_requests(g: Game):
+    # the storage message index knows every request (and thread copy) this game has
+    # out; group by channel so each one gets a single bulk delete where Discord allows it
+    by_channel = {}
+    for mid, role, _pos in db.game_messages(g.id):
+        if role == "request":
+            by_channel.setdefault(GENERAL_CHANNEL_ID, []).append(mid)
+        elif role == "thread_request" and g.thread_id:
+            by_channel.setdefault(g.thread_id, []).append(mid)
+    await asyncio.gather(*(message_cache.delete_many(ch, ids) for ch, ids in by_channel.items()))
+    for _pos, slot in list(g.requests()):
+        slot.request_id = slot.thread_request_id = None
+    db.save_game(g)
+
+async def delete_stale_requests():
+    """Delete the claim requests that migrating v1 games left without a slot (a UTIL_NEED
+    request next to a UTIL one, see coach_models.v1_positions)."""
+    for g in db.games():
+        stale = g.extra.pop(V1_STALE_REQUESTS, None)
+        if not stale:
             continue
-        try:
-            m = await gen.fetch_message(mid)
-            await m.delete()
-        except Exception:
-            pass
-        g["posted_requests"][pos] = None
-    save_storage()
+        await message_cache.delete_many(GENERAL_CHANNEL_ID, stale.get("request", []))
+        if g.thread_id:
+            await message_cache.delete_many(g.thread_id, stale.get("thread_request", []))
+        db.save_game(g)
 
 # ========= PLAYER EMERGENCY REMOVAL =========
-class RequestRemovalButton(discord.ui.Button):
+class RequestRemovalButton(discord.ui.DynamicItem[discord.ui.Button], template=r"rm:req:(?P<gid>.+):(?P<pos>[^:]+)"):
     def __init__(self, gid: str, pos: str):
-        super().__init__(label=f"Request Removal ({pos})", style=discord.ButtonStyle.danger, custom_id=f"rm:req:{gid}:{pos}")
+        super().__init__(discord.ui.Button(label=f"Request Removal ({pos})", style=discord.ButtonStyle.danger, custom_id=f"rm:req:{gid}:{pos}"))
+        self.gid = gid
+        self.pos = pos
+    @classmethod
+    async def from_custom_id(cls, inter: discord.Interaction, item: discord.ui.Button, match: re.Match):
+        return cls(match["gid"], match["pos"])
     async def callback(self, inter: discord.Interaction):
-        gid, pos = self.custom_id.split(":")[2:]
+        gid, pos = self.gid, self.pos
         g = find_game_by_id(gid)
         if not g:
             return await inter.response.send_message("Game not found.", ephemeral=True)
-        mention = g["roster"].get(pos)
-        if not mention or extract_user_id(mention) != inter.user.id:
+        if g.user(pos) != inter.user.id:
             return await inter.response.send_message("You’re not assigned to that slot.", ephemeral=True)
         await inter.response.send_modal(RequestRemovalModal(gid, pos))
 
@@ -575,19 +688,24 @@ class RequestRemovalModal(discord.ui.Modal, title="Request Removal"):
             if not g:
                 return await safe_reply_inter(inter, "Game not found.")
             uid = inter.user.id
-            mention = g["roster"].get(self.pos)
-            if not mention or extract_user_id(mention) != uid:
+            if g.user(self.pos) != uid:
                 return await safe_reply_inter(inter, "You’re not assigned to that slot.")
-            g["confirmed"][self.pos] = False
-            save_storage()
-            await coach_log(f"🆘 Removal requested by <@{uid}> for **{self.pos}** in {game_title(g)}:\n> {self.reason}")
-            await replacement_round(g, reason="emergency")
-            await post_or_update_lineup(g, note=f"{self.pos} opened due to player emergency.")
+            g.slot(self.pos).confirmed = False
+            db.save_game(g)
             await safe_reply_inter(inter, "Coach notified. Replacement search started.")
+            queue_lineup_update(g, note=f"{self.pos} opened due to player emergency.")
+            jobs.submit(f"removal {g.id}/{self.pos}", start_removal, g.id, self.pos, uid, str(self.reason))
         except Exception as e:
             log_ex("RequestRemovalModal.on_submit", e)
             await safe_reply_inter(inter, "Couldn’t process that removal (coach notified).")
 
+async def start_removal(gid: str, pos: str, uid: int, reason: str):
+    g = find_game_by_id(gid)
+    if not g:
+        return
+    await coach_log(f"🆘 Removal requested by <@{uid}> for **{pos}** in {game_title(g)}:\n> {reason}")
+    await replacement_round(g, reason="emergency")
+
 # ========= MANAGER DASHBOARD =========
 class AdminPanelView(discord.ui.View):
     def __init__(self):
@@ -611,7 +729,7 @@ class OpenManageGameButton(discord.ui.Button):
     async def callback(self, inter: discord.Interaction):
         if not isinstance(inter.user, discord.Member) or not member_is_manager(inter.user):
             return await inter.response.send_message("Only managers.", ephemeral=True)
-        if not storage["games"]:
+        if not db.game_count():
             return await inter.response.send_message("No games to manage.", ephemeral=True)
         await inter.response.send_message("Pick a game to manage:", view=GamePickerView(), ephemeral=True)
 
@@ -621,10 +739,40 @@ class ListGamesButton(discord.ui.Button):
     async def callback(self, inter: discord.Interaction):
         if not isinstance(inter.user, discord.Member) or not member_is_manager(inter.user):
             return await inter.response.send_message("Only managers.", ephemeral=True)
-        if not storage["games"]:
+        if not db.game_count() and not db.archived_game_count():
             return await inter.response.send_message("No games scheduled.", ephemeral=True)
-        lines = [f"• {g['id']} — vs **{g['opponent']}** at {g['dt_iso']}" for g in storage["games"]]
-        await inter.response.send_message("\n".join(lines), ephemeral=True)
+        await inter.response.send_message(**game_list_message(), ephemeral=True)
+
+class PageButton(discord.ui.Button):
+    """Swaps the message for another page; make(page) returns the edit_message kwargs."""
+    def __init__(self, label: str, page: int, make, enabled: bool = True):
+        super().__init__(label=label, style=discord.ButtonStyle.secondary, disabled=not enabled)
+        self.page = page
+        self.make = make
+    async def callback(self, inter: discord.Interaction):
+        await inter.response.edit_message(**self.make(self.page))
+
+def add_page_buttons(v: discord.ui.View, page: int, total: int, make):
+    pages = max(1, -(-total // GAMES_PAGE))
+    if pages > 1:
+        v.add_item(PageButton("◀", page - 1, make, enabled=page > 0))
+        v.add_item(PageButton(f"{page + 1}/{pages}", page, make, enabled=False))
+        v.add_item(PageButton("▶", page + 1, make, enabled=page + 1 < pages))
+
+def game_list_message(page: int = 0, archived: bool = False) -> dict:
+    if archived:
+        total = db.archived_game_count()
+        games = db.archived_games(page * GAMES_PAGE, GAMES_PAGE)
+        head = f"🗄️ **Archived games** ({total})"
+    else:
+        total = db.game_count()
+        games = db.games_page(page * GAMES_PAGE, GAMES_PAGE)
+        head = f"📅 **Games** ({total})"
+    lines = [f"• {g.id} — vs **{g.opponent}**" + (" 🚫" if GameFlag.CANCELED in g.flags else "") for g in games]
+    v = discord.ui.View(timeout=300)
+    add_page_buttons(v, page, total, lambda p: game_list_message(p, archived))
+    v.add_item(PageButton("Upcoming" if archived else "Archive", 0, lambda p: game_list_message(p, not archived)))
+    return {"content": "\n".join([head] + (lines or ["Nothing here."])), "view": v}
 
 class NewGameModal(discord.ui.Modal, title="Create Game"):
     date = discord.ui.TextInput(label="Date", placeholder="YYYY-MM-DD or Aug 15 2025")
@@ -639,28 +787,20 @@ class NewGameModal(discord.ui.Modal, title="Create Game"):
             except Exception:
                 return await safe_reply_inter(inter, "Could not parse date/time.")
             gid = dt_to_iso(dt)
-            g = ensure_game({
-                "id": gid,
-                "dt_iso": gid,
-                "opponent": str(self.opponent) or "UNKNOWN",
-                "roster": {},
-                "confirmed": {},
-                "posted_requests": {},
-                "flags": {}
-            })
-            storage["games"].append(g)
-            save_storage()
-            await post_or_update_lineup(g, note="New game created.")
-            await safe_reply_inter(inter, f"Game **{gid}** created vs **{g['opponent']}**.")
+            g = Game(gid, dt, str(self.opponent) or "UNKNOWN")
+            db.add_game(g)
+            schedule_game(g)
+            await safe_reply_inter(inter, f"Game **{gid}** created vs **{g.opponent}**.")
+            jobs.submit(f"new game {gid}", refresh_lineup, gid, "New game created.")
         except Exception as e:
             log_ex("NewGameModal.on_submit", e)
             await safe_reply_inter(inter, "Couldn’t create that game.")
 
 class GamePicker(discord.ui.Select):
-    def __init__(self):
+    def __init__(self, games: List[Game]):
         super().__init__(
             placeholder="Select a game…",
-            options=[discord.SelectOption(label=g["opponent"], description=g["id"], value=g["id"]) for g in storage["games"]],
+            options=[discord.SelectOption(label=g.opponent[:100], description=g.id, value=g.id) for g in games],
             min_values=1, max_values=1, custom_id="pick:game",
         )
     async def callback(self, inter: discord.Interaction):
@@ -668,9 +808,12 @@ class GamePicker(discord.ui.Select):
         await inter.response.edit_message(content=f"Managing **{gid}**", view=ManageGameView(gid))
 
 class GamePickerView(discord.ui.View):
-    def __init__(self):
+    def __init__(self, page: int = 0):
         super().__init__(timeout=300)
-        self.add_item(GamePicker())
+        games = db.games_page(page * GAMES_PAGE, GAMES_PAGE)
+        if games:
+            self.add_item(GamePicker(games))
+        add_page_buttons(self, page, db.game_count(), lambda p: {"view": GamePickerView(p)})
 
 class ManageGameView(discord.ui.View):
     def __init__(self, gid: str):
@@ -696,8 +839,8 @@ class PostLineupNow(discord.ui.Button):
         g = self.view.g()  # type: ignore
         if not g:
             return await inter.response.send_message("Game not found.", ephemeral=True)
-        await post_or_update_lineup(g, note="Manual lineup update.")
-        await inter.response.send_message("Lineup updated.", ephemeral=True)
+        await inter.response.send_message("Updating lineup.", ephemeral=True)
+        jobs.submit(f"lineup {g.id}", refresh_lineup, g.id, "Manual lineup update.")
 
 class ToggleLockRoster(discord.ui.Button):
     def __init__(self):
@@ -706,9 +849,9 @@ class ToggleLockRoster(discord.ui.Button):
         g = self.view.g()  # type: ignore
         if not g:
             return await inter.response.send_message("Game not found.", ephemeral=True)
-        g["flags"]["locked"] = not g["flags"].get("locked", False)
-        save_storage()
-        await post_or_update_lineup(g, note="Roster locked." if g["flags"]["locked"] else "Roster unlocked.")
+        g.flags ^= GameFlag.LOCKED
+        db.save_game(g)
+        queue_lineup_update(g, note="Roster locked." if GameFlag.LOCKED in g.flags else "Roster unlocked.")
         await inter.response.send_message("Toggled.", ephemeral=True)
 
 class StartConfirms(discord.ui.Button):
@@ -718,8 +861,16 @@ class StartConfirms(discord.ui.Button):
         g = self.view.g()  # type: ignore
         if not g:
             return await inter.response.send_message("Game not found.", ephemeral=True)
-        await send_dm_confirm_requests(g, stage="manual")
-        await inter.response.send_message("Sent confirm DMs.", ephemeral=True)
+        await inter.response.send_message("Sending confirm DMs…", ephemeral=True)
+        jobs.submit(f"confirms {g.id}", manual_confirms, inter, g.id)
+
+async def manual_confirms(inter: discord.Interaction, gid: str):
+    g = find_game_by_id(gid)
+    if not g:
+        return
+    summary = await send_dm_confirm_requests(g, stage="manual")
+    await coach_log(f"📫 Manual confirms for {game_title(g)}: {summary.describe()}")
+    await inter.followup.send(f"Confirm DMs: {summary.describe()}", ephemeral=True)
 
 class BroadcastReminder(discord.ui.Button):
     def __init__(self):
@@ -737,8 +888,8 @@ class BroadcastModal(discord.ui.Modal, title="Broadcast Reminder"):
             g = find_game_by_id(self.gid)
             if not g:
                 return await safe_reply_inter(inter, "Game not found.")
-            await broadcast_to_general(f"📣 {self.text}\n(Game: {game_title(g)})")
-            await safe_reply_inter(inter, "Broadcast sent.")
+            await safe_reply_inter(inter, "Broadcasting.")
+            jobs.submit(f"broadcast {g.id}", broadcast_to_general, f"📣 {self.text}\n(Game: {game_title(g)})")
         except Exception as e:
             log_ex("BroadcastModal.on_submit", e)
             await safe_reply_inter(inter, "Couldn’t broadcast that.")
@@ -765,11 +916,16 @@ class RescheduleModal(discord.ui.Modal, title="Reschedule Game"):
             except Exception:
                 return await safe_reply_inter(inter, "Could not parse date/time.")
             iso = dt_to_iso(dt)
-            g["id"] = iso
-            g["dt_iso"] = iso
-            g["flags"] = {}
-            save_storage()
-            await post_or_update_lineup(g, note="Rescheduled.")
+            g.id = iso
+            g.set_dt(dt)
+            g.flags = GameFlag(0)
+            g.last_panic_ts = 0.0
+            g.status = "upcoming"
+            db.save_game(g, old_id=self.gid)
+            game_scheduler.cancel(self.gid)
+            forget_stage_times(self.gid)
+            schedule_game(g)
+            queue_lineup_update(g, note="Rescheduled.")
             await safe_reply_inter(inter, f"Rescheduled to **{iso}**.")
         except Exception as e:
             log_ex("RescheduleModal.on_submit", e)
@@ -782,23 +938,29 @@ class CancelGame(discord.ui.Button):
         g = self.view.g()  # type: ignore
         if not g:
             return await inter.response.send_message("Game not found.", ephemeral=True)
-        g["flags"]["canceled"] = True
-        await clear_open_requests(g)
-        await broadcast_to_general(f"🚫 Game canceled: {game_title(g)}")
-        await post_or_update_lineup(g, note="Game canceled.")
+        g.flags |= GameFlag.CANCELED
+        db.save_game(g)
+        schedule_game(g)
         await inter.response.send_message("Canceled.", ephemeral=True)
-        save_storage()
+        queue_lineup_update(g, note="Game canceled.")
+        jobs.submit(f"cancel {g.id}", announce_cancel, g.id)
+
+async def announce_cancel(gid: str):
+    g = find_game_by_id(gid)
+    if not g:
+        return
+    await clear_open_requests(g)
+    await broadcast_to_general(f"🚫 Game canceled: {game_title(g)}")
 
 class DeleteGame(discord.ui.Button):
     def __init__(self):
         super().__init__(label="Delete Game", style=discord.ButtonStyle.danger)
     async def callback(self, inter: discord.Interaction):
         gid = self.view.gid  # type: ignore
-        idx = next((i for i, gg in enumerate(storage["games"]) if gg["id"] == gid), None)
-        if idx is None:
+        if not db.delete_game(gid):
             return await inter.response.send_message("Game not found.", ephemeral=True)
-        storage["games"].pop(idx)
-        save_storage()
+        game_scheduler.cancel(gid)
+        forget_stage_times(gid)
         await inter.response.edit_message(content="Game deleted.", view=None)
 
 class NudgeUtil(discord.ui.Button):
@@ -808,16 +970,16 @@ class NudgeUtil(discord.ui.Button):
         g = self.view.g()  # type: ignore
         if not g:
             return await inter.response.send_message("Game not found.", ephemeral=True)
-        util = g["roster"].get("UTIL")
-        uid = extract_user_id(util) if util else None
+        uid = g.user("UTIL")
         if not uid:
             return await inter.response.send_message("No UTIL set.", ephemeral=True)
-        try:
-            u = await bot.fetch_user(uid)
-            await u.send(f"Coach here. Starters might be light for {g['id']}. Watch claim buttons in #general.")
-            await inter.response.send_message("UTIL nudged.", ephemeral=True)
-        except discord.Forbidden:
-            await inter.response.send_message("DM to UTIL blocked.", ephemeral=True)
+        await inter.response.send_message("Nudging UTIL…", ephemeral=True)
+        jobs.submit(f"nudge {g.id}", nudge_util, inter, g.id, uid)
+
+async def nudge_util(inter: discord.Interaction, gid: str, uid: int):
+    res = await dm_dispatcher.send(DMJob(uid, f"Coach here. Starters might be light for {gid}. Watch claim buttons in #general."))
+    text = {"sent": "UTIL nudged.", "forbidden": "DM to UTIL blocked."}.get(res, "Couldn’t reach UTIL.")
+    await inter.followup.send(text, ephemeral=True)
 
 class ClearRequests(discord.ui.Button):
     def __init__(self):
@@ -826,50 +988,49 @@ class ClearRequests(discord.ui.Button):
         g = self.view.g()  # type: ignore
         if not g:
             return await inter.response.send_message("Game not found.", ephemeral=True)
+        await inter.response.send_message("Clearing open requests.", ephemeral=True)
+        jobs.submit(f"clear requests {g.id}", clear_game_requests, g.id)
+
+async def clear_game_requests(gid: str):
+    g = find_game_by_id(gid)
+    if g:
         await clear_open_requests(g)
-        await inter.response.send_message("Cleared.", ephemeral=True)
 
 # ========= CONFIRM / REPLACEMENTS ENGINE =========
-async def send_dm_confirm_requests(g: dict, stage: str = "confirm"):
-    if g["flags"].get("canceled"):
-        return
+async def send_dm_confirm_requests(g: Game, stage: str = "confirm") -> DMSummary:
+    if GameFlag.CANCELED in g.flags:
+        return DMSummary()
+    dm_jobs = []
     for pos in ALL_POSITIONS:
-        mention = g["roster"].get(pos)
-        if not mention:
-            continue
-        uid = extract_user_id(mention)
+        uid = g.user(pos)
         if not uid:
             continue
-        try:
-            user = await bot.fetch_user(uid)
-            text = random_quote("PLAYER_CONFIRMED", mention) or f"You are listed as **{pos}** for game {g['id']}."
-            dm = await user.send(f"[{stage}] {text}\nTap to confirm.")
-            await dm.edit(view=ConfirmDMView(g["id"], pos, uid))
-        except discord.Forbidden:
-            pass
+        text = random_quote("PLAYER_CONFIRMED", mention(uid)) or f"You are listed as **{pos}** for game {g.id}."
+        dm_jobs.append(DMJob(uid, f"[{stage}] {text}\nTap to confirm.", view=ConfirmDMView(g.id, pos, uid)))
+    return await dm_dispatcher.send_many(dm_jobs)
 
-async def replacement_round(g: dict, reason: str = ""):
-    if g["flags"].get("locked") or g["flags"].get("canceled"):
+async def replacement_round(g: Game, reason: str = ""):
+    if g.flags & (GameFlag.LOCKED | GameFlag.CANCELED):
         return
-    missing = 0
-    for pos in STARTER_POSITIONS:
-        need = (not g["roster"].get(pos)) or (not g["confirmed"].get(pos, False))
-        if need and not g["posted_requests"].get(pos):
-            await post_claim_request(g, pos, reason=reason)
-            missing += 1
-    if missing >= 2 and not g["posted_requests"].get("UTIL2") and not g["roster"].get("UTIL2"):
-        await post_new_util_request(g, "UTIL2")
+    open_slots = [pos for pos in STARTER_POSITIONS if g.is_open(pos) and not g.slot(pos).request_id]
+    missing = len(open_slots)
+    posts = [post_claim_request(g, pos, reason=reason, save=False) for pos in open_slots]
+    if missing >= 2 and not g.slot("UTIL2").request_id and not g.user("UTIL2"):
+        posts.append(post_new_util_request(g, "UTIL2", save=False))
+    if posts:
+        # make the thread first so the concurrent posts don't each try to create it
+        await get_or_create_game_thread(g)
+        results = await asyncio.gather(*posts, return_exceptions=True)
+        for r in results:
+            if isinstance(r, Exception):
+                print(f"⚠️ replacement_round {g.id}: {r}\n{''.join(traceback.format_exception(r))}")
+        db.save_game(g)
     if reason == "30m":
-        util = g["roster"].get("UTIL")
-        util_ok = g["confirmed"].get("UTIL", False)
-        if util and util_ok and missing > 0:
-            uid = extract_user_id(util)
-            if uid:
-                try:
-                    u = await bot.fetch_user(uid)
-                    await u.send(f"UTIL on deck for {g['id']}. Starters missing — claim a slot in #general or reply here.")
-                except discord.Forbidden:
-                    pass
+        util = g.slot("UTIL")
+        if util.filled and missing > 0:
+            summary = await dm_dispatcher.send_many(
+                [DMJob(util.user_id, f"UTIL on deck for {g.id}. Starters missing — claim a slot in #general or reply here.")])
+            await coach_log(f"🔁 30m UTIL DM for {game_title(g)}: {summary.describe()}")
 
 # ========= PRACTICE LOBBIES =========
 class NewPracticeButton(discord.ui.Button):
@@ -894,69 +1055,75 @@ class PracticeCreateModal(discord.ui.Modal, title="Create Practice Lobby"):
                 return await safe_reply_inter(inter, "Enter minutes as a number (1–120).")
             opp = (str(self.opponent).strip() or "Random Online")[:60]
             pid = f"PRAC-{int(now_tz().timestamp())}"
-            lobby = ensure_practice({
-                "id": pid,
-                "creator_id": self.creator_id,
-                "channel_id": self.origin_channel_id,
-                "opponent": opp,
-                "start_in_min": mins,
-            })
-            storage["practices"].append(lobby)
-            save_storage()
-            await post_or_update_practice(lobby, note="Practice lobby created.")
+            lobby = Practice(pid, self.creator_id, self.origin_channel_id, opp, mins)
+            db.add_practice(lobby)
             await safe_reply_inter(inter, f"Practice lobby **{pid}** created.")
+            jobs.submit(f"practice {pid}", refresh_practice, pid, "Practice lobby created.")
         except Exception as e:
             log_ex("PracticeCreateModal.on_submit", e)
             await safe_reply_inter(inter, "Couldn’t create that lobby. The coach was notified.")
 
-class PracticeClaimButton(discord.ui.Button):
+class PracticeClaimButton(discord.ui.DynamicItem[discord.ui.Button], template=r"prac:claim:(?P<pid>.+):(?P<pos>[^:]+)"):
     def __init__(self, pid: str, pos: str):
-        super().__init__(label=f"{pos}", style=discord.ButtonStyle.primary, custom_id=f"prac:claim:{pid}:{pos}")
+        super().__init__(discord.ui.Button(label=f"{pos}", style=discord.ButtonStyle.primary, custom_id=f"prac:claim:{pid}:{pos}"))
+        self.pid = pid
+        self.pos = pos
+    @classmethod
+    async def from_custom_id(cls, inter: discord.Interaction, item: discord.ui.Button, match: re.Match):
+        return cls(match["pid"], match["pos"])
     async def callback(self, inter: discord.Interaction):
-        pid, pos = self.custom_id.split(":")[2:]
+        pid, pos = self.pid, self.pos
         lobby = find_practice_by_id(pid)
         if not lobby:
             return await inter.response.send_message("Lobby not found.", ephemeral=True)
-        if lobby["flags"].get("canceled"):
+        if PracticeFlag.CANCELED in lobby.flags:
             return await inter.response.send_message("Lobby canceled.", ephemeral=True)
-        if lobby["roster"].get(pos):
+        if lobby.slots.get(pos):
             return await inter.response.send_message("That slot is taken.", ephemeral=True)
         # prevent duplicate slots by the same person
-        for k, mention in lobby["roster"].items():
-            if mention and extract_user_id(mention) == inter.user.id:
-                return await inter.response.send_message(f"You already occupy **{k}**.", ephemeral=True)
-        lobby["roster"][pos] = f"<@{inter.user.id}>"
-        save_storage()
-        await post_or_update_practice(lobby, note=f"{inter.user.mention} joined as **{pos}**.")
+        held = lobby.position_of(inter.user.id)
+        if held:
+            return await inter.response.send_message(f"You already occupy **{held}**.", ephemeral=True)
+        lobby.slots[pos] = inter.user.id
+        db.save_practice(lobby)
         await inter.response.send_message(f"You claimed **{pos}**.", ephemeral=True)
+        jobs.submit(f"practice {pid}", refresh_practice, pid, f"{inter.user.mention} joined as **{pos}**.")
 
-class PracticeLeaveButton(discord.ui.Button):
+class PracticeLeaveButton(discord.ui.DynamicItem[discord.ui.Button], template=r"prac:leave:(?P<pid>.+)"):
     def __init__(self, pid: str):
-        super().__init__(label="Leave My Slot", style=discord.ButtonStyle.secondary, custom_id=f"prac:leave:{pid}")
+        super().__init__(discord.ui.Button(label="Leave My Slot", style=discord.ButtonStyle.secondary, custom_id=f"prac:leave:{pid}"))
+        self.pid = pid
+    @classmethod
+    async def from_custom_id(cls, inter: discord.Interaction, item: discord.ui.Button, match: re.Match):
+        return cls(match["pid"])
     async def callback(self, inter: discord.Interaction):
-        pid = self.custom_id.split(":")[2]
+        pid = self.pid
         lobby = find_practice_by_id(pid)
         if not lobby:
             return await inter.response.send_message("Lobby not found.", ephemeral=True)
-        if lobby["flags"].get("canceled"):
+        if PracticeFlag.CANCELED in lobby.flags:
             return await inter.response.send_message("Lobby canceled.", ephemeral=True)
-        for k, mention in lobby["roster"].items():
-            if mention and extract_user_id(mention) == inter.user.id:
-                lobby["roster"][k] = None
-                save_storage()
-                await post_or_update_practice(lobby, note=f"{inter.user.mention} left **{k}**.")
-                return await inter.response.send_message("Left your slot.", ephemeral=True)
-        await inter.response.send_message("You’re not in this lobby.", ephemeral=True)
-
-class PracticeSetStartButton(discord.ui.Button):
+        held = lobby.position_of(inter.user.id)
+        if not held:
+            return await inter.response.send_message("You’re not in this lobby.", ephemeral=True)
+        lobby.slots[held] = None
+        db.save_practice(lobby)
+        await inter.response.send_message("Left your slot.", ephemeral=True)
+        jobs.submit(f"practice {pid}", refresh_practice, pid, f"{inter.user.mention} left **{held}**.")
+
+class PracticeSetStartButton(discord.ui.DynamicItem[discord.ui.Button], template=r"prac:setstart:(?P<pid>.+)"):
     def __init__(self, pid: str):
-        super().__init__(label="Set Start Minutes", style=discord.ButtonStyle.secondary, custom_id=f"prac:setstart:{pid}")
+        super().__init__(discord.ui.Button(label="Set Start Minutes", style=discord.ButtonStyle.secondary, custom_id=f"prac:setstart:{pid}"))
+        self.pid = pid
+    @classmethod
+    async def from_custom_id(cls, inter: discord.Interaction, item: discord.ui.Button, match: re.Match):
+        return cls(match["pid"])
     async def callback(self, inter: discord.Interaction):
-        pid = self.custom_id.split(":")[2]
+        pid = self.pid
         lobby = find_practice_by_id(pid)
         if not lobby:
             return await inter.response.send_message("Lobby not found.", ephemeral=True)
-        if inter.user.id != lobby["creator_id"] and not (isinstance(inter.user, discord.Member) and member_is_manager(inter.user)):
+        if inter.user.id != lobby.creator_id and not (isinstance(inter.user, discord.Member) and member_is_manager(inter.user)):
             return await inter.response.send_message("Only the lobby creator or managers can change this.", ephemeral=True)
         await inter.response.send_modal(PracticeSetStartModal(pid))
 
@@ -974,215 +1141,322 @@ class PracticeSetStartModal(discord.ui.Modal, title="Set Start Minutes"):
                 mins = max(1, min(120, int(str(self.minutes).strip())))
             except Exception:
                 return await safe_reply_inter(inter, "Enter minutes as a number (1–120).")
-            lobby["start_in_min"] = mins
-            save_storage()
-            await post_or_update_practice(lobby, note=f"Start window set to **{mins}** minutes.")
+            lobby.start_in_min = mins
+            db.save_practice(lobby)
             await safe_reply_inter(inter, "Updated.")
+            jobs.submit(f"practice {lobby.id}", refresh_practice, lobby.id, f"Start window set to **{mins}** minutes.")
         except Exception as e:
             log_ex("PracticeSetStartModal.on_submit", e)
             await safe_reply_inter(inter, "Couldn’t update that lobby.")
 
-class PracticeAnnounceButton(discord.ui.Button):
+class PracticeAnnounceButton(discord.ui.DynamicItem[discord.ui.Button], template=r"prac:announce:(?P<pid>.+)"):
     def __init__(self, pid: str):
-        super().__init__(label="Announce Start", style=discord.ButtonStyle.success, custom_id=f"prac:announce:{pid}")
+        super().__init__(discord.ui.Button(label="Announce Start", style=discord.ButtonStyle.success, custom_id=f"prac:announce:{pid}"))
+        self.pid = pid
+    @classmethod
+    async def from_custom_id(cls, inter: discord.Interaction, item: discord.ui.Button, match: re.Match):
+        return cls(match["pid"])
     async def callback(self, inter: discord.Interaction):
-        pid = self.custom_id.split(":")[2]
+        pid = self.pid
         lobby = find_practice_by_id(pid)
         if not lobby:
             return await inter.response.send_message("Lobby not found.", ephemeral=True)
-        if inter.user.id != lobby["creator_id"] and not (isinstance(inter.user, discord.Member) and member_is_manager(inter.user)):
+        if inter.user.id != lobby.creator_id and not (isinstance(inter.user, discord.Member) and member_is_manager(inter.user)):
             return await inter.response.send_message("Only the lobby creator or managers can announce.", ephemeral=True)
-        players = [m for m in lobby["roster"].values() if m]
-        when_ts = now_tz() + timedelta(minutes=int(lobby["start_in_min"]))
+        when_ts = now_tz() + timedelta(minutes=lobby.start_in_min)
         when_str = when_ts.strftime("%-I:%M %p %Z")
-        for m in players:
-            uid = extract_user_id(m)
-            if not uid:
-                continue
-            try:
-                u = await bot.fetch_user(uid)
-                await u.send(f"🏒 **Practice starting in {lobby['start_in_min']} minutes** (around {when_str}).\nOpponent: {lobby['opponent']}\nLobby: {lobby['id']}")
-            except discord.Forbidden:
-                pass
-        lobby["flags"]["announced"] = True
-        save_storage()
-        await post_or_update_practice(lobby, note="Start announced to squad.")
-        await inter.response.send_message("Announced. Check your DMs!", ephemeral=True)
-
-class PracticeCancelButton(discord.ui.Button):
+        text = f"🏒 **Practice starting in {lobby.start_in_min} minutes** (around {when_str}).\nOpponent: {lobby.opponent}\nLobby: {lobby.id}"
+        lobby.flags |= PracticeFlag.ANNOUNCED
+        db.save_practice(lobby)
+        await inter.response.send_message("Announcing. Check your DMs!", ephemeral=True)
+        jobs.submit(f"announce {pid}", announce_practice, pid, text)
+
+async def announce_practice(pid: str, text: str):
+    lobby = find_practice_by_id(pid)
+    if not lobby:
+        return
+    summary = await dm_dispatcher.send_many([DMJob(uid, text) for uid in lobby.players()])
+    await coach_log(f"🏒 Practice {lobby.id} start DMs: {summary.describe()}")
+    await post_or_update_practice(lobby, note="Start announced to squad.")
+
+class PracticeCancelButton(discord.ui.DynamicItem[discord.ui.Button], template=r"prac:cancel:(?P<pid>.+)"):
     def __init__(self, pid: str):
-        super().__init__(label="Cancel Lobby", style=discord.ButtonStyle.danger, custom_id=f"prac:cancel:{pid}")
+        super().__init__(discord.ui.Button(label="Cancel Lobby", style=discord.ButtonStyle.danger, custom_id=f"prac:cancel:{pid}"))
+        self.pid = pid
+    @classmethod
+    async def from_custom_id(cls, inter: discord.Interaction, item: discord.ui.Button, match: re.Match):
+        return cls(match["pid"])
     async def callback(self, inter: discord.Interaction):
-        pid = self.custom_id.split(":")[2]
+        pid = self.pid
         lobby = find_practice_by_id(pid)
         if not lobby:
             return await inter.response.send_message("Lobby not found.", ephemeral=True)
-        if inter.user.id != lobby["creator_id"] and not (isinstance(inter.user, discord.Member) and member_is_manager(inter.user)):
+        if inter.user.id != lobby.creator_id and not (isinstance(inter.user, discord.Member) and member_is_manager(inter.user)):
             return await inter.response.send_message("Only the lobby creator or managers can cancel.", ephemeral=True)
-        lobby["flags"]["canceled"] = True
-        save_storage()
-        await post_or_update_practice(lobby, note="Lobby canceled.")
+        lobby.flags |= PracticeFlag.CANCELED
+        db.save_practice(lobby)
         await inter.response.send_message("Lobby canceled.", ephemeral=True)
+        jobs.submit(f"practice {pid}", refresh_practice, pid, "Lobby canceled.")
 
-async def post_or_update_practice(lobby: dict, note: Optional[str] = None):
-    ch = bot.get_channel(lobby.get("channel_id", LINEUP_CHANNEL_ID))
+async def post_or_update_practice(lobby: Practice, note: Optional[str] = None):
+    ch = bot.get_channel(lobby.channel_id or LINEUP_CHANNEL_ID)
     if not isinstance(ch, (discord.TextChannel, discord.Thread)):
         ch = bot.get_channel(LINEUP_CHANNEL_ID)
-    desc = f"Creator: <@{lobby['creator_id']}> • Opponent: {lobby['opponent']}\nStart in: **{lobby['start_in_min']}** min"
+    desc = f"Creator: {mention(lobby.creator_id)} • Opponent: {lobby.opponent}\nStart in: **{lobby.start_in_min}** min"
     if note:
         desc += f"\n{note}"
-    if lobby["flags"].get("canceled"):
+    if PracticeFlag.CANCELED in lobby.flags:
         desc += "\n🚫 Lobby canceled."
-    embed = discord.Embed(title=f"🟩 Practice Lobby — {lobby['id']}", description=desc, color=discord.Color.green())
+    embed = discord.Embed(title=f"🟩 Practice Lobby — {lobby.id}", description=desc, color=discord.Color.green())
     for pos in PRACTICE_POSITIONS:
-        embed.add_field(name=pos, value=lobby["roster"].get(pos) or "—", inline=True)
+        embed.add_field(name=pos, value=mention(lobby.slots.get(pos)) or "—", inline=True)
     v = discord.ui.View(timeout=None)
     for pos in PRACTICE_POSITIONS:
-        v.add_item(PracticeClaimButton(lobby["id"], pos))
-    v.add_item(PracticeLeaveButton(lobby["id"]))
-    v.add_item(PracticeSetStartButton(lobby["id"]))
-    v.add_item(PracticeAnnounceButton(lobby["id"]))
-    v.add_item(PracticeCancelButton(lobby["id"]))
-    msg_id = lobby.get("message_id")
+        v.add_item(PracticeClaimButton(lobby.id, pos))
+    v.add_item(PracticeLeaveButton(lobby.id))
+    v.add_item(PracticeSetStartButton(lobby.id))
+    v.add_item(PracticeAnnounceButton(lobby.id))
+    v.add_item(PracticeCancelButton(lobby.id))
+    msg_id = lobby.message_id
     if msg_id:
         try:
-            msg = await ch.fetch_message(msg_id)
-            await msg.edit(embed=embed, view=v)
-            if not lobby.get("thread_id") and isinstance(ch, discord.TextChannel):
+            msg = await message_cache.edit(ch.id, msg_id, embed=embed, view=v)
+        except Exception as e:
+            log_ex("post_or_update_practice", e)
+            msg = None
+        if msg:
+            if not lobby.thread_id and isinstance(ch, discord.TextChannel):
                 try:
-                    th = await msg.create_thread(name=f"Practice {lobby['id']}", auto_archive_duration=1440)
-                    lobby["thread_id"] = th.id
-                    save_storage()
+                    th = await msg.create_thread(name=f"Practice {lobby.id}", auto_archive_duration=1440)
+                    lobby.thread_id = th.id
+                    db.save_practice(lobby)
                     await th.send("🟩 Practice thread created. Chat here.")
                 except Exception:
                     pass
             return
-        except Exception:
-            lobby["message_id"] = None
+        lobby.message_id = None
     sent = await ch.send(embed=embed, view=v)
-    lobby["message_id"] = sent.id
-    save_storage()
+    lobby.message_id = sent.id
+    db.save_practice(lobby)
     if isinstance(ch, discord.TextChannel):
         try:
-            th = await sent.create_thread(name=f"Practice {lobby['id']}", auto_archive_duration=1440)
-            lobby["thread_id"] = th.id
-            save_storage()
+            th = await sent.create_thread(name=f"Practice {lobby.id}", auto_archive_duration=1440)
+            lobby.thread_id = th.id
+            db.save_practice(lobby)
             await th.send("🟩 Practice thread created. Chat here.")
         except Exception:
             pass
 
 # ========= SCHEDULER =========
+# Each game's stage deadlines are computed once and pushed onto a heap
+# (coach_scheduler.py); the runner sleeps until the next one is due. Stage flags
+# still record what already ran, so restarts and /forcecheck never double-fire.
+STAGE_DONE_FLAG = {
+    "6pm": GameFlag.DM_6PM,
+    "6am": GameFlag.CLAIMS_6AM,
+    "2h": GameFlag.AGGRESSIVE_2H,
+    "1h": GameFlag.UTIL_PROMOTED_1H,
+    "30m": GameFlag.T30_DONE,
+    "final": GameFlag.FINAL_CALL,
+}   # "panic" repeats and "start" always stays
+
+# gid -> (game ts, every stage's due time, sorted). Only a reschedule moves these.
+_stage_times: Dict[str, Tuple[float, List[Tuple[float, str]]]] = {}
+
+def stage_times(g: Game) -> List[Tuple[float, str]]:
+    hit = _stage_times.get(g.id)
+    if hit and hit[0] == g.ts:
+        return hit[1]
+    t0 = g.ts
+    anch = anchor_times(g.dt.astimezone(TZ))
+    out = [
+        (anch["6pm_prior"].timestamp(), "6pm"),
+        (anch["6am_day"].timestamp(), "6am"),
+        (t0 - POST_T_MINUS_2H, "2h"),
+        (t0 - POST_T_MINUS_1H, "1h"),
+        (t0 - T30, "30m"),
+    ]
+    out += [(t0 - before, "panic") for before in range(T15, 0, -PANIC_INTERVAL)]
+    out += [(t0 - T5, "final"), (t0, "start")]
+    out.sort(key=lambda e: e[0])
+    _stage_times[g.id] = (t0, out)
+    return out
+
+def forget_stage_times(gid: str):
+    _stage_times.pop(gid, None)
+
+def game_deadlines(g: Game) -> List[Tuple[float, str]]:
+    if GameFlag.CANCELED in g.flags:
+        return [(g.ts, "start")]
+    done = g.flags
+    return [(ts, stage) for ts, stage in stage_times(g)
+            if not (STAGE_DONE_FLAG.get(stage, 0) & done)]
+
+async def stage_6pm(g: Game, secs: float) -> bool:
+    if GameFlag.DM_6PM in g.flags:
+        return False
+    summary = await send_dm_confirm_requests(g, stage="6pm-day-before")
+    g.flags |= GameFlag.DM_6PM
+    await coach_log(f"📫 6pm confirms sent for {game_title(g)}: {summary.describe()}")
+    return True
+
+async def stage_6am(g: Game, secs: float) -> bool:
+    if GameFlag.CLAIMS_6AM in g.flags:
+        return False
+    need = False
+    for pos in STARTER_POSITIONS:
+        if g.is_open(pos):
+            await post_claim_request(g, pos, reason="6am")
+            need = True
+    if need:
+        dm_jobs = []
+        for pos in STARTER_POSITIONS:
+            slot = g.slot(pos)
+            if slot.user_id and not slot.confirmed:
+                dm_jobs.append(DMJob(slot.user_id, f"Morning! You’re still down as **{pos}** for {g.id}. Confirm ASAP or we’ll fill your spot."))
+        if dm_jobs:
+            summary = await dm_dispatcher.send_many(dm_jobs)
+            await coach_log(f"☀️ 6am nudges for {game_title(g)}: {summary.describe()}")
+    g.flags |= GameFlag.CLAIMS_6AM
+    return True
+
+async def stage_2h(g: Game, secs: float) -> bool:
+    if GameFlag.AGGRESSIVE_2H in g.flags:
+        return False
+    await replacement_round(g, reason="aggressive")
+    g.flags |= GameFlag.AGGRESSIVE_2H
+    return True
+
+async def stage_1h(g: Game, secs: float) -> bool:
+    if GameFlag.UTIL_PROMOTED_1H in g.flags:
+        return False
+    miss = [p for p in STARTER_POSITIONS if g.is_open(p)]
+    util = g.slot("UTIL")
+    if miss and util.filled:
+        oldest = miss[0]
+        promoted = util.user_id
+        g.slot(oldest).assign(promoted, confirmed=True)
+        util.assign(None)
+        await coach_log(f"🔄 Auto-promoted UTIL {mention(promoted)} to **{oldest}** for {game_title(g)}")
+        await post_new_util_request(g, "UTIL")
+        queue_lineup_update(g, note=f"UTIL auto-promoted to **{oldest}** at T-1h.")
+    g.flags |= GameFlag.UTIL_PROMOTED_1H
+    return True
+
+async def stage_30m(g: Game, secs: float) -> bool:
+    if GameFlag.T30_DONE in g.flags:
+        return False
+    await replacement_round(g, reason="30m")
+    g.flags |= GameFlag.T30_DONE
+    return True
+
+def panic_tick(g: Game, secs: float) -> float:
+    """Due time of the latest panic tick (see stage_times) at secs before start."""
+    return g.ts - (T15 - (T15 - secs) // PANIC_INTERVAL * PANIC_INTERVAL)
+
+async def stage_panic(g: Game, secs: float) -> bool:
+    if not (T15 >= secs > 0):
+        return False
+    tick = panic_tick(g, secs)
+    if g.last_panic_ts >= tick:
+        return False  # catching up on several missed panic ticks: fire once
+    # marked before the round, by its due time: a slow round must not make the next tick look early
+    g.last_panic_ts = tick
+    await replacement_round(g, reason="panic")
+    return True
+
+async def stage_final(g: Game, secs: float) -> bool:
+    if GameFlag.FINAL_CALL in g.flags:
+        return False
+    await replacement_round(g, reason="final")
+    g.flags |= GameFlag.FINAL_CALL
+    return True
+
+STAGES = {
+    "6pm": stage_6pm,
+    "6am": stage_6am,
+    "2h": stage_2h,
+    "1h": stage_1h,
+    "30m": stage_30m,
+    "panic": stage_panic,
+    "final": stage_final,
+}
+
+async def run_game_stage(gid: str, stage: str, due_ts: float = 0.0):
+    if due_ts:
+        stage_delay.observe(max(0.0, clock() - due_ts), stage)
+    with stage_seconds.time(stage):
+        await _run_game_stage(gid, stage)
+
+async def _run_game_stage(gid: str, stage: str):
+    g = find_game_by_id(gid)
+    if not g:
+        game_scheduler.cancel(gid)
+        forget_stage_times(gid)
+        return
+    secs = g.ts - now_tz().timestamp()
+    if secs <= 0:
+        # game has started (or we came back up after it did): nothing left to chase
+        if g.status != "past":
+            g.status = "past"
+            db.save_game(g)
+        game_scheduler.cancel(gid)
+        forget_stage_times(gid)
+        return
+    if stage == "start" or GameFlag.CANCELED in g.flags:
+        return
+    if await STAGES[stage](g, secs):
+        db.save_game(g)
+
+game_scheduler = DeadlineScheduler(run_game_stage, now=lambda: clock())
+
+def schedule_game(g: Game):
+    if g.status == "past":
+        game_scheduler.cancel(g.id)
+    else:
+        game_scheduler.schedule(g.id, game_deadlines(g))
+
+def schedule_all_games():
+    for g in db.active_games():
+        schedule_game(g)
+
+@tasks.loop(seconds=ARCHIVE_EVERY)
+async def archive_loop():
+    try:
+        games, lobbies = archive_stale(db, now_tz().timestamp())
+    except Exception as e:
+        log_ex("archive_loop", e)
+        return
+    if games or lobbies:
+        print(f"🗄️ Archived {games} past games and {lobbies} practice lobbies.")
+
+@tasks.loop(seconds=QUOTES_RELOAD_EVERY)
+async def quotes_loop():
+    if await quotes.refresh():
+        print(f"💬 Reloaded coachisms: {quotes.categories()}")
+
 async def scheduler_pass():
-    now = now_tz()
-    changed = False
-    for g in storage["games"]:
-        ensure_game(g)
-        dt = dtparser.parse(g["dt_iso"]).astimezone(TZ)
-        secs = (dt - now).total_seconds()
-        if secs <= 0 and g.get("status") != "past":
-            g["status"] = "past"
-            changed = True
-            continue
-        if g["flags"].get("canceled"):
-            continue
-        anch = anchor_times(dt)
-
-        if now >= anch["6pm_prior"] and not g["flags"].get("dm_6pm"):
-            await send_dm_confirm_requests(g, stage="6pm-day-before")
-            g["flags"]["dm_6pm"] = True
-            changed = True
-            await coach_log(f"📫 6pm confirms sent for {game_title(g)}")
-
-        if now >= anch["6am_day"] and not g["flags"].get("claims_6am"):
-            need = False
-            for pos in STARTER_POSITIONS:
-                if not g["roster"].get(pos) or not g["confirmed"].get(pos, False):
-                    await post_claim_request(g, pos, reason="6am")
-                    need = True
-            if need:
-                for pos in STARTER_POSITIONS:
-                    mention = g["roster"].get(pos)
-                    if mention and not g["confirmed"].get(pos, False):
-                        uid = extract_user_id(mention)
-                        if uid:
-                            try:
-                                u = await bot.fetch_user(uid)
-                                await u.send(f"Morning! You’re still down as **{pos}** for {g['id']}. Confirm ASAP or we’ll fill your spot.")
-                            except discord.Forbidden:
-                                pass
-            g["flags"]["claims_6am"] = True
-            changed = True
-
-        if secs <= POST_T_MINUS_2H and not g["flags"].get("aggressive_2h"):
-            await replacement_round(g, reason="aggressive")
-            g["flags"]["aggressive_2h"] = True
-            changed = True
-
-        if secs <= POST_T_MINUS_1H and not g["flags"].get("util_promoted_1h"):
-            miss = [p for p in STARTER_POSITIONS if not g["roster"].get(p) or not g["confirmed"].get(p, False)]
-            util = g["roster"].get("UTIL")
-            util_ok = g["confirmed"].get("UTIL", False)
-            if miss and util and util_ok:
-                oldest = miss[0]
-                g["roster"][oldest] = util
-                g["confirmed"][oldest] = True
-                g["roster"]["UTIL"] = None
-                g["confirmed"]["UTIL"] = False
-                await coach_log(f"🔄 Auto-promoted UTIL {util} to **{oldest}** for {game_title(g)}")
-                await post_new_util_request(g, "UTIL")
-                await post_or_update_lineup(g, note=f"UTIL auto-promoted to **{oldest}** at T-1h.")
-                changed = True
-            g["flags"]["util_promoted_1h"] = True
-
-        if secs <= T30 and not g["flags"].get("t30_done"):
-            await replacement_round(g, reason="30m")
-            g["flags"]["t30_done"] = True
-            changed = True
-
-        if T15 >= secs > 0:
-            last = g["flags"].get("last_panic_ts", 0)
-            if (now_tz().timestamp() - last) >= PANIC_INTERVAL:
-                await replacement_round(g, reason="panic")
-                g["flags"]["last_panic_ts"] = now_tz().timestamp()
-                changed = True
-
-        if secs <= T5 and not g["flags"].get("final_call"):
-            await replacement_round(g, reason="final")
-            g["flags"]["final_call"] = True
-            changed = True
-
-    if changed:
-        save_storage()
-
-@tasks.loop(seconds=CHECK_INTERVAL)
-async def scheduler_loop():
-    await scheduler_pass()
+    """Run every stage that is already due, for every active game (used by /forcecheck).
+    No due time is passed: catching up on old stages is not scheduler lateness."""
+    with scheduler_pass_seconds.time():
+        now = now_tz().timestamp()
+        for g in db.active_games():
+            for ts, stage in game_deadlines(g):
+                if ts <= now:
+                    await run_game_stage(g.id, stage)
 
 # ========= PERSISTENT VIEWS =========
+PERSISTENT_ITEMS = (
+    OpenManageFromCard, EditRosterFromCard, ClaimButton, RequestRemovalButton,
+    PracticeClaimButton, PracticeLeaveButton, PracticeSetStartButton,
+    PracticeAnnounceButton, PracticeCancelButton,
+)
+
 def register_persistent_views():
+    # fixed cost: one static view plus one template per button type, however many
+    # games and lobbies are stored
     bot.add_view(AdminPanelView())
-    for g in storage.get("games", []):
-        g = ensure_game(g)
-        v = discord.ui.View(timeout=None)
-        v.add_item(OpenManageFromCard(g["id"]))
-        if not g["flags"].get("locked") and not g["flags"].get("canceled"):
-            v.add_item(EditRosterFromCard(g["id"]))
-        bot.add_view(v)
-        for pos, mid in g.get("posted_requests", {}).items():
-            if mid:
-                vb = discord.ui.View(timeout=None)
-                vb.add_item(ClaimButton(g["id"], pos))
-                bot.add_view(vb)
-    for p in storage.get("practices", []):
-        p = ensure_practice(p)
-        v = discord.ui.View(timeout=None)
-        for pos in PRACTICE_POSITIONS:
-            v.add_item(PracticeClaimButton(p["id"], pos))
-        v.add_item(PracticeLeaveButton(p["id"]))
-        v.add_item(PracticeSetStartButton(p["id"]))
-        v.add_item(PracticeAnnounceButton(p["id"]))
-        v.add_item(PracticeCancelButton(p["id"]))
-        bot.add_view(v)
+    bot.add_dynamic_items(*PERSISTENT_ITEMS)
 
 # ========= SLASH COMMANDS =========
 @tree.command(name="dashboard", description="Post and pin the Coach Rosterbator dashboard (managers only).", guild=discord.Object(id=GUILD_ID))
@@ -1193,12 +1467,9 @@ async def dashboard_cmd(inter: discord.Interaction, channel: Optional[discord.Te
     target = channel or bot.get_channel(LINEUP_CHANNEL_ID) or inter.channel
     if not isinstance(target, (discord.TextChannel, discord.Thread)):
         return await inter.response.send_message("Need a text channel.", ephemeral=True)
-    msg = await target.send("🏒 **Coach Rosterbator — Admin Dashboard**", view=AdminPanelView())
-    try:
-        await msg.pin()
-    except Exception:
-        pass
-    await inter.response.send_message("Dashboard posted and pinned.", ephemeral=True)
+    await inter.response.defer(ephemeral=True, thinking=True)
+    await post_dashboard(target)
+    await inter.followup.send("Dashboard posted and pinned.", ephemeral=True)
 
 @tree.command(name="mygames", description="See your upcoming assignments and request removal.", guild=discord.Object(id=GUILD_ID))
 async def mygames_cmd(inter: discord.Interaction):
@@ -1208,8 +1479,8 @@ async def mygames_cmd(inter: discord.Interaction):
     v = discord.ui.View(timeout=600)
     lines = []
     for i, (dt, g, pos) in enumerate(rows[:5], 1):
-        lines.append(f"{i}. {g['opponent']} — {g['id']} as **{pos}**")
-        v.add_item(RequestRemovalButton(g["id"], pos))
+        lines.append(f"{i}. {g.opponent} — {g.id} as **{pos}**")
+        v.add_item(RequestRemovalButton(g.id, pos))
     if len(rows) > 5:
         lines.append(f"...and {len(rows) - 5} more.")
     await inter.response.send_message("\n".join(lines) + "\n(Use the red buttons to request removal if needed.)", view=v, ephemeral=True)
@@ -1219,71 +1490,116 @@ async def mygames_cmd(inter: discord.Interaction):
 async def setcaptain_cmd(inter: discord.Interaction, member: discord.Member):
     if not isinstance(inter.user, discord.Member) or not member_is_manager(inter.user):
         return await inter.response.send_message("Only managers.", ephemeral=True)
-    storage["captain_id"] = member.id
-    save_storage()
+    db.set_meta("captain_id", member.id)
     await inter.response.send_message(f"Captain set to {member.mention}.", ephemeral=True)
 
 @tree.command(name="forcecheck", description="Force a scheduler pass (managers only).", guild=discord.Object(id=GUILD_ID))
 async def forcecheck_cmd(inter: discord.Interaction):
     if not isinstance(inter.user, discord.Member) or not member_is_manager(inter.user):
         return await inter.response.send_message("Only managers.", ephemeral=True)
-    await scheduler_pass()
-    await inter.response.send_message("Checks completed.", ephemeral=True)
+    await inter.response.send_message("Running checks.", ephemeral=True)
+    jobs.submit("forcecheck", scheduler_pass)
 
 @tree.command(name="practice", description="Create a practice lobby (anyone).", guild=discord.Object(id=GUILD_ID))
 @app_commands.describe(start_in_minutes="Start in N minutes (1–120)", opponent="Optional opponent label")
 async def practice_cmd(inter: discord.Interaction, start_in_minutes: app_commands.Range[int, 1, 120], opponent: Optional[str] = None):
     pid = f"PRAC-{int(now_tz().timestamp())}"
-    lobby = ensure_practice({
-        "id": pid,
-        "creator_id": inter.user.id,
-        "channel_id": inter.channel.id if isinstance(inter.channel, (discord.TextChannel, discord.Thread)) else LINEUP_CHANNEL_ID,
-        "opponent": (opponent or "Random Online")[:60],
-        "start_in_min": int(start_in_minutes),
-    })
-    storage["practices"].append(lobby)
-    save_storage()
-    await post_or_update_practice(lobby, note="Practice lobby created.")
+    channel_id = inter.channel.id if isinstance(inter.channel, (discord.TextChannel, discord.Thread)) else LINEUP_CHANNEL_ID
+    lobby = Practice(pid, inter.user.id, channel_id, (opponent or "Random Online")[:60], int(start_in_minutes))
+    db.add_practice(lobby)
     await inter.response.send_message(f"Practice lobby **{pid}** created.", ephemeral=True)
+    jobs.submit(f"practice {pid}", refresh_practice, pid, "Practice lobby created.")
 
 # ========= LIFECYCLE =========
-@bot.event
-async def on_ready():
-    print(f"✅ Logged in as {bot.user} ({bot.user.id})")
-    await bot.change_presence(activity=discord.Game(name="Rosterbating (slash)"))
+# setup_hook runs once per process, before the first connect. on_ready fires again after
+# every reconnect that can't resume, so it does nothing that costs an API call.
+DASHBOARD_TEXT = "🏒 **Coach Rosterbator — Admin Dashboard**"
+scheduler_task: Optional[asyncio.Task] = None
+metrics_runner = None   # aiohttp AppRunner serving /metrics
+
+def command_tree_hash() -> str:
+    cmds = sorted((c.to_dict(tree) for c in tree.get_commands(guild=GUILD)), key=lambda c: c["name"])
+    return hashlib.sha256(json.dumps(cmds, sort_keys=True).encode()).hexdigest()
+
+async def sync_commands():
+    """tree.sync only when the command definitions changed since the last sync."""
+    digest = f"{GUILD_ID}:{command_tree_hash()}"
+    if db.get_meta("command_tree_hash") == digest:
+        print("📜 Slash commands unchanged; sync skipped.")
+        return
+    await tree.sync(guild=GUILD)
+    db.set_meta("command_tree_hash", digest)
+    print(f"📜 Slash commands synced to guild {GUILD_ID}.")
+
+async def post_dashboard(target: discord.abc.Messageable) -> discord.Message:
+    msg = await target.send(DASHBOARD_TEXT, view=AdminPanelView())
     try:
-        await tree.sync(guild=discord.Object(id=GUILD_ID))
-        print(f"📜 Slash commands synced to guild {GUILD_ID}.")
+        await msg.pin()
+    except Exception:
+        pass
+    db.set_meta("dashboard", {"channel_id": msg.channel.id, "message_id": msg.id})
+    return msg
+
+async def ensure_dashboard():
+    """Repost the dashboard if the one we recorded is gone: one fetch per process. Without a
+    recorded id (first run after upgrading), adopt a dashboard from the lineup history."""
+    lineup = bot.get_channel(LINEUP_CHANNEL_ID)
+    ref = db.get_meta("dashboard")
+    if ref:
+        try:
+            await message_cache.get(ref["channel_id"], ref["message_id"]).fetch()
+            return
+        except discord.NotFound:
+            message_cache.invalidate(ref["channel_id"], ref["message_id"])
+    elif isinstance(lineup, discord.TextChannel):
+        async for m in lineup.history(limit=50):
+            if m.author.id == bot.user.id and "Coach Rosterbator — Admin Dashboard" in (m.content or ""):
+                db.set_meta("dashboard", {"channel_id": lineup.id, "message_id": m.id})
+                return
+    if isinstance(lineup, discord.TextChannel):
+        await post_dashboard(lineup)
+
+async def after_first_ready():
+    await bot.wait_until_ready()
+    try:
+        await ensure_dashboard()
     except Exception as e:
-        log_ex("tree.sync", e)
-    register_persistent_views()
+        log_ex("auto_dashboard", e)
+    try:
+        await delete_stale_requests()
+    except Exception as e:
+        log_ex("delete_stale_requests", e)
+    await game_scheduler.run()
 
-    # Auto-post dashboard (best effort)
+async def setup_hook():
+    register_persistent_views()
     try:
-        lineup = bot.get_channel(LINEUP_CHANNEL_ID)
-        if isinstance(lineup, discord.TextChannel):
-            already = False
-            async for m in lineup.history(limit=50):
-                if m.author.id == bot.user.id and "Coach Rosterbator — Admin Dashboard" in (m.content or ""):
-                    already = True
-                    break
-            if not already:
-                msg = await lineup.send("🏒 **Coach Rosterbator — Admin Dashboard**", view=AdminPanelView())
-                try:
-                    await msg.pin()
-                except Exception:
-                    pass
+        await sync_commands()
     except Exception as e:
-        log_ex("auto_dashboard", e)
+        log_ex("tree.sync", e)
+    schedule_all_games()
+    archive_loop.start()
+    quotes_loop.start()
+    global scheduler_task, metrics_runner
+    watchdog.start()
+    if METRICS_PORT:
+        try:
+            metrics_runner = await serve_metrics(metrics, METRICS_PORT)
+            print(f"📈 Metrics on http://127.0.0.1:{METRICS_PORT}/metrics")
+        except OSError as e:
+            log_ex("metrics server", e)
+    scheduler_task = asyncio.create_task(after_first_ready())
 
-    if not scheduler_loop.is_running():
-        scheduler_loop.start()
+bot.setup_hook = setup_hook
+
+@bot.event
+async def on_ready():
+    print(f"✅ Logged in as {bot.user} ({bot.user.id})")
 
 # Save on exit
 import atexit
-atexit.register(save_storage)
+atexit.register(db.close)
 
 if __name__ == "__main__":
     print("Starting Coach Rosterbator (UI, slash)…")
-    save_storage()
     bot.run(TOKEN)
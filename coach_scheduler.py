@@ -0,0 +1,89 @@
+﻿# coach_scheduler.py — deadline heap for per-game scheduler stages
+# Each key (a game id) owns a set of (due_ts, stage) entries. run() sleeps until the
+# earliest one is due instead of polling, and is woken early whenever entries change.
+# Time comes from a clock callable: wall_clock in the bots, a VirtualClock in the simulator
+# (sim_rosterbater.py), which steps from one due entry to the next with run_due().
+
+import asyncio, heapq, itertools, time, traceback
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+MAX_SLEEP = 15 * 60   # re-check the wall clock at least this often (suspend/clock jumps)
+
+def wall_clock() -> float:
+    return time.time()
+
+class VirtualClock:
+    """Epoch seconds that only move when told to; call it like time.time."""
+
+    def __init__(self, start: float):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+    def set(self, ts: float):
+        self.now = max(self.now, ts)
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+class DeadlineScheduler:
+    """Min-heap of (due_ts, key, stage). schedule(key, ...) replaces everything the key
+    had before; cancel(key) drops it. Replaced entries are discarded lazily when they
+    reach the top of the heap."""
+
+    def __init__(self, on_due: Callable[[str, str, float], Awaitable[None]], now: Callable[[], float] = wall_clock):
+        self.on_due = on_due
+        self.now = now
+        self._heap: List[Tuple[float, int, str, int, str]] = []
+        self._gen: Dict[str, int] = {}
+        self._seq = itertools.count()
+        self._wake = asyncio.Event()
+
+    def schedule(self, key: str, deadlines: List[Tuple[float, str]]):
+        gen = next(self._seq)
+        self._gen[key] = gen
+        for ts, stage in deadlines:
+            heapq.heappush(self._heap, (ts, next(self._seq), key, gen, stage))
+        self._wake.set()
+
+    def cancel(self, key: str):
+        if self._gen.pop(key, None) is not None:
+            self._wake.set()
+
+    def _drop_stale(self):
+        while self._heap and self._gen.get(self._heap[0][2]) != self._heap[0][3]:
+            heapq.heappop(self._heap)
+
+    def next_due(self) -> Optional[float]:
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pending(self) -> int:
+        return sum(1 for e in self._heap if self._gen.get(e[2]) == e[3])
+
+    async def run_due(self) -> int:
+        """Run every entry that is due by now(), earliest first. Returns how many ran."""
+        ran = 0
+        while True:
+            due = self.next_due()
+            if due is None or due > self.now():
+                return ran
+            ts, _, key, _, stage = heapq.heappop(self._heap)
+            try:
+                await self.on_due(key, stage, ts)
+            except Exception as e:
+                print(f"⚠️ scheduler {key}/{stage}: {e}\n{traceback.format_exc()}")
+            ran += 1
+
+    async def run(self):
+        while True:
+            await self.run_due()
+            due = self.next_due()
+            delay = MAX_SLEEP if due is None else due - self.now()
+            if delay > 0:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=min(delay, MAX_SLEEP))
+                except asyncio.TimeoutError:
+                    pass
@@ -0,0 +1,1231 @@
+﻿# coach_storage.py — storage backends shared by both rosterbater bots
+#
+# JournalStorage (default): storage.json is the snapshot; storage.journal holds one
+# JSON record per mutation made since that snapshot. Startup = load snapshot +
+# replay journal. Every COMPACT_EVERY records the journal is folded back into a
+# fresh snapshot, so a single claim/confirm costs one small append no matter how
+# many games are on file. All file I/O happens on one writer thread (StorageWriter):
+# the event loop only queues records, never touches the disk.
+#
+# SqliteStorage: same operations on a local SQLite file with indexed game, slot,
+# request and practice tables. Seeded once from storage.json:
+#   python coach_storage.py import storage.json storage.db
+#
+# Both hand out Game/Practice objects (coach_models.py) and keep one live object per
+# id, so callers mutate in place and then call save_game/save_practice. Records on
+# disk are versioned; version-1 dicts (the old storage.json shape) are migrated on load.
+#
+# Games that started a while ago and stale practice lobbies move to cold storage
+# (archive_stale): append-only storage.<kind>.archive.jsonl files next to the
+# snapshot, or the archived_* tables. Only the hot set is scanned and snapshotted;
+# archived games stay queryable (archived_games / find_archived_game). Archive appends
+# go through the same writer thread as the journal, one write per file per sweep.
+
+import os, re, sys, json, sqlite3, threading, time, traceback
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from typing import Callable, Dict, Iterator, Optional, List, Tuple, Union
+
+from coach_models import (
+    SCHEMA_VERSION, V1_POS_ALIASES, Game, GameFlag, Practice, PracticeFlag, game_flags_from_v1,
+    game_from_dict, game_to_dict, keep_stale_requests, mention, practice_from_dict, practice_to_dict,
+    v1_positions,
+)
+
+COMPACT_EVERY = 500   # journal records between snapshots
+WRITE_RETRY     = 0.5    # seconds before the writer retries a failed write, doubled per failure
+WRITE_RETRY_MAX = 30.0
+CLOSE_ATTEMPTS  = 3      # failed attempts to drain the queue at close() before giving up
+
+ARCHIVE_GAME_AFTER     = 6 * 3600    # seconds after start before a game is archived
+ARCHIVE_PRACTICE_AFTER = 12 * 3600   # seconds after creation before a practice lobby is
+
+def empty_storage() -> dict:
+    return {"games": [], "practices": [], "captain_id": None}
+
+def _log_ex(where: str, e: Exception):
+    print(f"⚠️ {where}: {e}\n{traceback.format_exc()}")
+
+def _write_atomic(path: str, text: str):
+    """temp file + fsync + rename: a crash leaves either the old file or the new one."""
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return  # no directory handles (Windows); the rename is still atomic
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def _file_sizes(paths: List[str]) -> int:
+    total = 0
+    for p in paths:
+        try:
+            total += os.path.getsize(p)
+        except OSError:
+            pass
+    return total
+
+def _rollback(handle, path: str, size: int):
+    """After a failed append: drop the handle and cut the file back to its old size, so a
+    retry never leaves a torn line in the middle of it. Returns None (the new handle)."""
+    if handle is not None:
+        try:
+            handle.close()
+        except OSError:
+            pass
+    try:
+        if os.path.exists(path):
+            os.truncate(path, size)
+    except OSError:
+        pass
+    return None
+
+def _row_bytes(rows) -> int:
+    """Rough on-disk size of sqlite rows: text as UTF-8, numbers as 8 bytes, NULLs free."""
+    n = 0
+    for row in rows:
+        for v in row:
+            if isinstance(v, str):
+                n += len(v.encode("utf-8"))
+            elif v is not None:
+                n += 8
+    return n
+
+def _coalesce_key(rec: dict) -> tuple:
+    if rec["op"] == "meta":
+        return ("meta", rec["key"])
+    return (rec["op"], rec["kind"], rec["id"], rec.get("obj", {}).get("id"))
+
+class StorageWriter:
+    """The one thread that writes storage.journal and storage.json. Callers queue
+    journal records and snapshots and return at once; the thread takes everything
+    queued since its last pass, drops records a later one in the same batch
+    supersedes (and everything before a snapshot), then appends the rest with one
+    write + fsync. A burst of saves therefore costs one disk write. flush() waits
+    until everything queued so far is on disk. A write that fails is rolled back (a
+    partial append is cut off) and whatever of the batch isn't on disk yet goes back
+    to the head of the queue, retried with back-off. on_write(what, seconds, bytes),
+    if set, is called from the writer thread after each journal append or snapshot."""
+
+    def __init__(self, journal_path: str, snapshot_path: str):
+        self.journal_path = journal_path
+        self.snapshot_path = snapshot_path
+        self._cond = threading.Condition()
+        self._queue: List[Tuple[str, dict]] = []
+        self._busy = False
+        self._closed = False
+        self._journal = None
+        self.batches = 0
+        self.written = 0      # journal records that reached the disk
+        self.coalesced = 0    # records dropped as superseded
+        self.snapshots = 0
+        self.failures = 0     # write attempts that raised (and were retried)
+        self.on_write: Optional[Callable[[str, float, int], None]] = None
+        self._thread = threading.Thread(target=self._run, name="storage-writer", daemon=True)
+        self._thread.start()
+
+    def append(self, rec: dict):
+        self._submit("rec", rec)
+
+    def archive(self, path: str, line: bytes, done: Callable[[], None]):
+        """Append one archive line to path; done() runs on this thread once it is on disk.
+        Archive lines in a batch are written before its journal records, so a game's
+        delete never reaches the journal ahead of its archived copy."""
+        self._submit("arch", {"path": path, "line": line, "done": done})
+
+    def snapshot(self, snap: dict):
+        self._submit("snap", snap)
+
+    def _submit(self, what: str, item: dict):
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("storage writer is closed")
+            self._queue.append((what, item))
+            self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queue and not self._busy, timeout)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def stats(self) -> Dict[str, int]:
+        return {"batches": self.batches, "written": self.written, "coalesced": self.coalesced,
+                "snapshots": self.snapshots, "failures": self.failures, "queued": len(self._queue)}
+
+    def _run(self):
+        failures = 0
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue or self._closed)
+                if not self._queue:
+                    break
+                batch, self._queue = self._queue, []
+                self._busy = True
+            try:
+                self._write(batch)
+                failures = 0
+            except Exception as e:
+                failures += 1
+                self.failures += 1
+                _log_ex(f"storage writer (attempt {failures}, {len(batch)} writes kept for retry)", e)
+            finally:
+                with self._cond:
+                    self._queue[:0] = batch   # whatever isn't on disk yet, ahead of newer writes
+                    self._busy = False
+                    self._cond.notify_all()
+            if not failures:
+                continue
+            if self._closed:
+                if failures >= CLOSE_ATTEMPTS:
+                    with self._cond:
+                        lost, self._queue = len(self._queue), []
+                        self._cond.notify_all()
+                    print(f"⚠️ storage writer: giving up on {lost} queued writes at shutdown")
+                else:
+                    time.sleep(WRITE_RETRY)
+            else:
+                with self._cond:
+                    self._cond.wait_for(lambda: self._closed, min(WRITE_RETRY_MAX, WRITE_RETRY * 2 ** (failures - 1)))
+        if self._journal:
+            self._journal.close()
+
+    def _write(self, batch: List[Tuple[str, dict]]):
+        """Writes the batch, removing each part from it once that part is on disk. If this
+        raises, what is left in batch is exactly what still has to be written."""
+        self.batches += 1
+        archived = [item for what, item in batch if what == "arch"]
+        if archived:
+            try:
+                self._write_archives(archived)
+            finally:
+                batch[:] = [(what, item) for what, item in batch if not (what == "arch" and item.get("written"))]
+        snaps = [i for i, (what, _) in enumerate(batch) if what == "snap"]
+        if snaps:
+            self._snapshot(batch[snaps[-1]][1])
+            # the last snapshot already holds every record queued before it
+            self.coalesced += snaps[-1] - (len(snaps) - 1)
+            del batch[:snaps[-1] + 1]
+        latest: Dict[tuple, dict] = {}
+        for _, rec in batch:
+            key = _coalesce_key(rec)
+            latest.pop(key, None)   # re-insert so the survivor keeps its (later) position
+            latest[key] = rec
+        if latest:
+            t0 = time.perf_counter()
+            text = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in latest.values())
+            start = _file_sizes([self.journal_path])
+            try:
+                if self._journal is None:
+                    self._journal = open(self.journal_path, "a", encoding="utf-8")
+                self._journal.write(text)
+                self._journal.flush()
+                os.fsync(self._journal.fileno())
+            except Exception:
+                self._journal = _rollback(self._journal, self.journal_path, start)
+                raise
+            self.written += len(latest)
+            self._observe("journal", t0, text)
+        self.coalesced += len(batch) - len(latest)
+        batch.clear()
+
+    def _write_archives(self, items: List[dict]):
+        """One write + fsync per archive file; items are marked "written" file by file."""
+        t0 = time.perf_counter()
+        by_path: Dict[str, List[dict]] = {}
+        for item in items:
+            by_path.setdefault(item["path"], []).append(item)
+        size = 0
+        for path, group in by_path.items():
+            data = b"".join(item["line"] for item in group)
+            start = _file_sizes([path])
+            f = None
+            try:
+                f = open(path, "ab")
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+                f.close()
+            except Exception:
+                _rollback(f, path, start)
+                raise
+            size += len(data)
+            for item in group:
+                item["written"] = True
+                item["done"]()
+        if self.on_write:
+            self.on_write("archive", time.perf_counter() - t0, size)
+
+    def _observe(self, what: str, t0: float, text: str):
+        if self.on_write:
+            self.on_write(what, time.perf_counter() - t0, len(text.encode("utf-8")))
+
+    def _snapshot(self, snap: dict):
+        t0 = time.perf_counter()
+        text = json.dumps(snap, indent=2, ensure_ascii=False)
+        _write_atomic(self.snapshot_path, text)
+        # every journal record so far has seq <= snap["_seq"]; replay would skip them anyway
+        if self._journal:
+            self._journal.close()
+        self._journal = open(self.journal_path, "w", encoding="utf-8")
+        old = self.journal_path + ".old"   # left by older versions mid-compaction
+        if os.path.exists(old):
+            os.remove(old)
+        self.snapshots += 1
+        self._observe("snapshot", t0, text)
+
+# ========= MESSAGE INDEX =========
+# Every Discord message we post and later act on, keyed by message id:
+#   games:     lineup card ("lineup"), claim requests ("request", pos) and their
+#              game-thread copies ("thread_request", pos)
+#   practices: the lobby card ("practice")
+def message_refs(kind: str, obj: Union[Game, Practice]) -> Iterator[Tuple[int, str, Optional[str]]]:
+    if kind == "games":
+        if obj.lineup_message_id:
+            yield obj.lineup_message_id, "lineup", None
+        for pos, slot in obj.requests():
+            if slot.request_id:
+                yield slot.request_id, "request", pos
+            if slot.thread_request_id:
+                yield slot.thread_request_id, "thread_request", pos
+    elif obj.message_id:
+        yield obj.message_id, "practice", None
+
+class MessageIndex:
+    """message id -> (kind, object id, role, pos). Re-indexed from the object on every
+    save, so a lookup for an unrelated message is a single dict miss."""
+
+    def __init__(self):
+        self._refs: Dict[int, Tuple[str, str, str, Optional[str]]] = {}
+        self._owned: Dict[Tuple[str, str], List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._refs)
+
+    def index(self, kind: str, obj: Union[Game, Practice], old_id: Optional[str] = None):
+        if old_id and old_id != obj.id:
+            self.drop(kind, old_id)
+        self.drop(kind, obj.id)
+        mids = []
+        for mid, role, pos in message_refs(kind, obj):
+            self._refs[mid] = (kind, obj.id, role, pos)
+            mids.append(mid)
+        if mids:
+            self._owned[(kind, obj.id)] = mids
+
+    def add(self, mid: int, kind: str, key: str, role: str, pos: Optional[str] = None):
+        self._refs[int(mid)] = (kind, key, role, pos)
+        self._owned.setdefault((kind, key), []).append(int(mid))
+
+    def drop(self, kind: str, key: str):
+        for mid in self._owned.pop((kind, key), ()):
+            ref = self._refs.get(mid)
+            if ref and ref[0] == kind and ref[1] == key:
+                del self._refs[mid]
+
+    def get(self, mid: int) -> Optional[Tuple[str, str, str, Optional[str]]]:
+        return self._refs.get(mid)
+
+    def owned(self, kind: str, key: str) -> List[Tuple[int, str, Optional[str]]]:
+        return [(mid,) + self._refs[mid][2:] for mid in self._owned.get((kind, key), ()) if mid in self._refs]
+
+# ========= ASSIGNMENT INDEX =========
+class AssignmentIndex:
+    """user id -> sorted [(game ts, game id, pos)] for every non-past game slot they
+    hold. Re-indexed from the roster on every save; entries for games that have
+    started are pruned the next time that user is looked up."""
+
+    def __init__(self):
+        self._by_user: Dict[int, List[Tuple[float, str, str]]] = {}
+        self._owned: Dict[str, List[Tuple[int, Tuple[float, str, str]]]] = {}
+
+    def index(self, g: Game, old_id: Optional[str] = None):
+        if old_id and old_id != g.id:
+            self.drop(old_id)
+        self.drop(g.id)
+        if g.status == "past":
+            return
+        owned = []
+        for pos, slot in g.slots.items():
+            if slot.user_id:
+                entry = (g.ts, g.id, pos)
+                insort(self._by_user.setdefault(slot.user_id, []), entry)
+                owned.append((slot.user_id, entry))
+        if owned:
+            self._owned[g.id] = owned
+
+    def drop(self, gid: str):
+        for uid, entry in self._owned.pop(gid, ()):
+            rows = self._by_user.get(uid)
+            if not rows:
+                continue
+            i = bisect_left(rows, entry)
+            if i < len(rows) and rows[i] == entry:
+                del rows[i]
+            if not rows:
+                del self._by_user[uid]
+
+    def upcoming(self, uid: int, after: float) -> List[Tuple[float, str, str]]:
+        rows = self._by_user.get(uid)
+        if not rows:
+            return []
+        i = bisect_right(rows, (after, "\uffff", ""))
+        if i:
+            del rows[:i]   # those games have started; nothing asks for them again
+            if not rows:
+                del self._by_user[uid]
+        return list(rows)
+
+# ========= ARCHIVE =========
+# Every record starts {"id": ..., "ts": ...}; the index is built from that head alone.
+_ARCHIVE_HEAD = re.compile(rb'^\{"id": ("(?:[^"\\]|\\.)*"), "ts": (-?[0-9][0-9.eE+-]*)')
+
+class ArchiveFile:
+    """Append-only JSON lines, one {"id", "ts", "archived_at", "obj"} record per archived
+    game or lobby. Only (ts, id, byte offset) entries stay in memory, sorted by start
+    time, and they are built on first use rather than at startup. Records are read back
+    from disk a page at a time, latest start first. append() hands the line to write() (the storage
+    writer thread) and serves it from memory until it is on disk."""
+
+    def __init__(self, path: str, decode, write: Callable[[str, bytes, Callable[[], None]], None]):
+        self.path = path
+        self.decode = decode
+        self.write = write
+        self._entries: List[Tuple[float, str, int]] = []
+        self._ids: Dict[str, int] = {}
+        self._queued: Dict[int, bytes] = {}   # offset -> line the writer hasn't confirmed yet
+        self._end = 0
+        self._loaded = False
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # torn tail from a crash mid-append
+                m = _ARCHIVE_HEAD.match(line)
+                if m:
+                    key, ts = json.loads(m[1]), float(m[2])
+                else:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        break
+                    key, ts = rec["id"], float(rec.get("ts") or 0)
+                self._index(key, ts, self._end)
+                self._end += len(line)
+        if self._end < os.path.getsize(self.path):
+            os.truncate(self.path, self._end)
+
+    def _index(self, key: str, ts: float, off: int):
+        insort(self._entries, (ts, key, off))
+        self._ids[key] = off
+
+    def __len__(self) -> int:
+        self._load()
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        self._load()
+        return key in self._ids
+
+    def append(self, key: str, ts: float, obj: dict):
+        self._load()
+        rec = {"id": key, "ts": ts, "archived_at": time.time(), "obj": obj}
+        line = (json.dumps(rec, ensure_ascii=False) + "\n").encode("utf-8")
+        off = self._end
+        self._queued[off] = line
+        self._index(key, ts, off)
+        self._end += len(line)
+        self.write(self.path, line, lambda: self._queued.pop(off, None))
+
+    def _read(self, f, off: int) -> dict:
+        line = self._queued.get(off)
+        if line is None:
+            f.seek(off)
+            line = f.readline()
+        return json.loads(line)
+
+    def _open(self):
+        return open(self.path, "rb") if os.path.exists(self.path) else None
+
+    def get(self, key: str):
+        self._load()
+        off = self._ids.get(key)
+        if off is None:
+            return None
+        f = self._open()
+        try:
+            return self.decode(self._read(f, off)["obj"])
+        finally:
+            if f:
+                f.close()
+
+    def page(self, offset: int = 0, limit: int = 25) -> list:
+        """Latest start first, ties by id descending (same order as SqliteStorage)."""
+        self._load()
+        n = len(self._entries)
+        picks = self._entries[max(0, n - offset - limit):max(0, n - offset)][::-1]
+        if not picks:
+            return []
+        f = self._open()
+        try:
+            return [self.decode(self._read(f, off)["obj"]) for _ts, _key, off in picks]
+        finally:
+            if f:
+                f.close()
+
+    def records(self) -> Iterator[dict]:
+        """Every record in file (archive) order."""
+        self._load()
+        f = self._open()
+        try:
+            for off in sorted(self._ids.values()):
+                yield self._read(f, off)
+        finally:
+            if f:
+                f.close()
+
+class JournalStorage:
+    """Snapshot + append-only journal. `data` keeps the storage.json layout
+    ({"games": [Game...], "practices": [Practice...], meta...}); every write goes
+    through add_*/save_*/delete_*/set_meta."""
+
+    KINDS = ("games", "practices")
+    CODECS = {
+        "games": (game_to_dict, game_from_dict),
+        "practices": (practice_to_dict, practice_from_dict),
+    }
+
+    def __init__(self, snapshot_path: str, compact_every: int = COMPACT_EVERY):
+        snapshot_path = os.path.abspath(snapshot_path)   # the writer thread resolves it later
+        self.snapshot_path = snapshot_path
+        self.journal_path = os.path.splitext(snapshot_path)[0] + ".journal"
+        self.compact_every = compact_every
+        self.data = empty_storage()
+        self._index = {k: {} for k in self.KINDS}   # kind -> id -> obj
+        self.messages = MessageIndex()
+        self.assigned = AssignmentIndex()
+        self._seq = 0
+        self._pending = 0                            # records since last snapshot
+        self.writer = StorageWriter(self.journal_path, snapshot_path)
+        base = os.path.splitext(snapshot_path)[0]
+        self.archive = {k: ArchiveFile(f"{base}.{k}.archive.jsonl", self.CODECS[k][1], self.writer.archive)
+                        for k in self.KINDS}
+        self._load()
+
+    # ---- startup ----
+    def _load(self):
+        raw = {}
+        if os.path.exists(self.snapshot_path):
+            try:
+                with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                    raw = json.load(f)
+                if not isinstance(raw, dict):
+                    raise ValueError(f"expected a JSON object, got {type(raw).__name__}")
+            except Exception as e:
+                _log_ex("load_storage", e)
+                raw = {}
+                self._set_aside(self.snapshot_path)
+        self._seq = int(raw.pop("_seq", 0))
+        schema = int(raw.pop("schema", 1))
+        self.data = empty_storage()
+        self.data.update(raw)
+        for kind in self.KINDS:
+            decode = self.CODECS[kind][1]
+            self.data[kind] = [decode(d) for d in self.data[kind]]
+            self._index[kind] = {o.id: o for o in self.data[kind]}
+        migrate = bool(raw) and schema < SCHEMA_VERSION
+        if migrate:
+            backup = f"{self.snapshot_path}.v{schema}.bak"
+            if not os.path.exists(backup):
+                _write_atomic(backup, json.dumps(dict(raw, _seq=self._seq), indent=2, ensure_ascii=False))
+            print(f"📦 Migrating {self.snapshot_path} from schema v{schema} to v{SCHEMA_VERSION} (backup: {backup}).")
+        # older versions rotated the journal to .old while compacting; replay it first
+        replayed = 0
+        for path in (self.journal_path + ".old", self.journal_path):
+            replayed += self._replay(path)
+        if migrate or replayed or os.path.exists(self.journal_path + ".old"):
+            self.compact()
+        for kind in self.KINDS:
+            for o in self.data[kind]:
+                self.messages.index(kind, o)
+        for g in self.data["games"]:
+            self.assigned.index(g)
+
+    @staticmethod
+    def _set_aside(path: str):
+        """Rename an unreadable snapshot to <path>.corrupt-<ts> before anything can compact
+        over it; the history in it is recovered by hand."""
+        aside = f"{path}.corrupt-{int(time.time())}"
+        os.replace(path, aside)
+        print(f"⚠️ {path} is unreadable; moved it to {aside} and started from the journal alone.")
+
+    def _replay(self, path: str) -> int:
+        if not os.path.exists(path):
+            return 0
+        n = 0
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    break  # torn tail from a crash mid-append
+                if rec.get("seq", 0) <= self._seq:
+                    continue
+                self._apply(rec)
+                self._seq = rec["seq"]
+                n += 1
+        return n
+
+    def _apply(self, rec: dict):
+        op = rec["op"]
+        if op == "meta":
+            self.data[rec["key"]] = rec["value"]
+            return
+        kind, key = rec["kind"], rec["id"]
+        index = self._index[kind]
+        cur = index.pop(key, None)
+        if op == "put":
+            obj = self.CODECS[kind][1](rec["obj"])
+            if cur is None:
+                cur = index.pop(obj.id, None)   # coalesced batches can skip the record that moved it here
+            items = self.data[kind]
+            if cur is None:
+                items.append(obj)
+            else:
+                items[items.index(cur)] = obj
+            index[obj.id] = obj
+        elif op == "del" and cur is not None:
+            self.data[kind].remove(cur)
+
+    # ---- journal ----
+    def _record(self, rec: dict):
+        self._seq += 1
+        rec["seq"] = self._seq
+        self.writer.append(rec)
+        self._pending += 1
+        if self._pending >= self.compact_every:
+            self.compact()
+
+    def compact(self):
+        """Queue a fresh snapshot. Objects are encoded here (cheap dict building);
+        the JSON dump and the write happen on the writer thread."""
+        self._pending = 0
+        snap = {k: v for k, v in self.data.items() if k not in self.KINDS}
+        for kind in self.KINDS:
+            encode = self.CODECS[kind][0]
+            snap[kind] = [encode(o) for o in self.data[kind]]
+        snap["schema"] = SCHEMA_VERSION
+        snap["_seq"] = self._seq
+        self.writer.snapshot(snap)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        return self.writer.flush(timeout)
+
+    def close(self):
+        if self.writer.closed:
+            return
+        self.compact()
+        self.writer.close()
+
+    @property
+    def on_write(self) -> Optional[Callable[[str, float, int], None]]:
+        return self.writer.on_write
+
+    @on_write.setter
+    def on_write(self, fn: Optional[Callable[[str, float, int], None]]):
+        self.writer.on_write = fn
+
+    def size_bytes(self) -> int:
+        """Snapshot + journal + archive files on disk."""
+        return _file_sizes([self.snapshot_path, self.journal_path] + [a.path for a in self.archive.values()])
+
+    # ---- mutations ----
+    def _put(self, kind: str, obj: Union[Game, Practice], key: Optional[str] = None):
+        key = key if key is not None else obj.id
+        # encode and check the writer before touching the indexes, so a put that raises changes nothing
+        rec = {"op": "put", "kind": kind, "id": key, "obj": self.CODECS[kind][0](obj)}
+        if self.writer.closed:
+            raise RuntimeError("storage is closed")
+        index = self._index[kind]
+        cur = index.pop(key, None)
+        if cur is None:
+            self.data[kind].append(obj)
+        elif cur is not obj:
+            items = self.data[kind]
+            items[items.index(cur)] = obj
+        index[obj.id] = obj
+        self.messages.index(kind, obj, key)
+        if kind == "games":
+            self.assigned.index(obj, key)
+        self._record(rec)
+
+    def _delete(self, kind: str, key: str) -> bool:
+        cur = self._index[kind].pop(key, None)
+        if cur is None:
+            return False
+        self.data[kind].remove(cur)
+        self.messages.drop(kind, key)
+        if kind == "games":
+            self.assigned.drop(key)
+        self._record({"op": "del", "kind": kind, "id": key})
+        return True
+
+    def add_game(self, g: Game):
+        self._put("games", g)
+
+    def save_game(self, g: Game, old_id: Optional[str] = None):
+        """Journal the current state of one game. Pass old_id when the id changed (reschedule)."""
+        self._put("games", g, old_id)
+
+    def delete_game(self, gid: str) -> bool:
+        return self._delete("games", gid)
+
+    def add_practice(self, p: Practice):
+        self._put("practices", p)
+
+    def save_practice(self, p: Practice):
+        self._put("practices", p)
+
+    def _archive(self, kind: str, key: str, ts: float) -> bool:
+        obj = self._index[kind].get(key)
+        if obj is None:
+            return False
+        if key not in self.archive[kind]:   # already there if we crashed before the delete
+            self.archive[kind].append(key, ts, self.CODECS[kind][0](obj))
+        return self._delete(kind, key)
+
+    def archive_game(self, gid: str) -> bool:
+        g = self._index["games"].get(gid)
+        return self._archive("games", gid, g.ts) if g else False
+
+    def archive_practice(self, pid: str) -> bool:
+        p = self._index["practices"].get(pid)
+        return self._archive("practices", pid, p.created_ts or 0) if p else False
+
+    def set_meta(self, key: str, value):
+        self.data[key] = value
+        self._record({"op": "meta", "key": key, "value": value})
+
+    # ---- queries ----
+    def games(self) -> List[Game]:
+        return list(self.data["games"])
+
+    def game_count(self) -> int:
+        return len(self.data["games"])
+
+    def games_page(self, offset: int = 0, limit: int = 25) -> List[Game]:
+        """Hot games by start time."""
+        return sorted(self.data["games"], key=lambda g: g.ts)[offset:offset + limit]
+
+    def archived_game_count(self) -> int:
+        return len(self.archive["games"])
+
+    def archived_games(self, offset: int = 0, limit: int = 25) -> List[Game]:
+        """Archived games, latest start time first."""
+        return self.archive["games"].page(offset, limit)
+
+    def find_archived_game(self, gid: str) -> Optional[Game]:
+        return self.archive["games"].get(gid)
+
+    def active_games(self) -> List[Game]:
+        return [g for g in self.data["games"] if g.status != "past"]
+
+    def practices(self) -> List[Practice]:
+        return list(self.data["practices"])
+
+    def find_game(self, gid: str) -> Optional[Game]:
+        return self._index["games"].get(gid)
+
+    def find_practice(self, pid: str) -> Optional[Practice]:
+        return self._index["practices"].get(pid)
+
+    def find_message(self, message_id: int) -> Optional[Tuple[Union[Game, Practice], str, Optional[str]]]:
+        """(game or practice, role, pos) for a message we posted, else None."""
+        ref = self.messages.get(message_id)
+        if not ref:
+            return None
+        obj = self._index[ref[0]].get(ref[1])
+        return (obj, ref[2], ref[3]) if obj is not None else None
+
+    def find_request(self, message_id: int) -> Optional[Tuple[Game, str]]:
+        hit = self.find_message(message_id)
+        return (hit[0], hit[2]) if hit and hit[1] == "request" else None
+
+    def game_messages(self, gid: str) -> List[Tuple[int, str, Optional[str]]]:
+        """(message id, role, pos) for every tracked message of one game."""
+        return self.messages.owned("games", gid)
+
+    def upcoming_assignments(self, uid: int, after: float) -> List[Tuple[float, Game, str]]:
+        """(game ts, game, pos) for every slot uid holds in a non-past game starting
+        after `after` (epoch seconds), soonest first."""
+        games = self._index["games"]
+        return [(ts, games[gid], pos) for ts, gid, pos in self.assigned.upcoming(uid, after)]
+
+    def get_meta(self, key: str, default=None):
+        return self.data.get(key, default)
+
+# ========= SQLITE =========
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id                TEXT PRIMARY KEY,
+    dt_iso            TEXT NOT NULL,
+    dt_ts             REAL NOT NULL,
+    opponent          TEXT,
+    status            TEXT,
+    lineup_message_id INTEGER,
+    thread_id         INTEGER,
+    flags             TEXT NOT NULL DEFAULT '{}',
+    extra             TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS games_dt ON games(dt_ts);
+CREATE INDEX IF NOT EXISTS games_status ON games(status);
+CREATE INDEX IF NOT EXISTS games_lineup ON games(lineup_message_id);
+
+CREATE TABLE IF NOT EXISTS slots (
+    game_id   TEXT NOT NULL REFERENCES games(id) ON DELETE CASCADE ON UPDATE CASCADE,
+    pos       TEXT NOT NULL,
+    mention   TEXT,
+    user_id   INTEGER,
+    confirmed INTEGER NOT NULL DEFAULT 0,
+    held_by    INTEGER,
+    held_until REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (game_id, pos)
+);
+CREATE INDEX IF NOT EXISTS slots_user ON slots(user_id);
+
+CREATE TABLE IF NOT EXISTS requests (
+    message_id INTEGER PRIMARY KEY,
+    game_id    TEXT NOT NULL REFERENCES games(id) ON DELETE CASCADE ON UPDATE CASCADE,
+    pos        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS requests_game ON requests(game_id);
+
+CREATE TABLE IF NOT EXISTS thread_requests (
+    message_id INTEGER PRIMARY KEY,
+    game_id    TEXT NOT NULL REFERENCES games(id) ON DELETE CASCADE ON UPDATE CASCADE,
+    pos        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS thread_requests_game ON thread_requests(game_id);
+
+CREATE TABLE IF NOT EXISTS practices (
+    id         TEXT PRIMARY KEY,
+    message_id INTEGER,
+    data       TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS practices_msg ON practices(message_id);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+
+CREATE TABLE IF NOT EXISTS archived_games (
+    id          TEXT PRIMARY KEY,
+    dt_ts       REAL NOT NULL,
+    opponent    TEXT,
+    archived_at REAL NOT NULL,
+    data        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS archived_games_dt ON archived_games(dt_ts);
+
+CREATE TABLE IF NOT EXISTS archived_practices (
+    id          TEXT PRIMARY KEY,
+    archived_at REAL NOT NULL,
+    data        TEXT NOT NULL
+);
+"""
+
+# games.flags holds the GameFlag bits (a JSON object in rows written before schema v2);
+# games.extra holds the remaining scalar fields as JSON.
+
+class SqliteStorage:
+    """Indexed SQLite backend with the same interface as JournalStorage.
+    Loaded rows are kept in an identity map so every caller sees one Game per id."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+        self._games = {}
+        self._practices = {}
+        self.messages = MessageIndex()
+        self.on_write: Optional[Callable[[str, float, int], None]] = None   # (what, seconds, bytes) per commit
+        self._index_messages()
+
+    def is_empty(self) -> bool:
+        return self.conn.execute("SELECT 1 FROM games UNION ALL SELECT 1 FROM practices LIMIT 1").fetchone() is None
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    def size_bytes(self) -> int:
+        return _file_sizes([self.db_path, self.db_path + "-wal"])
+
+    def _observe(self, what: str, t0: float, nbytes: int):
+        if self.on_write:
+            self.on_write(what, time.perf_counter() - t0, nbytes)
+
+    def _migrate(self):
+        cols = {r["name"] for r in self.conn.execute("PRAGMA table_info(slots)")}
+        with self.conn:
+            if "held_by" not in cols:
+                self.conn.execute("ALTER TABLE slots ADD COLUMN held_by INTEGER")
+                self.conn.execute("ALTER TABLE slots ADD COLUMN held_until REAL NOT NULL DEFAULT 0")
+
+    def _index_messages(self):
+        c = self.conn
+        for r in c.execute("SELECT id, lineup_message_id FROM games WHERE lineup_message_id IS NOT NULL"):
+            self.messages.add(r["lineup_message_id"], "games", r["id"], "lineup")
+        for table, role in (("requests", "request"), ("thread_requests", "thread_request")):
+            for r in c.execute(f"SELECT message_id, game_id, pos FROM {table}"):
+                self.messages.add(r["message_id"], "games", r["game_id"], role, V1_POS_ALIASES.get(r["pos"], r["pos"]))
+        for r in c.execute("SELECT id, message_id FROM practices WHERE message_id IS NOT NULL"):
+            self.messages.add(r["message_id"], "practices", r["id"], "practice")
+
+    # ---- row mapping ----
+    def _load_game(self, row: sqlite3.Row) -> Game:
+        gid = row["id"]
+        g = self._games.get(gid)
+        if g is not None:
+            return g
+        g = Game(gid, datetime.fromisoformat(row["dt_iso"]), row["opponent"] or "UNKNOWN")
+        g.status = row["status"] or "upcoming"
+        g.lineup_message_id = row["lineup_message_id"]
+        g.thread_id = row["thread_id"]
+        extra = json.loads(row["extra"])
+        flags = json.loads(row["flags"])
+        if isinstance(flags, dict):   # row written before schema v2
+            g.flags, g.last_panic_ts, g.last_10min_minute = game_flags_from_v1(flags)
+        else:
+            g.flags = GameFlag(flags)
+            g.last_panic_ts = float(extra.pop("last_panic_ts", 0.0))
+            g.last_10min_minute = extra.pop("last_10min_minute", None)
+        g.extra = extra
+        # rows written before schema v2 can still be keyed by a v1 alias (UTIL_NEED)
+        rows = {r["pos"]: r for r in self.conn.execute(
+            "SELECT pos, user_id, confirmed, held_by, held_until FROM slots WHERE game_id=? ORDER BY rowid", (gid,))}
+        for pos, r in v1_positions(rows, lambda r: bool(r["user_id"]))[0].items():
+            slot = g.slot(pos)
+            slot.assign(r["user_id"], bool(r["confirmed"]))
+            slot.held_by, slot.held_until = r["held_by"], r["held_until"] or 0.0
+        for table, role in (("requests", "request"), ("thread_requests", "thread_request")):
+            ids, displaced = v1_positions({r["pos"]: r["message_id"] for r in self.conn.execute(
+                f"SELECT pos, message_id FROM {table} WHERE game_id=?", (gid,))})
+            for pos, mid in ids.items():
+                setattr(g.slot(pos), role + "_id", mid)
+            keep_stale_requests(g, role, displaced)
+        self._games[gid] = g
+        return g
+
+    def _load_practice(self, row: sqlite3.Row) -> Practice:
+        p = self._practices.get(row["id"])
+        if p is None:
+            p = self._practices[row["id"]] = practice_from_dict(json.loads(row["data"]))
+        return p
+
+    def _write_game(self, g: Game, old_id: Optional[str] = None) -> int:
+        """Upsert g's rows; returns the size of the values written (see _row_bytes)."""
+        gid = g.id
+        c = self.conn
+        if old_id and old_id != gid:
+            c.execute("UPDATE games SET id=? WHERE id=?", (gid, old_id))
+        extra = dict(g.extra)
+        if g.last_panic_ts:
+            extra["last_panic_ts"] = g.last_panic_ts
+        if g.last_10min_minute is not None:
+            extra["last_10min_minute"] = g.last_10min_minute
+        row = (gid, g.dt_iso, g.ts, g.opponent, g.status, g.lineup_message_id, g.thread_id,
+               json.dumps(int(g.flags)), json.dumps(extra, ensure_ascii=False))
+        c.execute(
+            """INSERT INTO games (id, dt_iso, dt_ts, opponent, status, lineup_message_id, thread_id, flags, extra)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT(id) DO UPDATE SET dt_iso=excluded.dt_iso, dt_ts=excluded.dt_ts,
+                 opponent=excluded.opponent, status=excluded.status,
+                 lineup_message_id=excluded.lineup_message_id, thread_id=excluded.thread_id,
+                 flags=excluded.flags, extra=excluded.extra""",
+            row,
+        )
+        slots = [(gid, pos, mention(sl.user_id), sl.user_id, int(sl.confirmed), sl.held_by, sl.held_until)
+                 for pos, sl in g.slots.items()]
+        nbytes = _row_bytes([row]) + _row_bytes(slots)
+        c.execute("DELETE FROM slots WHERE game_id=? AND pos NOT IN (%s)" % ",".join("?" * len(g.slots)),
+                  (gid, *g.slots))
+        c.executemany(
+            """INSERT INTO slots (game_id, pos, mention, user_id, confirmed, held_by, held_until) VALUES (?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT(game_id, pos) DO UPDATE SET mention=excluded.mention,
+                 user_id=excluded.user_id, confirmed=excluded.confirmed,
+                 held_by=excluded.held_by, held_until=excluded.held_until""",
+            slots,
+        )
+        for table, attr in (("requests", "request_id"), ("thread_requests", "thread_request_id")):
+            c.execute(f"DELETE FROM {table} WHERE game_id=?", (gid,))
+            refs = [(getattr(sl, attr), gid, pos) for pos, sl in g.slots.items() if getattr(sl, attr)]
+            c.executemany(f"INSERT OR REPLACE INTO {table} (message_id, game_id, pos) VALUES (?, ?, ?)", refs)
+            nbytes += _row_bytes(refs)
+        return nbytes
+
+    def _write_practice(self, p: Practice) -> int:
+        row = (p.id, p.message_id, json.dumps(practice_to_dict(p), ensure_ascii=False))
+        self.conn.execute("INSERT OR REPLACE INTO practices (id, message_id, data) VALUES (?, ?, ?)", row)
+        return _row_bytes([row])
+
+    # ---- mutations ----
+    def add_game(self, g: Game):
+        self.save_game(g)
+
+    def save_game(self, g: Game, old_id: Optional[str] = None):
+        t0 = time.perf_counter()
+        with self.conn:
+            nbytes = self._write_game(g, old_id)
+        self._observe("sqlite", t0, nbytes)
+        if old_id and old_id != g.id:
+            self._games.pop(old_id, None)
+        self._games[g.id] = g
+        self.messages.index("games", g, old_id)
+
+    def delete_game(self, gid: str) -> bool:
+        with self.conn:
+            cur = self.conn.execute("DELETE FROM games WHERE id=?", (gid,))
+        self._games.pop(gid, None)
+        self.messages.drop("games", gid)
+        return cur.rowcount > 0
+
+    def add_practice(self, p: Practice):
+        self.save_practice(p)
+
+    def save_practice(self, p: Practice):
+        t0 = time.perf_counter()
+        with self.conn:
+            nbytes = self._write_practice(p)
+        self._observe("sqlite", t0, nbytes)
+        self._practices[p.id] = p
+        self.messages.index("practices", p)
+
+    def archive_game(self, gid: str) -> bool:
+        g = self.find_game(gid)
+        if g is None:
+            return False
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO archived_games (id, dt_ts, opponent, archived_at, data) VALUES (?, ?, ?, ?, ?)",
+                (gid, g.ts, g.opponent, time.time(), json.dumps(game_to_dict(g), ensure_ascii=False)),
+            )
+            self.conn.execute("DELETE FROM games WHERE id=?", (gid,))
+        self._games.pop(gid, None)
+        self.messages.drop("games", gid)
+        return True
+
+    def archive_practice(self, pid: str) -> bool:
+        p = self.find_practice(pid)
+        if p is None:
+            return False
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO archived_practices (id, archived_at, data) VALUES (?, ?, ?)",
+                (pid, time.time(), json.dumps(practice_to_dict(p), ensure_ascii=False)),
+            )
+            self.conn.execute("DELETE FROM practices WHERE id=?", (pid,))
+        self._practices.pop(pid, None)
+        self.messages.drop("practices", pid)
+        return True
+
+    def set_meta(self, key: str, value):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    # ---- queries ----
+    def games(self) -> List[Game]:
+        return [self._load_game(r) for r in self.conn.execute("SELECT * FROM games ORDER BY dt_ts")]
+
+    def game_count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+    def games_page(self, offset: int = 0, limit: int = 25) -> List[Game]:
+        rows = self.conn.execute("SELECT * FROM games ORDER BY dt_ts LIMIT ? OFFSET ?", (limit, offset))
+        return [self._load_game(r) for r in rows]
+
+    def archived_game_count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM archived_games").fetchone()[0]
+
+    def archived_games(self, offset: int = 0, limit: int = 25) -> List[Game]:
+        """Archived games, latest start first. Detached copies; nothing saves them back."""
+        rows = self.conn.execute("SELECT data FROM archived_games ORDER BY dt_ts DESC, id DESC LIMIT ? OFFSET ?", (limit, offset))
+        return [game_from_dict(json.loads(r["data"])) for r in rows]
+
+    def find_archived_game(self, gid: str) -> Optional[Game]:
+        row = self.conn.execute("SELECT data FROM archived_games WHERE id=?", (gid,)).fetchone()
+        return game_from_dict(json.loads(row["data"])) if row else None
+
+    def active_games(self) -> List[Game]:
+        rows = self.conn.execute("SELECT * FROM games WHERE status IS NOT 'past' ORDER BY dt_ts")
+        return [self._load_game(r) for r in rows]
+
+    def practices(self) -> List[Practice]:
+        return [self._load_practice(r) for r in self.conn.execute("SELECT * FROM practices")]
+
+    def find_game(self, gid: str) -> Optional[Game]:
+        g = self._games.get(gid)
+        if g is not None:
+            return g
+        row = self.conn.execute("SELECT * FROM games WHERE id=?", (gid,)).fetchone()
+        return self._load_game(row) if row else None
+
+    def find_practice(self, pid: str) -> Optional[Practice]:
+        p = self._practices.get(pid)
+        if p is not None:
+            return p
+        row = self.conn.execute("SELECT * FROM practices WHERE id=?", (pid,)).fetchone()
+        return self._load_practice(row) if row else None
+
+    def find_message(self, message_id: int) -> Optional[Tuple[Union[Game, Practice], str, Optional[str]]]:
+        ref = self.messages.get(message_id)
+        if not ref:
+            return None
+        obj = self.find_game(ref[1]) if ref[0] == "games" else self.find_practice(ref[1])
+        return (obj, ref[2], ref[3]) if obj is not None else None
+
+    def find_request(self, message_id: int) -> Optional[Tuple[Game, str]]:
+        hit = self.find_message(message_id)
+        return (hit[0], hit[2]) if hit and hit[1] == "request" else None
+
+    def game_messages(self, gid: str) -> List[Tuple[int, str, Optional[str]]]:
+        return self.messages.owned("games", gid)
+
+    def upcoming_assignments(self, uid: int, after: float) -> List[Tuple[float, Game, str]]:
+        rows = self.conn.execute(
+            """SELECT g.*, s.pos AS slot_pos FROM slots s JOIN games g ON g.id = s.game_id
+               WHERE s.user_id=? AND g.status IS NOT 'past' AND g.dt_ts > ? ORDER BY g.dt_ts""",
+            (uid, after),
+        ).fetchall()
+        return [(r["dt_ts"], self._load_game(r), r["slot_pos"]) for r in rows]
+
+    def get_meta(self, key: str, default=None):
+        row = self.conn.execute("SELECT value FROM meta WHERE key=?", (key,)).fetchone()
+        return json.loads(row["value"]) if row else default
+
+# ========= SETUP =========
+def import_storage_json(json_path: str, dest: SqliteStorage) -> int:
+    """One-shot copy of storage.json (+ any pending journal) into a SqliteStorage."""
+    src = JournalStorage(json_path)
+    try:
+        with dest.conn:
+            for g in src.games():
+                dest._write_game(g)
+            for p in src.practices():
+                dest._write_practice(p)
+            for rec in src.archive["games"].records():
+                dest.conn.execute(
+                    "INSERT OR IGNORE INTO archived_games (id, dt_ts, opponent, archived_at, data) VALUES (?, ?, ?, ?, ?)",
+                    (rec["id"], rec["ts"], rec["obj"].get("opponent"), rec["archived_at"], json.dumps(rec["obj"], ensure_ascii=False)),
+                )
+            for rec in src.archive["practices"].records():
+                dest.conn.execute(
+                    "INSERT OR IGNORE INTO archived_practices (id, archived_at, data) VALUES (?, ?, ?)",
+                    (rec["id"], rec["archived_at"], json.dumps(rec["obj"], ensure_ascii=False)),
+                )
+            for k, v in src.data.items():
+                if k not in JournalStorage.KINDS:
+                    dest.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (k, json.dumps(v)))
+        return len(src.data["games"])
+    finally:
+        src.close()
+
+# ========= CLAIMS =========
+# Compare-and-set on the live Game (see Game.reserve/claim), persisted only when it
+# wins and undone if that write fails. Nothing awaits between the check and the write, so two claimers racing for
+# one slot can't both be told they're in.
+def _save_slot(db, g: Game, pos: str, before: tuple):
+    """Persist a slot change. If the write raises, the slot is put back as it was before
+    the exception propagates, so nobody is told they hold a slot that isn't on disk."""
+    try:
+        db.save_game(g)
+    except Exception:
+        s = g.slot(pos)
+        s.user_id, s.confirmed, s.held_by, s.held_until = before
+        raise
+
+def _slot_state(g: Game, pos: str) -> tuple:
+    s = g.slot(pos)
+    return s.user_id, s.confirmed, s.held_by, s.held_until
+
+def reserve_slot(db, g: Game, pos: str, uid: int, until: float, now: float) -> bool:
+    before = _slot_state(g, pos)
+    if not g.reserve(pos, uid, until, now):
+        return False
+    _save_slot(db, g, pos, before)
+    return True
+
+def claim_slot(db, g: Game, pos: str, uid: int, now: float, confirmed: bool = True) -> bool:
+    before = _slot_state(g, pos)
+    if not g.claim(pos, uid, now, confirmed):
+        return False
+    _save_slot(db, g, pos, before)
+    return True
+
+def release_slot(db, g: Game, pos: str, uid: int) -> bool:
+    """Drop uid's hold on pos (declined or timed out)."""
+    s = g.slots.get(pos)
+    if not s or s.held_by != uid:
+        return False
+    before = _slot_state(g, pos)
+    s.release()
+    _save_slot(db, g, pos, before)
+    return True
+
+def archive_stale(db, now: float, game_after: float = ARCHIVE_GAME_AFTER,
+                  practice_after: float = ARCHIVE_PRACTICE_AFTER) -> Tuple[int, int]:
+    """Move games that started more than game_after seconds ago, and practice lobbies
+    that were canceled or created more than practice_after ago, into the archive.
+    Returns (games, practices) archived."""
+    games = [g.id for g in db.games() if g.ts + game_after <= now]
+    practices = [p.id for p in db.practices()
+                 if PracticeFlag.CANCELED in p.flags
+                 or (p.created_ts is not None and p.created_ts + practice_after <= now)]
+    for gid in games:
+        db.archive_game(gid)
+    for pid in practices:
+        db.archive_practice(pid)
+    return len(games), len(practices)
+
+def open_storage(json_path: str, backend: str = "journal", db_path: str = "storage.db"):
+    if backend == "sqlite":
+        db = SqliteStorage(db_path)
+        if db.is_empty() and os.path.exists(json_path):
+            n = import_storage_json(json_path, db)
+            db._index_messages()
+            print(f"📦 Imported {n} games from {json_path} into {db_path}.")
+        return db
+    return JournalStorage(json_path)
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4 or sys.argv[1] != "import":
+        raise SystemExit("usage: python coach_storage.py import storage.json storage.db")
+    target = SqliteStorage(sys.argv[3])
+    print(f"Imported {import_storage_json(sys.argv[2], target)} games into {sys.argv[3]}.")
+    target.close()
@@ -0,0 +1,170 @@
+﻿# coach_watchdog.py — event-loop lag watchdog for the UI bot
+# A loop task wakes every TICK and records how late it woke (loop_lag_seconds). A
+# monitor thread watches that task's heartbeat. Once it is older than THRESHOLD, the loop
+# is stuck in synchronous code (a JSON dump, a dateutil parse, file I/O), and the thread
+# grabs the loop thread's stack right then, while the culprit is still on it. When the
+# loop comes back, the stall is blamed on the innermost frame from the bot's own files
+# and its callers ("save_game inside post_claim_request"), counted per site in metrics,
+# and reported through the report callback (the coach log). Reports are rate-limited:
+# one per site per REPORT_EVERY and at most REPORTS_PER_HOUR overall. Suppressed stalls
+# are still counted and get summed into the next report.
+
+import asyncio, os, sys, threading, time, traceback
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from coach_metrics import Registry
+
+TICK = 0.1                # seconds between heartbeats
+THRESHOLD = 0.25          # lag that counts as a stall (and triggers a stack capture)
+REPORT_EVERY = 10 * 60    # seconds between reports for the same site
+REPORTS_PER_HOUR = 6      # reports of any site
+STACK_LINES = 12          # frames shown in a report
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+NOT_BLAMED = ("coach_watchdog.py", "coach_metrics.py")   # our own plumbing, never the culprit
+
+class Stall:
+    __slots__ = ("started", "stack", "lag")
+
+    def __init__(self, started: float, stack: List[traceback.FrameSummary]):
+        self.started = started
+        self.stack = stack      # outermost first, as traceback.extract_stack returns it
+        self.lag = 0.0
+
+    def own_frames(self) -> List[traceback.FrameSummary]:
+        return [f for f in self.stack
+                if os.path.dirname(os.path.abspath(f.filename)) == HERE and os.path.basename(f.filename) not in NOT_BLAMED]
+
+    def site(self) -> str:
+        """Innermost frame in the bot's own files, e.g. "coach_storage.save_game"."""
+        own = self.own_frames()
+        if not own:
+            return "unknown"
+        f = own[-1]
+        return f"{os.path.splitext(os.path.basename(f.filename))[0]}.{f.name}"
+
+    def describe(self) -> str:
+        own = self.own_frames()
+        leaf = self.stack[-1] if self.stack else None
+        if not own:
+            where = "outside the bot's code"
+        else:
+            where = " inside ".join(f"`{f.name}`" for f in reversed(own[-3:]))
+        if leaf is not None and (not own or leaf is not own[-1]):
+            where += f" (blocked in {os.path.basename(leaf.filename)}:{leaf.lineno} `{leaf.name}`)"
+        return where
+
+    def format_stack(self) -> str:
+        frames = [f for f in self.stack if f"{os.sep}asyncio{os.sep}" not in f.filename]   # loop plumbing
+        return "".join(traceback.format_list(frames[-STACK_LINES:]))
+
+class LoopWatchdog:
+    """start() from a running loop (setup_hook); stop() on shutdown. report(text) is awaited
+    on the loop for rate-limited stall reports."""
+
+    def __init__(self, report: Optional[Callable[[str], Awaitable[None]]] = None, metrics: Optional[Registry] = None,
+                 tick: float = TICK, threshold: float = THRESHOLD):
+        self.report = report
+        self.tick = tick
+        self.threshold = threshold
+        self._beat = time.monotonic()
+        self._captured_beat: Optional[float] = None
+        self._captures: Deque[Stall] = deque(maxlen=32)    # filled by the monitor thread
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._sending: set = set()
+        self._last_site_report: Dict[str, float] = {}
+        self._recent_reports: Deque[float] = deque()
+        self._suppressed: Dict[str, Tuple[int, float]] = {}   # site -> (stalls, worst lag) since its last report
+        self.stalls = 0
+        self.worst = 0.0
+        self._lag = self._stall_count = None
+        if metrics is not None:
+            self._lag = metrics.histogram("loop_lag_seconds", "How late the watchdog's heartbeat woke up.",
+                                          buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10))
+            self._stall_count = metrics.counter("loop_stalls_total", f"Event-loop stalls over {threshold}s by blamed function.", ("site",))
+
+    def start(self):
+        if self._task is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._monitor, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    # ---- monitor thread ----
+    def _monitor(self):
+        while not self._stop.wait(self.tick / 2):
+            beat = self._beat
+            if time.monotonic() - beat < self.threshold or beat == self._captured_beat:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)
+            del frame
+            if self._beat != beat:
+                continue   # the loop moved on while we looked; that stack isn't the culprit
+            self._captured_beat = beat
+            self._captures.append(Stall(beat, stack))
+
+    # ---- loop side ----
+    async def _heartbeat(self):
+        while True:
+            self._beat = before = time.monotonic()
+            await asyncio.sleep(self.tick)
+            lag = max(0.0, time.monotonic() - before - self.tick)
+            if self._lag is not None:
+                self._lag.observe(lag)
+            if lag < self.threshold:
+                self._captures.clear()   # a capture racing a heartbeat that did make it
+                continue
+            stall = self._captures.popleft() if self._captures else Stall(before, [])
+            self._captures.clear()
+            stall.lag = lag
+            self._on_stall(stall)
+
+    def _on_stall(self, stall: Stall):
+        site = stall.site()
+        self.stalls += 1
+        self.worst = max(self.worst, stall.lag)
+        if self._stall_count is not None:
+            self._stall_count.inc(site)
+        print(f"🐢 Event loop blocked {stall.lag:.2f}s in {stall.describe()}")
+        now = time.monotonic()
+        n, worst = self._suppressed.get(site, (0, 0.0))
+        while self._recent_reports and now - self._recent_reports[0] > 3600:
+            self._recent_reports.popleft()
+        if (now - self._last_site_report.get(site, -REPORT_EVERY) < REPORT_EVERY
+                or len(self._recent_reports) >= REPORTS_PER_HOUR or self.report is None):
+            self._suppressed[site] = (n + 1, max(worst, stall.lag))
+            return
+        self._suppressed.pop(site, None)
+        self._last_site_report[site] = now
+        self._recent_reports.append(now)
+        print(stall.format_stack(), end="")
+        text = f"🐢 Event loop blocked **{stall.lag:.2f}s** in {stall.describe()}"
+        if n:
+            text += f" — {n} more stall(s) here since the last report, worst {worst:.2f}s"
+        if stall.stack:
+            text += f"\n```\n{stall.format_stack()[-1500:]}```"
+        task = asyncio.get_running_loop().create_task(self._send(text))
+        self._sending.add(task)
+        task.add_done_callback(self._sending.discard)
+
+    async def _send(self, text: str):
+        try:
+            await self.report(text)
+        except Exception:
+            traceback.print_exc()
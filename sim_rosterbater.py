@@ -0,0 +1,168 @@
+﻿# sim_rosterbater.py — replay a season of game days through the UI bot's scheduler
+# Drives coach_rosterbater_ui with a coach_scheduler.VirtualClock and a zero-latency
+# coach_fake_discord.FakeDiscord. The clock jumps straight from one due stage to the next,
+# so weeks of 6pm / 6am / T-2h / T-1h / T-30 / panic / T-5 stages replay in seconds.
+# Between stages, players answer open claim requests at random. The report covers API
+# calls per stage, the busiest minute overall and inside panic windows, and how rosters
+# looked at puck drop. With --trace it adds the ordered action trace: DMs, posts, edits,
+# deletes, and promotions (logged to #coach-log).
+# Same --seed, same trace: diff two runs to catch stage regressions.
+#
+#   python sim_rosterbater.py [--games 30] [--start 2025-10-01] [--seed 7] [--fill 0.75]
+#                             [--claim-rate 0.3] [--backend journal|sqlite] [--trace] [--out FILE]
+
+import argparse, asyncio, os, random, time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+import bench_rosterbater as bench
+from coach_fake_discord import FakeDiscord
+from coach_scheduler import VirtualClock
+
+OPPONENTS = ["Ice Wolves", "Puck Dynasty", "Blue Liners", "Zamboni Drivers", "Five Hole Heroes",
+             "Top Shelf", "Slapshot Syndicate", "Cold Cuts", "Biscuit Basket", "Penalty Box"]
+GAME_TIMES = [(19, 0), (20, 30), (21, 30), (22, 15)]
+DOUBLEHEADER = 0.15     # chance a game day gets a second game 90 minutes later
+PANIC_WINDOW = 15 * 60
+
+def season(w: "bench.World", ui, start: datetime, games: int, fill: float, rng: random.Random):
+    out = []
+    day = start.date()
+    while len(out) < games:
+        day += timedelta(days=rng.choice((1, 2, 3, 4)))
+        hh, mm = rng.choice(GAME_TIMES)
+        times = [datetime(day.year, day.month, day.day, hh, mm, tzinfo=ui.TZ)]
+        if rng.random() < DOUBLEHEADER:
+            times.append(times[0] + timedelta(minutes=90))
+        for dt in times[:games - len(out)]:
+            minutes = int((dt.timestamp() - ui.clock()) // 60)
+            out.append(w.game(minutes, fill=fill, opponent=rng.choice(OPPONENTS)))
+    return out
+
+async def players_respond(ui, fake: FakeDiscord, rng: random.Random, claim_rate: float):
+    """Each open claim request gets answered with probability claim_rate, through the
+    same ClaimButton -> ConfirmClaimView path a player clicks."""
+    for g in ui.db.active_games():
+        for pos, _slot in list(g.requests()):
+            if not g.is_open(pos) or rng.random() >= claim_rate:
+                continue
+            rostered = {g.user(p) for p in ui.ALL_POSITIONS}
+            uid = rng.choice([u for u in bench.PLAYERS if u not in rostered])
+            inter = fake.interaction(uid, ui.GENERAL_CHANNEL_ID)
+            await ui.ClaimButton(g.id, pos).callback(inter)
+            if isinstance(inter.response.view, ui.ConfirmClaimView):
+                await inter.response.view.yes.callback(fake.interaction(uid))
+    await ui.jobs.join()
+    await ui.lineup_renders.drain()
+
+def busiest_minute(trace, keep=lambda ctx: True):
+    per_min = Counter(int(ts // 60) for ts, ctx, _r, _d in trace if keep(ctx))
+    return max(per_min.items(), key=lambda kv: (kv[1], -kv[0])) if per_min else (0, 0)
+
+def max_overlap(intervals) -> int:
+    edges = sorted([(a, 1) for a, _ in intervals] + [(b, -1) for _, b in intervals])
+    cur = peak = 0
+    for _, d in edges:
+        cur += d
+        peak = max(peak, cur)
+    return peak
+
+async def simulate(args) -> List[str]:
+    ui = bench.load_ui()
+    random.seed(args.seed)   # quote picks
+    rng = random.Random(args.seed)
+    start = datetime.fromisoformat(args.start).replace(hour=12, tzinfo=ui.TZ)
+    vclock = VirtualClock(start.timestamp())
+    ui.clock = vclock
+    ui.lineup_renders.delay = 0
+    fake = FakeDiscord(seed=args.seed, clock=vclock, trace=True)
+    fake.install(ui.bot)
+    w = bench.World(fake, args.backend, args.seed)
+    games = season(w, ui, start, args.games, args.fill, rng)
+
+    calls: Dict[str, List[int]] = defaultdict(list)      # stage -> API calls per run
+    routes: Dict[str, Counter] = defaultdict(Counter)     # stage -> route -> calls
+    full_at_drop = 0
+    run_stage = ui.game_scheduler.on_due
+
+    async def counted(bucket: str, coro):
+        before = Counter(fake.calls)
+        await coro
+        await ui.jobs.join()
+        await ui.lineup_renders.drain()
+        diff = Counter(fake.calls)
+        diff.subtract(before)
+        calls[bucket].append(sum(diff.values()))
+        routes[bucket].update(+diff)
+
+    async def on_due(gid: str, stage: str, ts: float):
+        nonlocal full_at_drop
+        fake.context = f"{gid[5:16]} {stage}"
+        if stage == "start":
+            g = ui.find_game_by_id(gid)
+            if g and all(g.user(p) for p in ui.STARTER_POSITIONS):
+                full_at_drop += 1
+        await counted(stage, run_stage(gid, stage, ts))
+
+    ui.game_scheduler.on_due = on_due
+    end = max(g.ts for g in games) + 3600
+    t0 = time.perf_counter()
+    ticks = 0
+    while True:
+        due = ui.game_scheduler.next_due()
+        if due is None or due > end:
+            break
+        vclock.set(due)
+        await ui.game_scheduler.run_due()
+        fake.context = "players"
+        await counted("(players)", players_respond(ui, fake, rng, args.claim_rate))
+        ticks += 1
+    wall = time.perf_counter() - t0
+    w.close()
+
+    span = (end - start.timestamp()) / 86400
+    out = [f"== season: {len(games)} games over {span:.1f} days, {ticks} scheduler ticks, "
+           f"replayed in {wall:.2f}s (seed {args.seed}, fill {args.fill:.0%}, claim rate {args.claim_rate:.0%}, {args.backend})",
+           f"  {'stage':<10} {'runs':>5} {'calls':>7} {'avg':>6} {'max':>5}   top routes"]
+    order = ["6pm", "6am", "2h", "1h", "30m", "panic", "final", "start", "(players)"]
+    for stage in sorted(calls, key=lambda s: order.index(s) if s in order else len(order)):
+        n = calls[stage]
+        top = ", ".join(f"{r} {c}" for r, c in routes[stage].most_common(4))
+        out.append(f"  {stage:<10} {len(n):>5} {sum(n):>7} {sum(n) / len(n):>6.1f} {max(n):>5}   {top}")
+    minute, peak = busiest_minute(fake.trace)
+    pminute, ppeak = busiest_minute(fake.trace, lambda ctx: ctx.endswith(" panic"))
+    fmt = lambda m: datetime.fromtimestamp(m * 60, ui.TZ).strftime("%Y-%m-%d %H:%M")
+    out.append(f"  busiest minute: {peak} calls at {fmt(minute)}; in a panic window: "
+               + (f"{ppeak} calls at {fmt(pminute)}" if ppeak else "none"))
+    out.append(f"  overlapping panic windows at most: {max_overlap([(g.ts - PANIC_WINDOW, g.ts) for g in games])}")
+    promoted = sum(1 for _ts, _c, route, d in fake.trace if route == "send" and "Auto-promoted" in d)
+    out.append(f"  full starting lineup at puck drop: {full_at_drop}/{len(games)}; UTIL promotions: {promoted}")
+    out.append(f"  total API calls: {fake.total_calls()}")
+    if args.trace:
+        out.append("")
+        out += [f"{datetime.fromtimestamp(ts, ui.TZ):%Y-%m-%d %H:%M:%S}  {ctx:<18} {route:<20} {detail}"
+                for ts, ctx, route, detail in fake.trace]
+    return out
+
+def main():
+    ap = argparse.ArgumentParser(description="Replay a season of game days through the scheduler.")
+    ap.add_argument("--games", type=int, default=30)
+    ap.add_argument("--start", default="2025-10-01", help="season start date (YYYY-MM-DD)")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--fill", type=float, default=0.75, help="chance each slot starts out assigned")
+    ap.add_argument("--claim-rate", type=float, default=0.3, help="chance an open request is claimed per tick")
+    ap.add_argument("--backend", choices=("journal", "sqlite"), default="journal")
+    ap.add_argument("--trace", action="store_true", help="include the ordered action trace")
+    ap.add_argument("--out", help="also write the report here")
+    args = ap.parse_args()
+    if args.out:
+        args.out = os.path.abspath(args.out)
+    lines = asyncio.run(simulate(args))
+    print("\n".join(lines))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            fh.write("\n".join(lines) + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+﻿# test_claim_contention.py — many claimers, one slot, exactly one winner
+# Hammers a single slot with concurrent reserve_slot/claim_slot coroutines on both storage
+# backends, the way a panic-mode stampede hits ClaimButton and ConfirmClaimView.yes, and
+# checks that only one claimer was ever told they're in and that only they reached disk.
+# ClaimButtonRace runs the same race through the UI bot's own callbacks against the
+# offline fake (coach_fake_discord), with REST latency between the check and the reply.
+#
+#   python -m pytest -q test_claim_contention.py     (or: python test_claim_contention.py)
+
+import asyncio, os, random, sys, tempfile, time, unittest
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+import bench_rosterbater as bench
+from coach_fake_discord import FakeDiscord
+from coach_models import Game
+from coach_scheduler import VirtualClock
+from coach_storage import JournalStorage, SqliteStorage, claim_slot, reserve_slot
+
+CLAIMERS = 50
+POS = "C"
+HOLD = 60.0
+
+class ClaimContention(unittest.TestCase):
+    BACKENDS = ("journal", "sqlite")
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix="claimtest-")
+
+    def open(self, backend: str):
+        if backend == "sqlite":
+            return SqliteStorage(os.path.join(self.dir, "storage.db"))
+        return JournalStorage(os.path.join(self.dir, "storage.json"))
+
+    def fresh(self, backend: str):
+        db = self.open(backend)
+        g = Game("g1", datetime.fromtimestamp(time.time() + 3600), "Opp")
+        db.add_game(g)
+        return db, g
+
+    def persisted(self, backend: str, db) -> Game:
+        """The game as a restart would see it."""
+        db.close()
+        db = self.open(backend)
+        try:
+            return db.find_game("g1")
+        finally:
+            db.close()
+
+    def run_claimers(self, claimer, n: int = CLAIMERS):
+        async def main():
+            return await asyncio.gather(*(claimer(uid) for uid in range(1000, 1000 + n)))
+        return asyncio.run(main())
+
+    def test_reserve_then_confirm(self):
+        """Button press reserves, the confirm click (after some awaits) claims."""
+        for backend in self.BACKENDS:
+            with self.subTest(backend=backend):
+                db, g = self.fresh(backend)
+                rng = random.Random(16)
+                reserved, claimed = [], []
+
+                async def claimer(uid: int):
+                    await asyncio.sleep(rng.random() * 0.01)    # interaction arrives
+                    now = time.time()
+                    if not reserve_slot(db, g, POS, uid, now + HOLD, now):
+                        return
+                    reserved.append(uid)
+                    await asyncio.sleep(rng.random() * 0.01)    # fetch_message, delete, lineup edit...
+                    if claim_slot(db, g, POS, uid, time.time()):
+                        claimed.append(uid)
+
+                self.run_claimers(claimer)
+                self.assertEqual(len(reserved), 1, reserved)
+                self.assertEqual(claimed, reserved)
+                self.assertEqual(g.slot(POS).user_id, claimed[0])
+                saved = self.persisted(backend, db)
+                self.assertEqual(saved.slot(POS).user_id, claimed[0])
+                self.assertTrue(saved.slot(POS).confirmed)
+
+    def test_direct_claims(self):
+        """Claims without a reservation (reaction claims, admin paths) race too."""
+        for backend in self.BACKENDS:
+            with self.subTest(backend=backend):
+                db, g = self.fresh(backend)
+                rng = random.Random(17)
+                winners = []
+
+                async def claimer(uid: int):
+                    await asyncio.sleep(rng.random() * 0.01)
+                    if claim_slot(db, g, POS, uid, time.time()):
+                        winners.append(uid)
+
+                self.run_claimers(claimer)
+                self.assertEqual(len(winners), 1, winners)
+                self.assertEqual(self.persisted(backend, db).slot(POS).user_id, winners[0])
+
+    def test_expired_hold_passes_on(self):
+        """A hold that times out lets the next claimer in, and the late confirm then loses."""
+        for backend in self.BACKENDS:
+            with self.subTest(backend=backend):
+                db, g = self.fresh(backend)
+                now = time.time()
+                self.assertTrue(reserve_slot(db, g, POS, 1, now + 1, now))
+                self.assertFalse(reserve_slot(db, g, POS, 2, now + HOLD, now))
+                later = now + 2
+                winners = []
+
+                async def claimer(uid: int):
+                    await asyncio.sleep(0)
+                    if claim_slot(db, g, POS, uid, later):
+                        winners.append(uid)
+
+                self.run_claimers(claimer)
+                self.assertEqual(len(winners), 1, winners)
+                self.assertFalse(claim_slot(db, g, POS, 1, later))
+                self.assertEqual(self.persisted(backend, db).slot(POS).user_id, winners[0])
+
+class ClaimButtonRace(unittest.TestCase):
+    BACKENDS = ("journal", "sqlite")
+
+    def setUp(self):
+        self.ui = ui = bench.load_ui()
+        self.saved = ui.clock, ui.lineup_renders.delay
+        self.clock = ui.clock = VirtualClock(time.time())
+        ui.lineup_renders.delay = 0
+
+    def tearDown(self):
+        self.ui.clock, self.ui.lineup_renders.delay = self.saved
+
+    def run_world(self, backend: str, scenario):
+        async def main():
+            fake = FakeDiscord(latency=0.002, jitter=0.5, seed=16, clock=self.clock)
+            fake.install(self.ui.bot)
+            w = bench.World(fake, backend, 16)
+            try:
+                g = w.game(40, open_positions=(POS,))
+                await self.ui.post_claim_request(g, POS)
+                rostered = {g.user(p) for p in self.ui.ALL_POSITIONS}
+                players = w.rng.sample([u for u in bench.PLAYERS if u not in rostered], 30)
+                await scenario(fake, g, players)
+                await self.ui.jobs.join()
+                await self.ui.lineup_renders.drain()
+            finally:
+                w.close()
+        bench.run(main())
+
+    def click(self, fake, g: Game, uid: int):
+        inter = fake.interaction(uid, self.ui.GENERAL_CHANNEL_ID)
+        return inter, self.ui.ClaimButton(g.id, POS).callback(inter)
+
+    def prompted(self, inters):
+        return [i for i in inters if isinstance(i.response.view, self.ui.ConfirmClaimView)]
+
+    @staticmethod
+    def locked_in(inters):
+        return [i for i in inters if (i.response.content or "").startswith("Locked in")]
+
+    def test_stampede_then_confirm(self):
+        """20 clicks at once: one prompt. Its Yes (double-clicked) races 10 more clicks."""
+        for backend in self.BACKENDS:
+            with self.subTest(backend=backend):
+                async def scenario(fake, g, players):
+                    clicks = [self.click(fake, g, uid) for uid in players[:20]]
+                    await asyncio.gather(*(c for _, c in clicks))
+                    prompts = self.prompted([i for i, _ in clicks])
+                    self.assertEqual(len(prompts), 1)
+                    holder = prompts[0]
+                    view = holder.response.view
+                    confirms = [fake.interaction(holder.user.id) for _ in range(2)]
+                    late = [self.click(fake, g, uid) for uid in players[20:]]
+                    await asyncio.gather(*(view.yes.callback(c) for c in confirms), *(c for _, c in late))
+                    self.assertEqual(len(self.locked_in(confirms)), 1)
+                    self.assertEqual(self.prompted([i for i, _ in late]), [])
+                    self.assertEqual(g.user(POS), holder.user.id)
+                    self.assertEqual(self.ui.db.find_game(g.id).user(POS), holder.user.id)
+                self.run_world(backend, scenario)
+
+    def test_expired_hold_confirms_race(self):
+        """A's hold runs out, B gets the slot's prompt, and both press Yes at once."""
+        for backend in self.BACKENDS:
+            with self.subTest(backend=backend):
+                async def scenario(fake, g, players):
+                    a, b = players[:2]
+                    ia, click = self.click(fake, g, a)
+                    await click
+                    self.clock.advance(self.ui.CLAIM_HOLD + 1)
+                    ib, click = self.click(fake, g, b)
+                    await click
+                    self.assertEqual(len(self.prompted([ia, ib])), 2)
+                    ca, cb = fake.interaction(a), fake.interaction(b)
+                    await asyncio.gather(ia.response.view.yes.callback(ca), ib.response.view.yes.callback(cb))
+                    self.assertEqual(self.locked_in([ca, cb]), [cb])
+                    self.assertEqual(g.user(POS), b)
+                self.run_world(backend, scenario)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+﻿# test_panic_cadence.py — one panic round per scheduled panic tick
+# Replays a game's last 15 minutes through the UI bot's deadline heap on a VirtualClock,
+# with replacement rounds that take a while (as they do against Discord). Each panic tick
+# stage_times schedules must run exactly one round; a scheduler that fell behind by
+# several ticks must catch up with one.
+#
+#   python -m pytest -q test_panic_cadence.py     (or: python test_panic_cadence.py)
+
+import asyncio, os, sys, unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+import bench_rosterbater as bench
+from coach_fake_discord import FakeDiscord
+from coach_scheduler import VirtualClock
+
+ROUND_SECONDS = 1.5   # how long each replacement round keeps the stage busy
+
+class PanicCadence(unittest.TestCase):
+    def setUp(self):
+        self.ui = ui = bench.load_ui()
+        self.saved = ui.clock, ui.replacement_round, ui.lineup_renders.delay
+        self.clock = ui.clock = VirtualClock(1_760_000_000.0)
+        ui.lineup_renders.delay = 0
+        fake = FakeDiscord(seed=3, clock=self.clock)
+        fake.install(ui.bot)
+        self.world = bench.World(fake, "journal", 3)
+        self.rounds = []   # (reason, seconds before start when the round began)
+        real_round = self.saved[1]
+
+        async def slow_round(g, reason=""):
+            self.rounds.append((reason, g.ts - self.clock()))
+            self.clock.advance(ROUND_SECONDS)
+            await real_round(g, reason=reason)
+        ui.replacement_round = slow_round
+
+    def tearDown(self):
+        self.world.close()
+        self.ui.clock, self.ui.replacement_round, self.ui.lineup_renders.delay = self.saved
+
+    def run_until(self, end: float):
+        async def main():
+            sched = self.ui.game_scheduler
+            while True:
+                due = sched.next_due()
+                if due is None or due > end:
+                    break
+                self.clock.set(due)
+                await sched.run_due()
+            await self.ui.jobs.join()
+            await self.ui.lineup_renders.drain()
+        bench.run(main())
+
+    def panic_rounds(self):
+        return [before for reason, before in self.rounds if reason == "panic"]
+
+    def test_one_round_per_tick(self):
+        g = self.world.game(20, open_positions=("C", "G"))
+        self.run_until(g.ts)
+        ticks = list(range(self.ui.T15, 0, -self.ui.PANIC_INTERVAL))
+        fired = self.panic_rounds()
+        self.assertEqual(len(fired), len(ticks), fired)
+        for tick, before in zip(ticks, fired):
+            self.assertLessEqual(tick - before, self.ui.PANIC_INTERVAL / 2, (tick, before))
+
+    def test_missed_ticks_fire_once(self):
+        g = self.world.game(20, open_positions=("C",))
+        self.clock.set(g.ts - 500)   # bot was busy (or down) from T-15 until now
+        self.run_until(g.ts - 500)
+        self.assertEqual(len(self.panic_rounds()), 1, self.rounds)
+        self.run_until(g.ts)
+        self.assertEqual(len(self.panic_rounds()), 1 + len(range(420, 0, -self.ui.PANIC_INTERVAL)), self.rounds)
+
+if __name__ == "__main__":
+    unittest.main()